@@ -0,0 +1,335 @@
+"""Benchmark throughput bot terhadap chain lokal (anvil).
+
+Menjalankan anvil (atau memakai node dev yang sudah berjalan lewat --rpc-url), mendeploy
+contracts/TestToken.sol, membuat N penerima sintetis, lalu menjalankan mesin pengiriman bot
+(run_engine) dan melaporkan transfer/detik, panggilan RPC per transfer, latensi submit-ke-konfirmasi
+p50/p95/p99, dan gas per penerima. Latensi dan error RPC dapat disuntikkan agar perubahan mesin
+bisa dibandingkan antar run dengan kondisi jaringan yang sama.
+
+Contoh:
+    python benchmark.py --recipients 500 --engine pipeline --latency-ms 50 --error-rate 0.02 --json hasil.json
+
+Konfigurasi bot lain (ADAPTIVE_CONCURRENCY, FEE_STRATEGY, ...) diambil dari environment seperti biasa.
+
+Injeksi fault menumpang pada atribut privat HTTPProvider._request_session_manager milik web3.py 7.x
+(diuji dengan 7.16); versi web3 lain ditolak saat start alih-alih diam-diam tidak menyuntikkan apa pun.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from threading import Lock
+
+from web3 import Web3
+from web3 import __version__ as web3_version
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ANVIL_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"  # Akun #0 bawaan anvil/hardhat
+ENGINES = {
+    "thread": {},
+    "pipeline": {"PIPELINE_MODE": "1"},
+    "async": {"EXECUTION_BACKEND": "async"},
+    "batch": {"BATCH_MODE": "1"},
+    "presign": {"PRESIGN_MODE": "1"},
+}
+
+console = Console()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_anvil(port, block_time=0):
+    """Menjalankan anvil di port lokal dan menunggu sampai RPC siap."""
+    if shutil.which("anvil") is None:
+        raise RuntimeError("anvil tidak ditemukan di PATH (pasang Foundry) atau gunakan --rpc-url ke node dev lain")
+    command = ["anvil", "--port", str(port), "--silent"]
+    if block_time > 0:
+        command += ["--block-time", str(block_time)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    w3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{port}"))
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if w3.is_connected():
+            return process
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("anvil tidak merespons dalam 30 detik")
+
+def deploy_test_token(w3, private_key, supply_tokens):
+    """Mengompilasi dan mendeploy contracts/TestToken.sol (butuh py-solc-x). Mengembalikan alamat kontrak."""
+    try:
+        import solcx
+    except ImportError:
+        raise RuntimeError("py-solc-x dibutuhkan untuk mengompilasi contracts/TestToken.sol")
+    compiled = solcx.compile_files([os.path.join(REPO_DIR, "contracts", "TestToken.sol")], output_values=["abi", "bin"])
+    artifact = next(v for k, v in compiled.items() if k.endswith(":TestToken"))
+    account = w3.eth.account.from_key(private_key)
+    contract = w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bin"])
+    tx = contract.constructor(supply_tokens * 10**18).build_transaction({
+        "from": account.address,
+        "nonce": w3.eth.get_transaction_count(account.address, "pending"),
+        "chainId": w3.eth.chain_id,
+    })
+    signed_tx = account.sign_transaction(tx)
+    receipt = w3.eth.wait_for_transaction_receipt(w3.eth.send_raw_transaction(signed_tx.raw_transaction), timeout=60)
+    if receipt.status != 1:
+        raise RuntimeError("Deploy TestToken gagal")
+    return receipt.contractAddress
+
+def synthetic_recipients(count, seed):
+    """Alamat penerima deterministik dari seed, sehingga run bisa diulang persis."""
+    return [Web3.to_checksum_address(Web3.keccak(text=f"{seed}:{i}")[-20:]) for i in range(count)]
+
+class FaultInjector:
+    """Menyuntikkan latensi dan error "capacity exceeded" pada setiap round-trip HTTP ke RPC."""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0, seed=0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = Lock()
+        self.active = False
+        self.roundtrips = 0
+        self.injected_errors = 0
+
+    def error_response(self, data):
+        payload = json.loads(data)
+        error = {"code": -32005, "message": "capacity exceeded"}
+        if isinstance(payload, list):
+            return json.dumps([{"jsonrpc": "2.0", "id": item.get("id"), "error": error} for item in payload]).encode()
+        return json.dumps({"jsonrpc": "2.0", "id": payload.get("id"), "error": error}).encode()
+
+    def wrap(self, provider):
+        # Disisipkan di session manager HTTP web3 agar batch JSON-RPC dihitung sebagai satu round-trip.
+        # Atribut privat web3.py 7.x (HTTPProvider._make_request/make_batch_request memanggilnya)
+        manager = getattr(provider, "_request_session_manager", None)
+        if manager is None or not hasattr(manager, "make_post_request"):
+            raise RuntimeError(
+                f"Injeksi fault butuh web3.py 7.x (HTTPProvider._request_session_manager); terpasang web3 {web3_version}"
+            )
+        original = manager.make_post_request
+
+        def make_post_request(endpoint_uri, data, **kwargs):
+            if not self.active:
+                return original(endpoint_uri, data, **kwargs)
+            with self.lock:
+                self.roundtrips += 1
+                delay = self.latency + self.rng.uniform(0, self.jitter)
+                fail = self.rng.random() < self.error_rate
+                if fail:
+                    self.injected_errors += 1
+            if delay > 0:
+                time.sleep(delay)
+            if fail:
+                return self.error_response(data)
+            return original(endpoint_uri, data, **kwargs)
+
+        manager.make_post_request = make_post_request
+
+class RunRecorder:
+    """Mencatat panggilan RPC per metode, waktu submit/konfirmasi per penerima, dan gas terpakai."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.active = False
+        self.calls = Counter()
+        self.submitted_at = {}
+        self.latencies = []
+        self.gas_used = 0
+        self.confirmed = 0
+
+    def install(self, bot):
+        pool = bot.SENDER.w3.provider
+        original_call = pool.call
+
+        def call(endpoint, method, params):
+            if self.active:
+                with self.lock:
+                    self.calls[method] += 1
+            return original_call(endpoint, method, params)
+
+        pool.call = call
+
+        original_signed = bot.SENDER.journal.signed
+
+        def signed(sender, nonce, entries, tx_hash, raw, gas_price=None):
+            now = time.monotonic()
+            with self.lock:
+                for receiver, _ in entries:
+                    self.submitted_at.setdefault(receiver, now)
+            return original_signed(sender, nonce, entries, tx_hash, raw, gas_price)
+
+        bot.SENDER.journal.signed = signed
+
+        original_record_success = bot.record_success
+
+        def record_success(receiver, amount, tx_hash, gas_used):
+            now = time.monotonic()
+            with self.lock:
+                submitted_at = self.submitted_at.get(receiver)
+                if submitted_at is not None:
+                    self.latencies.append(now - submitted_at)
+                self.gas_used += gas_used
+                self.confirmed += 1
+            return original_record_success(receiver, amount, tx_hash, gas_used)
+
+        bot.record_success = record_success
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+def run_benchmark(args):
+    anvil = None
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        rpc_url = args.rpc_url
+        if rpc_url is None:
+            port = free_port()
+            anvil = start_anvil(port, args.block_time)
+            rpc_url = f"http://127.0.0.1:{port}"
+        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        sender = w3.eth.account.from_key(args.private_key).address
+        token_address = deploy_test_token(w3, args.private_key, args.supply)
+        console.print(f"[cyan]🧪 TestToken dideploy di {token_address} | RPC: {rpc_url}[/cyan]")
+
+        recipients = synthetic_recipients(args.recipients, args.seed)
+        with open(os.path.join(workdir, "wallets.csv"), "w") as f:
+            f.write("\n".join(recipients) + "\n")
+        os.chdir(workdir)
+
+        # Nilai kosong juga ditetapkan agar variabel milik environment produksi tidak ikut terpakai
+        os.environ.update({
+            "PRIVATE_KEY": args.private_key,
+            "SENDER_ADDRESS": sender,
+            "INFURA_URL": rpc_url,
+            "RPC_URLS": rpc_url,
+            "TOKEN_CONTRACT": token_address,
+            "STATE_DB": os.path.join(workdir, "sent_state.db"),
+            "SENDER_KEYS": "",
+            "TREASURY_PRIVATE_KEY": "",
+            "DISPERSE_CONTRACT": "",
+            "CONFIRM_WS_URL": "",
+        })
+        os.environ.update(ENGINES[args.engine])
+
+        random.seed(args.seed)
+        sys.path.insert(0, REPO_DIR)
+        import multi_sender_cli_v2 as bot
+
+        bot.configure_logging()
+        sender = bot.Sender.from_env().open_state().connect().activate()
+        bot.DAILY_WALLET_LIMIT = args.recipients
+        bot.MAX_TOTAL_SEND = args.supply
+        injector = FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+        for endpoint in sender.w3.provider.endpoints:
+            injector.wrap(endpoint.provider)
+        recorder = RunRecorder()
+        recorder.install(bot)
+
+        sender.gas_oracle.start()
+        sender.fees.start_run()
+        bot.display_initial_status()
+
+        recipients = bot.iter_recipients(bot.CSV_FILE, rng=random.Random(args.seed))
+        plan = bot.DispatchPlan.build(bot.today_key(), str(args.seed), sender.token_decimals, recipients)
+
+        injector.active = recorder.active = True
+        started = time.monotonic()
+        total_sent, processed, _ = bot.run_engine(plan.transfers())
+        elapsed = time.monotonic() - started
+        injector.active = recorder.active = False
+
+        confirmed = recorder.confirmed
+        rpc_calls = sum(recorder.calls.values())
+        return {
+            "engine": args.engine,
+            "recipients": args.recipients,
+            "seed": args.seed,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "block_time": args.block_time,
+            "processed": processed,
+            "confirmed": confirmed,
+            "tokens_sent": total_sent,
+            "elapsed_s": round(elapsed, 3),
+            "transfers_per_s": round(confirmed / elapsed, 3) if elapsed else 0,
+            "rpc_calls": rpc_calls,
+            "rpc_calls_per_transfer": round(rpc_calls / confirmed, 2) if confirmed else None,
+            "http_roundtrips": injector.roundtrips,
+            "http_roundtrips_per_transfer": round(injector.roundtrips / confirmed, 2) if confirmed else None,
+            "injected_errors": injector.injected_errors,
+            "latency_p50_s": round(percentile(recorder.latencies, 50), 3),
+            "latency_p95_s": round(percentile(recorder.latencies, 95), 3),
+            "latency_p99_s": round(percentile(recorder.latencies, 99), 3),
+            "gas_per_recipient": recorder.gas_used // confirmed if confirmed else None,
+            "rpc_calls_by_method": dict(recorder.calls.most_common()),
+        }
+    finally:
+        os.chdir(original_cwd)
+        if anvil is not None:
+            anvil.terminate()
+            anvil.wait(timeout=10)
+        if args.keep:
+            console.print(f"[cyan]📁 Direktori kerja disimpan di {workdir}[/cyan]")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def print_report(report):
+    table = Table(title="📊 Hasil Benchmark", box=box.ROUNDED, show_header=True, header_style="bold cyan")
+    table.add_column("Metrik", style="cyan")
+    table.add_column("Nilai", style="green")
+    for key, value in report.items():
+        if key != "rpc_calls_by_method":
+            table.add_row(key, str(value))
+    console.print(table)
+    methods = Table(title="Panggilan RPC per metode", box=box.SIMPLE)
+    methods.add_column("Metode", style="cyan")
+    methods.add_column("Jumlah", style="green")
+    for method, count in report["rpc_calls_by_method"].items():
+        methods.add_row(method, str(count))
+    console.print(methods)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput bot terhadap chain lokal")
+    parser.add_argument("--recipients", type=int, default=200, help="Jumlah penerima sintetis")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="thread")
+    parser.add_argument("--seed", type=int, default=1, help="Seed untuk penerima, jumlah token, dan injeksi error")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latensi tambahan per round-trip RPC")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Jitter acak tambahan per round-trip RPC")
+    parser.add_argument("--error-rate", type=float, default=0, help="Peluang round-trip RPC dijawab 'capacity exceeded'")
+    parser.add_argument("--block-time", type=float, default=0, help="Waktu blok anvil dalam detik (0 = automine)")
+    parser.add_argument("--supply", type=int, default=10_000_000, help="Suplai TestToken untuk pengirim (token)")
+    parser.add_argument("--rpc-url", help="Pakai node dev yang sudah berjalan alih-alih menjalankan anvil")
+    parser.add_argument("--private-key", default=ANVIL_PRIVATE_KEY, help="Kunci pengirim berdana di node dev")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON untuk dibandingkan antar run")
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus direktori kerja (log, STATE_DB)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[cyan]💾 Hasil disimpan di {args.json}[/cyan]")
+
+if __name__ == "__main__":
+    main()
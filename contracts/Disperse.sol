@@ -0,0 +1,23 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+interface IERC20 {
+    function transfer(address to, uint256 value) external returns (bool);
+    function transferFrom(address from, address to, uint256 value) external returns (bool);
+}
+
+// Kontrak disperse untuk mode batch: satu transaksi mengirim token ke banyak penerima.
+// Pengirim harus memberi allowance ke kontrak ini terlebih dahulu.
+contract Disperse {
+    function disperseToken(IERC20 token, address[] calldata recipients, uint256[] calldata values) external {
+        require(recipients.length == values.length, "length mismatch");
+        uint256 total = 0;
+        for (uint256 i = 0; i < recipients.length; i++) {
+            total += values[i];
+        }
+        require(token.transferFrom(msg.sender, address(this), total), "transferFrom failed");
+        for (uint256 i = 0; i < recipients.length; i++) {
+            require(token.transfer(recipients[i], values[i]), "transfer failed");
+        }
+    }
+}
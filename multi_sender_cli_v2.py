@@ -1,12 +1,23 @@
 import os
 import random
+import asyncio
 import time
+import itertools
+import json
 import logging
+import argparse
+import hashlib
+import bisect
+import sys
+from abc import ABC, abstractmethod
+from array import array
 from datetime import datetime, timedelta
 import pytz
 from dotenv import load_dotenv
 from web3 import Web3
+from web3.providers import JSONBaseProvider
 import csv
+import sqlite3
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, SpinnerColumn
@@ -14,332 +25,3179 @@ from rich.live import Live
 from rich.text import Text
 from rich.table import Table
 from rich import box
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Semaphore, Lock
-from web3.exceptions import Web3RPCError, TransactionNotFound
-
-# Setup logging
-logging.basicConfig(
-    filename="runtime_logs/runtime.log",
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="[%Y-%m-%d %H:%M:%S]"
-)
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from threading import Semaphore, Lock, Thread, Event, Condition
+from web3.exceptions import Web3RPCError, TransactionNotFound, TimeExhausted
+from hexbytes import HexBytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 logger = logging.getLogger("bot")
 console = Console()
 
-# Load config
-load_dotenv()
-PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-if PRIVATE_KEY.startswith("0x"):
-    PRIVATE_KEY = PRIVATE_KEY[2:]
-SENDER_ADDRESS = Web3.to_checksum_address(os.getenv("SENDER_ADDRESS"))
-RPC_URL = os.getenv("INFURA_URL")
-TOKEN_CONTRACT_ADDRESS = Web3.to_checksum_address(os.getenv("TOKEN_CONTRACT"))
-MAX_GAS_PRICE_GWEI = float(os.getenv("MAX_GAS_PRICE_GWEI", "3"))  # Default ke 3 Gwei untuk Sepolia
-MAX_TX_FEE_ETH = 0.001  # Batas biaya transaksi maksimum (dalam ETH/TEA)
+def configure_logging(path="runtime_logs/runtime.log"):
+    """Menyiapkan log file; folder log dibuat bila belum ada."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    logging.basicConfig(
+        filename=path,
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="[%Y-%m-%d %H:%M:%S]"
+    )
+
+# Load config. .env hanya dibaca bila dijalankan sebagai CLI; pemakai modul mengisi environment sendiri.
+# Kredensial, alamat, dan endpoint RPC dibaca oleh Sender.from_env(), bukan saat impor.
+if __name__ == "__main__":
+    load_dotenv()
+SHARD_MIN_NATIVE_ETH = float(os.getenv("SHARD_MIN_NATIVE_ETH", "0.01"))  # Top-up bila saldo native shard di bawah ini
+SHARD_TOPUP_NATIVE_ETH = float(os.getenv("SHARD_TOPUP_NATIVE_ETH", "0.05"))  # Target saldo native setelah top-up
+MAX_GAS_PRICE_GWEI = float(os.getenv("MAX_GAS_PRICE_GWEI", "3"))  # Default ke 3 Gwei untuk Sepolia
+MAX_TX_FEE_ETH = 0.001  # Batas biaya transaksi maksimum (dalam ETH/TEA)
+
+MIN_TOKEN_AMOUNT = 10.0
+MAX_TOKEN_AMOUNT = 50.0
+DAILY_WALLET_LIMIT = 200
+MAX_TOTAL_SEND = 1000  # Token
+AMOUNT_SCALE = 10**4  # Jumlah token per penerima dibulatkan 4 desimal
+CSV_FILE = "wallets.csv"
+RECIPIENT_SHUFFLE_CHUNK = int(os.getenv("RECIPIENT_SHUFFLE_CHUNK", "10000"))  # Ukuran blok acak saat streaming CSV
+# Rencana harian: urutan dan jumlah per penerima diturunkan dari PLAN_SEED + tanggal, disimpan per hari di PLAN_DIR
+PLAN_DIR = os.getenv("PLAN_DIR", "plans")
+PLAN_SEED = os.getenv("PLAN_SEED", "")
+SENT_FILE = "sent_wallets.txt"  # Format lama, hanya diimpor sekali ke STATE_DB
+STATE_DB = os.getenv("STATE_DB", "sent_state.db")
+
+# Mode pipeline: submitter menyiarkan transaksi beruntun, tracker terpisah menunggu receipt
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "0") == "1"
+INFLIGHT_WINDOW = int(os.getenv("INFLIGHT_WINDOW", "16"))  # Maksimum transaksi belum terkonfirmasi
+RECEIPT_POLL_INTERVAL = float(os.getenv("RECEIPT_POLL_INTERVAL", "2"))  # Detik antar putaran cek timeout transaksi
+RECEIPT_TIMEOUT = 120
+
+# Strategi fee: eip1559 (maxFeePerGas/maxPriorityFeePerGas) atau legacy (gasPrice)
+FEE_STRATEGY = os.getenv("FEE_STRATEGY", "eip1559")
+FEE_PRIORITY_PERCENTILE = float(os.getenv("FEE_PRIORITY_PERCENTILE", "50"))  # Persentil tip dari eth_feeHistory
+FEE_BASE_MULTIPLIER = float(os.getenv("FEE_BASE_MULTIPLIER", "2"))  # Ruang kenaikan base fee pada maxFeePerGas
+FEE_REPLACEMENT_BUMP = float(os.getenv("FEE_REPLACEMENT_BUMP", "1.125"))  # Kenaikan minimal untuk transaksi pengganti
+FEE_STUCK_TIMEOUT = float(os.getenv("FEE_STUCK_TIMEOUT", "30"))  # Detik sebelum transaksi macet diganti
+FEE_MAX_REPLACEMENTS = int(os.getenv("FEE_MAX_REPLACEMENTS", "3"))
+RUN_FEE_BUDGET_ETH = float(os.getenv("RUN_FEE_BUDGET_ETH", "0"))  # Anggaran biaya gas per run, 0 = tanpa batas
+
+# Pelacak konfirmasi berbasis blok
+CONFIRMATION_DEPTH = int(os.getenv("CONFIRMATION_DEPTH", "1"))  # Jumlah blok konfirmasi (1 = blok yang memuat transaksi)
+CONFIRM_HEAD_POLL_INTERVAL = float(os.getenv("CONFIRM_HEAD_POLL_INTERVAL", "1"))  # Detik antar polling eth_blockNumber
+CONFIRM_WS_URL = os.getenv("CONFIRM_WS_URL") or None  # Endpoint websocket untuk langganan newHeads (opsional)
+DROP_CONFIRM_HEADS = int(os.getenv("DROP_CONFIRM_HEADS", "3"))  # Kepala berturut-turut tanpa receipt sebelum transaksi dianggap dibuang
+DROP_CONFIRM_ENDPOINTS = int(os.getenv("DROP_CONFIRM_ENDPOINTS", "2"))  # Endpoint yang harus sepakat receipt-nya tidak ada
+
+# Backend eksekusi: "thread" (ThreadPoolExecutor, default) atau "async" (event loop asyncio)
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "thread").lower()
+ASYNC_CONCURRENCY = int(os.getenv("ASYNC_CONCURRENCY", "256"))  # Maksimum transfer in-flight di event loop
+
+# Mode batch: banyak penerima per transaksi melalui kontrak disperse (contracts/Disperse.sol)
+BATCH_MODE = os.getenv("BATCH_MODE", "0") == "1"
+BATCH_GAS_BUDGET = int(os.getenv("BATCH_GAS_BUDGET", "3000000"))  # Batas gas per transaksi batch
+BATCH_MAX_RECIPIENTS = int(os.getenv("BATCH_MAX_RECIPIENTS", "200"))
+DISPERSE_BASE_GAS = 60000  # Overhead transaksi + transferFrom ke kontrak
+DISPERSE_GAS_PER_RECIPIENT = 35000  # Perkiraan konservatif per transfer ke alamat baru
+
+# Mode pra-tanda tangan: transaksi dibangun lokal, ditandatangani paralel, lalu disiarkan dari antrean di STATE_DB
+PRESIGN_MODE = os.getenv("PRESIGN_MODE", "0") == "1"
+PRESIGN_WORKERS = int(os.getenv("PRESIGN_WORKERS", str(os.cpu_count() or 1)))
+PRESIGN_CHUNK = int(os.getenv("PRESIGN_CHUNK", "256"))  # Transaksi per tugas proses
+
+# Oracle gas: refresh sekali per blok baru atau setelah TTL (detik)
+GAS_ORACLE_TTL = float(os.getenv("GAS_ORACLE_TTL", "12"))
+GAS_ORACLE_POLL_INTERVAL = float(os.getenv("GAS_ORACLE_POLL_INTERVAL", "3"))
+
+# Ledger saldo lokal: rekonsiliasi ke chain setiap N konfirmasi
+LEDGER_RECONCILE_EVERY = int(os.getenv("LEDGER_RECONCILE_EVERY", "50"))
+
+# Batching JSON-RPC: panggilan baca bersamaan digabung dalam jendela ini (0 = nonaktif)
+RPC_BATCH_WINDOW_MS = float(os.getenv("RPC_BATCH_WINDOW_MS", "5"))
+RPC_MAX_BATCH_SIZE = int(os.getenv("RPC_MAX_BATCH_SIZE", "100"))
+
+# Kesehatan endpoint RPC
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "0"))  # Default request/detik per endpoint (0 = tanpa batas)
+RPC_BROADCAST_FANOUT = int(os.getenv("RPC_BROADCAST_FANOUT", "1"))  # Jumlah endpoint penerima raw transaction
+RPC_CIRCUIT_FAILURES = int(os.getenv("RPC_CIRCUIT_FAILURES", "3"))  # Gagal beruntun sebelum endpoint diistirahatkan
+RPC_CIRCUIT_COOLDOWN = float(os.getenv("RPC_CIRCUIT_COOLDOWN", "30"))  # Detik endpoint dikeluarkan dari rotasi
+
+# Konkurensi adaptif (AIMD, opsional): jendela naik saat RPC sehat, turun setengah saat overload.
+# Bila aktif, satu jendela bersama menggantikan MAX_THREADS, INFLIGHT_WINDOW, dan jendela per shard.
+ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "0") == "1"
+CONCURRENCY_INITIAL = int(os.getenv("CONCURRENCY_INITIAL", "2"))
+CONCURRENCY_FLOOR = int(os.getenv("CONCURRENCY_FLOOR", "1"))
+CONCURRENCY_CEILING = int(os.getenv("CONCURRENCY_CEILING", "32"))
+CONCURRENCY_LATENCY_TARGET = float(os.getenv("CONCURRENCY_LATENCY_TARGET", "1.0"))  # Detik, EWMA latensi RPC
+CONCURRENCY_DECREASE_COOLDOWN = float(os.getenv("CONCURRENCY_DECREASE_COOLDOWN", "2"))  # Maks. satu penurunan per periode
+
+# Observabilitas: endpoint /metrics (0 = nonaktif), ringkasan berkala di log, cetak per-transfer di konsol
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_BIND = os.getenv("METRICS_BIND", "127.0.0.1")
+METRICS_SUMMARY_INTERVAL = float(os.getenv("METRICS_SUMMARY_INTERVAL", "60"))  # Detik, 0 = nonaktif
+VERBOSE_TRANSFERS = os.getenv("VERBOSE_TRANSFERS", "1") == "1"
+
+# Tetapkan waktu log saat program mulai
+JAKARTA_TZ = pytz.timezone('Asia/Jakarta')
+START_TIME = datetime.now(JAKARTA_TZ).strftime('%Y%m%d_%H%M%S')
+TRANSACTION_LOG = f"runtime_logs/transactions_{START_TIME}.log"
+
+class BatchingHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider yang menggabungkan panggilan baca bersamaan menjadi satu payload batch JSON-RPC.
+
+    Thread pertama yang mengantre menjadi pemimpin: ia menunggu `batch_window` detik, lalu mengirim
+    seluruh antrean sekaligus. Nilai yang tidak berubah selama proses (chain id) di-memo.
+    """
+
+    BATCHABLE_METHODS = {
+        "eth_call", "eth_getBalance", "eth_getTransactionCount", "eth_feeHistory",
+        "eth_maxPriorityFeePerGas", "eth_gasPrice", "eth_blockNumber", "eth_getBlockByNumber",
+        "eth_getTransactionByHash", "eth_getTransactionReceipt",
+    }
+    MEMOIZED_METHODS = {"eth_chainId", "net_version"}
+
+    def __init__(self, endpoint_uri, batch_window=0.005, max_batch_size=100, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.batch_lock = Lock()
+        self.queue = []
+        self.memo = {}
+        self.batches_sent = 0
+        self.requests_batched = 0
+
+    def make_request(self, method, params):
+        if method in self.MEMOIZED_METHODS:
+            if method not in self.memo:
+                response = super().make_request(method, params)
+                if "error" in response:
+                    return response
+                self.memo[method] = response
+            return self.memo[method]
+        if self.batch_window <= 0 or method not in self.BATCHABLE_METHODS:
+            return super().make_request(method, params)
+
+        slot = {"request": (method, params), "done": Event(), "response": None, "error": None}
+        with self.batch_lock:
+            self.queue.append(slot)
+            leader = len(self.queue) == 1
+        if leader:
+            time.sleep(self.batch_window)
+            with self.batch_lock:
+                slots, self.queue = self.queue, []
+            for start in range(0, len(slots), self.max_batch_size):
+                self.dispatch(slots[start:start + self.max_batch_size])
+        slot["done"].wait()
+        if slot["error"] is not None:
+            raise slot["error"]
+        return slot["response"]
+
+    def dispatch(self, slots):
+        """Mengirim satu batch; bila node menolak batch, tiap permintaan dikirim satu per satu."""
+        try:
+            if len(slots) == 1:
+                responses = [super().make_request(*slots[0]["request"])]
+            else:
+                responses = self.make_batch_request([slot["request"] for slot in slots])
+                if not isinstance(responses, list) or len(responses) != len(slots):
+                    raise ValueError(f"Respons batch tidak valid: {responses}")
+            with self.batch_lock:
+                self.batches_sent += 1
+                self.requests_batched += len(slots)
+            for slot, response in zip(slots, responses):
+                slot["response"] = response
+        except Exception as e:
+            logger.warning(f"⚠️ Batch JSON-RPC ({len(slots)} permintaan) gagal: {e}. Mengirim satu per satu.")
+            for slot in slots:
+                try:
+                    slot["response"] = super().make_request(*slot["request"])
+                except Exception as single_error:
+                    slot["error"] = single_error
+        finally:
+            for slot in slots:
+                slot["done"].set()
+
+    def stats(self):
+        with self.batch_lock:
+            return {"batches": self.batches_sent, "requests": self.requests_batched}
+
+class Metrics:
+    """Counter, gauge, dan histogram sederhana (thread-safe) dengan format teks Prometheus.
+
+    Gauge berupa fungsi yang baru dievaluasi saat /metrics dibaca, sehingga tidak membebani jalur kirim.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, prefix="multisender"):
+        self.prefix = prefix
+        self.lock = Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def gauge(self, name, fn):
+        self.gauges[name] = fn
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = [f'{k}="{v}"' for k, v in tuple(labels) + tuple(extra)]
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self):
+        """Seluruh metrik dalam format eksposisi teks Prometheus."""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, dict(h, buckets=list(h["buckets"]))) for key, h in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {self.prefix}_{name} counter")
+                typed.add(name)
+            lines.append(f"{self.prefix}_{name}{self.format_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {self.prefix}_{name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                cumulative += count
+                lines.append(f"{self.prefix}_{name}_bucket{self.format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.prefix}_{name}_bucket{self.format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{self.prefix}_{name}_sum{self.format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{self.prefix}_{name}_count{self.format_labels(labels)} {histogram['count']}")
+        for name, fn in sorted(self.gauges.items()):
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f"# TYPE {self.prefix}_{name} gauge")
+            lines.append(f"{self.prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Ringkasan ringkas untuk log berkala: total counter dan rata-rata histogram per label."""
+        with self.lock:
+            counters = {f"{name}{self.format_labels(labels)}": value for (name, labels), value in sorted(self.counters.items())}
+            histograms = {
+                f"{name}{self.format_labels(labels)}": f"n={h['count']} avg={h['sum'] / h['count']:.3f}s"
+                for (name, labels), h in sorted(self.histograms.items()) if h["count"]
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def serve(self, port, bind="127.0.0.1"):
+        """Menjalankan endpoint HTTP /metrics di thread latar."""
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((bind, port), MetricsHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"📈 Endpoint metrik aktif di http://{bind}:{port}/metrics")
+        return server
+
+    def log_periodically(self, interval):
+        """Menulis ringkasan metrik ke log setiap `interval` detik."""
+        def run():
+            while True:
+                time.sleep(interval)
+                logger.info(f"📈 Ringkasan metrik: {self.summary()}")
+
+        Thread(target=run, daemon=True).start()
+
+METRICS = Metrics()
+
+def error_class(message):
+    """Mengelompokkan pesan error RPC menjadi label metrik yang stabil."""
+    message = str(message).lower()
+    for marker, label in (
+        ("capacity exceeded", "capacity"), ("rate limit", "capacity"), ("too many requests", "capacity"),
+        ("underpriced", "underpriced"), ("nonce too low", "nonce_too_low"), ("already known", "already_known"),
+        ("insufficient funds", "insufficient_funds"), ("timeout", "timeout"), ("belum terkonfirmasi", "timeout"),
+        ("not found", "not_found"), ("sudah dipakai", "nonce_consumed")
+    ):
+        if marker in message:
+            return label
+    return "other"
+
+def print_transfer(message):
+    """Cetak per-transfer ke konsol hanya bila VERBOSE_TRANSFERS aktif (log file tetap ditulis)."""
+    if VERBOSE_TRANSFERS:
+        console.print(message)
+
+class AimdController:
+    """Pengendali konkurensi AIMD yang sekaligus berfungsi sebagai semaphore dinamis.
+
+    Jendela naik secara aditif untuk setiap transfer sukses selama latensi RPC di bawah target
+    (slow start: +1 per sukses hingga penurunan pertama), dan turun setengah saat node overload
+    ("capacity exceeded", "underpriced", atau latensi melonjak).
+    """
+
+    def __init__(self, initial, floor, ceiling, latency_target, decrease_cooldown):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.window = float(min(max(initial, self.floor), self.ceiling))
+        self.latency_target = latency_target
+        self.decrease_cooldown = decrease_cooldown
+        self.cond = Condition()
+        self.inflight = 0
+        self.slow_start = True
+        self.latency_ewma = None
+        self.last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    def acquire(self):
+        with self.cond:
+            while self.inflight >= int(self.window):
+                self.cond.wait()
+            self.inflight += 1
+
+    def release(self):
+        with self.cond:
+            self.inflight -= 1
+            self.cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def observe_latency(self, latency):
+        with self.cond:
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            overloaded = self.latency_ewma > 2 * self.latency_target
+        if overloaded:
+            self.on_overload(f"latensi RPC {self.latency_ewma:.2f} detik")
+
+    def on_success(self):
+        with self.cond:
+            if self.latency_ewma is not None and self.latency_ewma > self.latency_target:
+                return
+            old = int(self.window)
+            self.window = min(self.ceiling, self.window + (1 if self.slow_start else 1 / self.window))
+            changed = int(self.window) != old
+            if changed:
+                self.increases += 1
+                self.cond.notify_all()
+        if changed:
+            logger.info(f"📈 Jendela konkurensi naik ke {int(self.window)}")
+
+    def on_overload(self, reason):
+        with self.cond:
+            now = time.monotonic()
+            if now - self.last_decrease < self.decrease_cooldown:
+                return
+            self.last_decrease = now
+            self.slow_start = False
+            old = self.window
+            self.window = max(self.floor, self.window / 2)
+            self.decreases += 1
+        logger.warning(f"📉 Jendela konkurensi turun {old:.1f} → {self.window:.1f} ({reason})")
+
+    def retry_delay(self, attempt):
+        """Jeda sebelum mencoba ulang, mengikuti latensi RPC yang teramati."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.5
+        return min(attempt * max(2 * latency, 0.25), 10)
+
+    def stats(self):
+        with self.cond:
+            return {
+                "window": round(self.window, 2), "inflight": self.inflight, "increases": self.increases,
+                "decreases": self.decreases, "latency_ewma": round(self.latency_ewma or 0, 4)
+            }
+
+CONCURRENCY = AimdController(CONCURRENCY_INITIAL, CONCURRENCY_FLOOR, CONCURRENCY_CEILING, CONCURRENCY_LATENCY_TARGET, CONCURRENCY_DECREASE_COOLDOWN)
+METRICS.gauge("concurrency_window", lambda: int(CONCURRENCY.window))
+METRICS.gauge("concurrency_inflight", lambda: CONCURRENCY.inflight)
+METRICS.gauge("inflight_transactions", lambda: len(SENDER.confirmations.pending) if SENDER is not None and SENDER.confirmations else 0)
+
+def backoff(reason, attempt):
+    """Memberi sinyal overload ke pengendali konkurensi lalu menunggu sebelum mencoba lagi."""
+    METRICS.inc("retries_total", reason=error_class(reason))
+    if ADAPTIVE_CONCURRENCY:
+        CONCURRENCY.on_overload(reason)
+        time.sleep(CONCURRENCY.retry_delay(attempt))
+    else:
+        time.sleep(2 * attempt)
+
+def signal_underpriced():
+    if ADAPTIVE_CONCURRENCY:
+        CONCURRENCY.on_overload("transaction underpriced")
+
+class RpcEndpoint:
+    """Satu endpoint RPC dengan rate limit (token bucket), EWMA latensi, skor error, dan circuit breaker."""
+
+    def __init__(self, url, rate_limit=0):
+        self.url = url
+        self.provider = BatchingHTTPProvider(url, batch_window=RPC_BATCH_WINDOW_MS / 1000, max_batch_size=RPC_MAX_BATCH_SIZE)
+        self.rate_limit = rate_limit
+        self.tokens = float(rate_limit)
+        self.last_refill = time.monotonic()
+        self.latency_ewma = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.lock = Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate_limit, self.tokens + (now - self.last_refill) * self.rate_limit)
+        self.last_refill = now
+
+    def wait_time(self):
+        """Detik hingga endpoint boleh menerima request berikutnya."""
+        if self.rate_limit <= 0:
+            return 0
+        with self.lock:
+            self.refill()
+            return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate_limit
+
+    def acquire(self):
+        if self.rate_limit <= 0:
+            return
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate_limit
+            time.sleep(wait)
+
+    def available(self):
+        return time.monotonic() >= self.open_until
+
+    def score(self):
+        """Semakin kecil semakin sehat."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.1
+        return latency * (1 + 10 * self.error_rate)
+
+    def record(self, latency, ok):
+        with self.lock:
+            self.calls += 1
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self.error_rate = 0.8 * self.error_rate + (0 if ok else 0.2)
+            if ok:
+                self.consecutive_failures = 0
+                return
+            self.failures += 1
+            self.consecutive_failures += 1
+            tripped = self.consecutive_failures >= RPC_CIRCUIT_FAILURES
+            if tripped:
+                self.open_until = time.monotonic() + RPC_CIRCUIT_COOLDOWN
+        if tripped:
+            logger.warning(f"⚠️ Endpoint RPC {self.url} dikeluarkan dari rotasi selama {RPC_CIRCUIT_COOLDOWN} detik ({self.consecutive_failures} gagal beruntun)")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "url": self.url, "calls": self.calls, "failures": self.failures,
+                "latency_ewma": round(self.latency_ewma or 0, 4), "error_rate": round(self.error_rate, 3),
+                "open": not self.available(), **self.provider.stats()
+            }
+
+class RpcPool(JSONBaseProvider):
+    """Provider yang merutekan request ke endpoint RPC paling sehat dan melakukan failover.
+
+    Raw transaction dapat disiarkan ke beberapa endpoint sekaligus (`broadcast_fanout`).
+    `is_connected()` bawaan JSONBaseProvider mengirim `web3_clientVersion` lewat `make_request`,
+    sehingga pool dianggap terhubung bila salah satu endpoint menjawab.
+    """
+
+    ENDPOINT_FAILURE_MARKERS = ("capacity exceeded", "rate limit", "too many requests", "request count exceeded")
+
+    def __init__(self, endpoints, broadcast_fanout=1):
+        super().__init__()
+        self.endpoints = endpoints
+        self.broadcast_fanout = max(1, min(broadcast_fanout, len(endpoints)))
+        self.broadcast_executor = ThreadPoolExecutor(max_workers=len(endpoints)) if self.broadcast_fanout > 1 else None
+
+    def ranked(self):
+        """Endpoint aktif diurutkan: yang tidak tertahan rate limit dulu, lalu skor kesehatan."""
+        candidates = [e for e in self.endpoints if e.available()]
+        if not candidates:
+            candidates = sorted(self.endpoints, key=lambda e: e.open_until)
+        return sorted(candidates, key=lambda e: (e.wait_time() > 0, e.score()))
+
+    def is_endpoint_failure(self, response):
+        error = response.get("error") if isinstance(response, dict) else None
+        if not error:
+            return False
+        message = str(error.get("message", error) if isinstance(error, dict) else error).lower()
+        return any(marker in message for marker in self.ENDPOINT_FAILURE_MARKERS)
+
+    def call(self, endpoint, method, params):
+        endpoint.acquire()
+        start = time.monotonic()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception as e:
+            endpoint.record(time.monotonic() - start, False)
+            METRICS.inc("rpc_requests_total", method=method, outcome="error")
+            return None, e
+        latency = time.monotonic() - start
+        healthy = not self.is_endpoint_failure(response)
+        endpoint.record(latency, healthy)
+        METRICS.observe("rpc_request_seconds", latency, method=method)
+        METRICS.inc("rpc_requests_total", method=method, outcome="ok" if healthy else "overloaded")
+        if ADAPTIVE_CONCURRENCY:
+            CONCURRENCY.observe_latency(latency)
+            if not healthy:
+                CONCURRENCY.on_overload(f"kapasitas {endpoint.url} penuh")
+        return response, None
+
+    def make_request(self, method, params):
+        if method == "eth_sendRawTransaction" and self.broadcast_fanout > 1:
+            return self.broadcast(method, params)
+        last_response, last_error = None, None
+        for endpoint in self.ranked():
+            response, error = self.call(endpoint, method, params)
+            if error is None and not self.is_endpoint_failure(response):
+                return response
+            last_response, last_error = response, error
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    def broadcast(self, method, params):
+        """Menyiarkan raw transaction ke beberapa endpoint; respons sukses pertama yang dipakai."""
+        futures = [self.broadcast_executor.submit(self.call, endpoint, method, params) for endpoint in self.ranked()[:self.broadcast_fanout]]
+        first_response, last_error = None, None
+        for future in as_completed(futures):
+            response, error = future.result()
+            if error is not None:
+                last_error = error
+                continue
+            if "error" not in response:
+                return response
+            first_response = first_response or response
+        if first_response is not None:
+            return first_response
+        raise last_error
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+def parse_rpc_endpoints(spec):
+    """Mengurai RPC_URLS ("url|rps,url|rps") menjadi daftar RpcEndpoint."""
+    endpoints = []
+    for entry in spec.split(","):
+        url, _, rate_limit = entry.strip().partition("|")
+        if url:
+            endpoints.append(RpcEndpoint(url.strip(), float(rate_limit) if rate_limit else RPC_RATE_LIMIT))
+    return endpoints
+
+# Token contract
+TOKEN_ABI = [
+    {
+        "name": "transfer",
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [
+            {"name": "_to", "type": "address"},
+            {"name": "_value", "type": "uint256"}
+        ],
+        "outputs": [{"name": "", "type": "bool"}]
+    },
+    {
+        "name": "decimals",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [],
+        "outputs": [{"name": "", "type": "uint8"}]
+    },
+    {
+        "name": "balanceOf",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "outputs": [{"name": "balance", "type": "uint256"}]
+    },
+    {
+        "name": "approve",
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [
+            {"name": "_spender", "type": "address"},
+            {"name": "_value", "type": "uint256"}
+        ],
+        "outputs": [{"name": "", "type": "bool"}]
+    },
+    {
+        "name": "allowance",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [
+            {"name": "_owner", "type": "address"},
+            {"name": "_spender", "type": "address"}
+        ],
+        "outputs": [{"name": "", "type": "uint256"}]
+    }
+]
+DISPERSE_ABI = [
+    {
+        "name": "disperseToken",
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [
+            {"name": "token", "type": "address"},
+            {"name": "recipients", "type": "address[]"},
+            {"name": "values", "type": "uint256[]"}
+        ],
+        "outputs": []
+    }
+]
+
+MAX_THREADS = 2
+RPC_SEMAPHORE = CONCURRENCY if ADAPTIVE_CONCURRENCY else Semaphore(MAX_THREADS)
+file_lock = Lock()
+
+class GasOracle:
+    """Oracle harga gas bersama untuk seluruh proses.
+
+    Base fee dan priority fee di-refresh sekali per blok baru (atau setelah TTL) oleh thread latar,
+    sehingga worker cukup membaca snapshot cache tanpa RPC tambahan.
+    """
+
+    def __init__(self, web3, ttl=12.0, poll_interval=3.0):
+        self.w3 = web3
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.lock = Lock()
+        self.snapshot_data = None
+        self.last_block = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.stop_event = Event()
+        self.thread = None
+
+    def refresh(self):
+        """Mengambil fee history dan priority fee terbaru dari node."""
+        try:
+            fee_history = self.w3.eth.fee_history(10, "latest", reward_percentiles=[FEE_PRIORITY_PERCENTILE])
+            priority_fee = max(self.w3.eth.max_priority_fee / 10**9, 0.1)  # Minimum 0.1 Gwei
+            base_fee = fee_history["baseFeePerGas"][-1] / 10**9
+            rewards = sorted(block_rewards[0] for block_rewards in fee_history.get("reward") or [] if block_rewards)
+            reward = rewards[len(rewards) // 2] / 10**9 if rewards else None
+            # Margin 1.1x untuk Sepolia, batasi maksimum pada 5 Gwei untuk testnet
+            dynamic_max = min((max(fee_history["baseFeePerGas"]) / 10**9 + priority_fee) * 1.1, 5)
+            snapshot = {"base_fee": base_fee, "priority_fee": priority_fee, "reward": reward, "dynamic_max": dynamic_max, "legacy": False}
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal memperbarui oracle gas: {e}. Menggunakan default.")
+            gas_price = self.w3.eth.gas_price / 10**9
+            snapshot = {"base_fee": gas_price, "priority_fee": 0, "dynamic_max": min(gas_price * 1.1, 5), "legacy": True}
+        snapshot["fetched_at"] = time.time()
+        with self.lock:
+            self.snapshot_data = snapshot
+            self.refreshes += 1
+        return snapshot
+
+    def snapshot(self):
+        """Mengembalikan snapshot cache; refresh sinkron hanya bila belum ada atau sudah kedaluwarsa."""
+        with self.lock:
+            snapshot = self.snapshot_data
+            if snapshot is not None and time.time() - snapshot["fetched_at"] <= self.ttl:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+        return self.refresh()
+
+    def gas_price(self, attempt=1, max_gas_price_gwei=0):
+        """Harga gas (Gwei) dengan multiplier percobaan dan batas MAX_TX_FEE_ETH, dihitung lokal."""
+        snapshot = self.snapshot()
+        max_gas_price_from_fee = (MAX_TX_FEE_ETH * 10**18) / 65000 / 10**9  # Gas limit 65,000
+        effective_max = max_gas_price_gwei if max_gas_price_gwei > 0 else snapshot["dynamic_max"]
+        if snapshot["legacy"]:
+            return min(snapshot["base_fee"] * 1.1, effective_max, 5)
+        multiplier = 1.1 + (attempt - 1) * 0.1  # Multiplier rendah untuk Sepolia
+        gas_price = (snapshot["base_fee"] + snapshot["priority_fee"]) * multiplier
+        return min(gas_price, effective_max, max_gas_price_from_fee)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes}
+
+    def run(self):
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                block_number = self.w3.eth.block_number
+                with self.lock:
+                    stale = self.snapshot_data is None or time.time() - self.snapshot_data["fetched_at"] > self.ttl
+                if block_number != self.last_block or stale:
+                    self.last_block = block_number
+                    self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Oracle gas gagal membaca blok terbaru: {e}")
+
+    def start(self):
+        """Menjalankan thread refresh latar (idempoten)."""
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+class PendingTx:
+    """Transaksi yang sedang ditunggu konfirmasinya oleh ConfirmationTracker.
+
+    `first_block` adalah kepala chain saat transaksi pertama kali diperiksa; None berarti belum pernah.
+    `missing_heads` menghitung kepala berturut-turut di mana nonce-nya sudah terpakai tanpa receipt.
+    """
+
+    def __init__(self, tx_hash, sender, nonce, callback, first_block=None):
+        self.tx_hash = HexBytes(tx_hash)
+        self.sender = sender
+        self.nonce = nonce
+        self.first_block = first_block
+        self.callback = callback
+        self.receipt = None
+        self.dropped = False
+        self.missing_heads = 0
+        self.missing_head = None
+        self.event = Event()
+
+class ConfirmationTracker:
+    """Pelacak konfirmasi bersama yang mengikuti blok baru satu kali untuk semua transaksi tertunda.
+
+    Kepala chain diikuti lewat langganan websocket `newHeads` (CONFIRM_WS_URL) atau polling
+    `eth_blockNumber`. Setiap blok baru dicocokkan dengan hash yang ditunggu; transaksi yang nonce-nya
+    sudah terpakai tetapi tidak terlihat di blok yang dipindai dicek lewat receipt. Semua lookup receipt
+    dijalankan bersamaan agar digabung menjadi satu batch JSON-RPC. Receipt diserahkan setelah
+    `depth` konfirmasi. Hash yang baru didaftarkan diperiksa pada putaran berikutnya walaupun kepala
+    chain belum maju, karena transaksinya bisa saja sudah masuk blok yang telah diproses.
+
+    Transaksi baru dianggap dibuang (`dropped`) bila nonce-nya terpakai tetapi receipt-nya dan semua
+    hash lain untuk nonce itu (`sibling_hashes(sender, nonce)`, mis. dari journal) tidak ditemukan
+    selama `drop_heads` kepala berturut-turut dan di `drop_endpoints` endpoint. Sebelum itu transaksi
+    tetap tertunda, karena satu endpoint yang tertinggal bisa melaporkan receipt kosong.
+    """
+
+    MAX_SCAN_BLOCKS = 8  # Lebih dari ini, pencocokan blok dilewati dan hanya cek nonce yang dipakai
+
+    def __init__(self, web3, depth=1, poll_interval=1.0, ws_url=None, sibling_hashes=None,
+                 drop_heads=DROP_CONFIRM_HEADS, drop_endpoints=DROP_CONFIRM_ENDPOINTS):
+        self.w3 = web3
+        self.depth = max(1, depth)
+        self.poll_interval = poll_interval
+        self.ws_url = ws_url
+        self.sibling_hashes = sibling_hashes
+        self.drop_heads = max(1, drop_heads)
+        self.drop_endpoints = max(1, drop_endpoints)
+        self.lock = Lock()
+        self.pending = {}
+        self.last_block = None
+        self.heads = 0
+        self.blocks_scanned = 0
+        self.receipt_lookups = 0
+        self.confirmed = 0
+        self.dropped = 0
+        self.reorgs = 0
+        self.executor = ThreadPoolExecutor(max_workers=16)
+        self.stop_event = Event()
+        self.thread = None
+
+    def watch(self, tx_hash, sender=None, nonce=None, callback=None):
+        """Mendaftarkan hash untuk dilacak. `callback(pending_tx)` dipanggil saat selesai."""
+        with self.lock:
+            pending_tx = PendingTx(tx_hash, sender, nonce, callback)
+            self.pending[pending_tx.tx_hash] = pending_tx
+        self.start()
+        return pending_tx
+
+    def forget(self, tx_hash):
+        with self.lock:
+            self.pending.pop(HexBytes(tx_hash), None)
+
+    def wait(self, tx_hashes, timeout=RECEIPT_TIMEOUT, sender=None, nonce=None):
+        """Pengganti wait_for_transaction_receipt yang memakai pelacak blok bersama.
+
+        `tx_hashes` boleh satu hash atau daftar versi transaksi (pengganti) untuk nonce yang sama;
+        receipt versi yang ditambang dikembalikan.
+        """
+        if isinstance(tx_hashes, (bytes, str)):
+            tx_hashes = [tx_hashes]
+        changed = Event()
+        watched = [self.watch(tx_hash, sender, nonce, callback=lambda _: changed.set()) for tx_hash in tx_hashes]
+        deadline = time.monotonic() + timeout
+        while True:
+            mined = next((tx for tx in watched if tx.event.is_set() and not tx.dropped), None)
+            if mined is not None:
+                for tx in watched:
+                    self.forget(tx.tx_hash)
+                return mined.receipt
+            if all(tx.event.is_set() for tx in watched):
+                raise TransactionNotFound(f"Nonce {nonce} sudah dipakai transaksi lain, {watched[-1].tx_hash.hex()} tidak ditambang")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for tx in watched:
+                    self.forget(tx.tx_hash)
+                raise TimeExhausted(f"Transaksi {watched[-1].tx_hash.hex()} belum terkonfirmasi setelah {timeout} detik")
+            changed.wait(remaining)
+            changed.clear()
+
+    def fetch_receipt(self, tx_hash):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    def resolve(self, pending_tx, receipt, dropped=False):
+        with self.lock:
+            if self.pending.pop(pending_tx.tx_hash, None) is None:
+                return
+            if dropped:
+                self.dropped += 1
+            else:
+                self.confirmed += 1
+        pending_tx.receipt = receipt
+        pending_tx.dropped = dropped
+        pending_tx.event.set()
+        if pending_tx.callback is not None:
+            pending_tx.callback(pending_tx)
+
+    def has_unchecked(self):
+        with self.lock:
+            return any(tx.first_block is None for tx in self.pending.values())
+
+    def on_head(self, head):
+        """Memproses kepala chain: cocokkan blok baru, cek nonce, ambil receipt, serahkan yang cukup dalam.
+
+        Bila kepala belum maju, hanya transaksi yang belum pernah diperiksa yang dicek (lewat nonce).
+        """
+        with self.lock:
+            advanced = self.last_block is None or head > self.last_block
+            if advanced:
+                start = head if self.last_block is None else self.last_block + 1
+                self.last_block = head
+                self.heads += 1
+                pending = list(self.pending.values())
+            else:
+                start = head + 1  # Tidak ada blok baru untuk dipindai
+                pending = [tx for tx in self.pending.values() if tx.first_block is None]
+        if not pending:
+            return
+
+        waiting = {tx.tx_hash: tx for tx in pending if tx.receipt is None}
+        lookups = set()
+        scanned = advanced and head - start < self.MAX_SCAN_BLOCKS
+        if waiting and scanned:
+            for number in range(start, head + 1):
+                for tx_hash in self.w3.eth.get_block(number)["transactions"]:
+                    if HexBytes(tx_hash) in waiting:
+                        lookups.add(HexBytes(tx_hash))
+            with self.lock:
+                self.blocks_scanned += head - start + 1
+
+        # Transaksi yang mungkin ditambang sebelum mulai dilacak atau diganti: cek lewat nonce pengirim
+        unmatched = [tx for tx in waiting.values() if tx.tx_hash not in lookups]
+        nonce_checked = set()
+        for sender in {tx.sender for tx in unmatched if tx.sender is not None}:
+            candidates = [tx for tx in unmatched if tx.sender == sender and tx.nonce is not None
+                          and (not scanned or tx.first_block is None or head - tx.first_block >= 2)]
+            if not candidates:
+                continue
+            latest_nonce = self.w3.eth.get_transaction_count(sender, "latest")
+            for tx in candidates:
+                if tx.nonce < latest_nonce:
+                    lookups.add(tx.tx_hash)
+                    nonce_checked.add(tx.tx_hash)
+                else:
+                    tx.missing_heads = 0
+        lookups.update(tx.tx_hash for tx in unmatched if tx.sender is None or tx.nonce is None)
+
+        if lookups:
+            hashes = list(lookups)
+            with self.lock:
+                self.receipt_lookups += len(hashes)
+            for tx_hash, receipt in zip(hashes, self.executor.map(self.fetch_receipt, hashes)):
+                if receipt is not None:
+                    waiting[tx_hash].receipt = receipt
+                elif tx_hash in nonce_checked:
+                    self.check_missing(waiting[tx_hash], head)
+
+        for tx in pending:
+            receipt = tx.receipt
+            if receipt is None or head - receipt.blockNumber + 1 < self.depth:
+                continue
+            if self.depth > 1 and self.w3.eth.get_block(receipt.blockNumber)["hash"] != receipt.blockHash:
+                logger.warning(f"⚠️ Reorg terdeteksi untuk {tx.tx_hash.hex()} di blok {receipt.blockNumber}. Melacak ulang.")
+                with self.lock:
+                    self.reorgs += 1
+                tx.receipt = None
+                continue
+            self.resolve(tx, receipt)
+        for tx in pending:
+            if tx.first_block is None:
+                tx.first_block = head
+
+    def check_missing(self, pending_tx, head):
+        """Nonce sudah terpakai tetapi receipt hash ini kosong: cari versi lain nonce itu, lalu pastikan hilang."""
+        siblings = [HexBytes(tx_hash) for tx_hash in (self.sibling_hashes(pending_tx.sender, pending_tx.nonce) if self.sibling_hashes else [])]
+        siblings = [tx_hash for tx_hash in dict.fromkeys(siblings) if tx_hash != pending_tx.tx_hash]
+        with self.lock:
+            self.receipt_lookups += len(siblings)
+        for receipt in self.executor.map(self.fetch_receipt, siblings):
+            if receipt is not None:
+                pending_tx.receipt = receipt  # Versi lain (pengganti) untuk nonce ini yang ditambang
+                pending_tx.missing_heads = 0
+                return
+        if pending_tx.missing_head != head:
+            pending_tx.missing_head = head
+            pending_tx.missing_heads += 1
+        if pending_tx.missing_heads < self.drop_heads:
+            return
+        if self.absent_on_endpoints(pending_tx.sender, pending_tx.nonce, [pending_tx.tx_hash] + siblings):
+            logger.warning(
+                "⚠️ Nonce %s milik %s terpakai tanpa receipt untuk %s hash selama %s blok di %s endpoint. Transaksi dianggap dibuang.",
+                pending_tx.nonce, pending_tx.sender, 1 + len(siblings), pending_tx.missing_heads, self.drop_endpoints
+            )
+            self.resolve(pending_tx, None, dropped=True)
+
+    def absent_on_endpoints(self, sender, nonce, tx_hashes):
+        """True bila `drop_endpoints` endpoint (atau semua, bila lebih sedikit) sepakat nonce terpakai tanpa receipt.
+
+        Setiap endpoint pool ditanya langsung, bukan lewat failover, agar jawaban endpoint yang tertinggal
+        tidak bisa mewakili yang lain. Endpoint yang error tidak dihitung.
+        """
+        provider = self.w3.provider
+        if isinstance(provider, RpcPool):
+            sources, total = [endpoint.provider for endpoint in provider.ranked()], len(provider.endpoints)
+        else:
+            sources, total = [provider], 1
+        needed = min(self.drop_endpoints, total)
+        agreeing = 0
+        for source in sources:
+            try:
+                count = source.make_request("eth_getTransactionCount", [sender, "latest"])
+                receipts = [source.make_request("eth_getTransactionReceipt", ["0x" + bytes(tx_hash).hex()]) for tx_hash in tx_hashes]
+            except Exception:
+                continue
+            if "error" in count or any("error" in response for response in receipts):
+                continue
+            if int(count["result"], 16) <= nonce or any(response.get("result") is not None for response in receipts):
+                return False
+            agreeing += 1
+            if agreeing >= needed:
+                return True
+        return False
+
+    def follow_websocket(self):
+        from websockets.sync.client import connect
+        with connect(self.ws_url) as ws:
+            ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+            ws.recv(timeout=10)
+            logger.info(f"🔔 Berlangganan newHeads di {self.ws_url}")
+            idle = 0
+            while not self.stop_event.is_set():
+                try:
+                    message = json.loads(ws.recv(timeout=max(self.poll_interval, 1)))
+                except TimeoutError:
+                    idle += 1
+                    if idle >= 15 or self.last_block is None:
+                        idle = 0
+                        self.advance(lambda: self.w3.eth.block_number)
+                    elif self.has_unchecked():
+                        self.advance(lambda: self.last_block)
+                    continue
+                idle = 0
+                head = message.get("params", {}).get("result", {}).get("number")
+                if head is not None:
+                    self.advance(lambda: int(head, 16))
+
+    def run(self):
+        if self.ws_url:
+            try:
+                self.follow_websocket()
+            except Exception as e:
+                logger.warning(f"⚠️ Langganan newHeads gagal: {e}. Beralih ke polling eth_blockNumber.")
+        while not self.stop_event.wait(self.poll_interval):
+            with self.lock:
+                idle = not self.pending
+            if not idle:
+                self.advance(lambda: self.w3.eth.block_number)
+
+    def advance(self, read_head):
+        try:
+            self.on_head(read_head())
+        except Exception as e:
+            logger.warning(f"⚠️ Pelacak konfirmasi gagal memproses blok terbaru: {e}")
+
+    def start(self):
+        """Menjalankan thread pelacak (idempoten)."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stop_event.clear()
+                self.thread = Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "pending": len(self.pending), "heads": self.heads, "blocks_scanned": self.blocks_scanned,
+                "receipt_lookups": self.receipt_lookups, "confirmed": self.confirmed,
+                "dropped": self.dropped, "reorgs": self.reorgs
+            }
+
+def get_dynamic_max_gas_price():
+    """Menghitung batas harga gas maksimum secara dinamis dengan batas realistis."""
+    return SENDER.gas_oracle.snapshot()["dynamic_max"]
+
+def get_gas_price(attempt=1, max_gas_price_gwei=None):
+    """Menghitung harga gas dengan batas biaya transaksi."""
+    if max_gas_price_gwei is None:
+        max_gas_price_gwei = MAX_GAS_PRICE_GWEI
+    return SENDER.gas_oracle.gas_price(attempt=attempt, max_gas_price_gwei=max_gas_price_gwei)
+
+class FeeBudgetExhausted(Exception):
+    """Anggaran biaya gas per run (RUN_FEE_BUDGET_ETH) sudah habis."""
+
+class FeeCapReached(Exception):
+    """Fee pengganti akan melewati batas MAX_GAS_PRICE_GWEI / MAX_TX_FEE_ETH."""
+
+class FeeStrategy(ABC):
+    """Dasar strategi fee: anggaran biaya per run dan aturan fee untuk transaksi pengganti.
+
+    Subkelas cukup mengimplementasikan `current_fields()` (field fee untuk transaksi baru, dalam wei).
+    """
+
+    PRICE_FIELDS = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas", "type")
+
+    def __init__(self, oracle, budget_eth=0, replacement_bump=1.125):
+        self.oracle = oracle
+        self.budget_wei = int(budget_eth * 10**18)
+        self.replacement_bump = replacement_bump
+        self.lock = Lock()
+        self.spent_wei = 0
+        self.reserved_wei = 0
+        self.replacements = 0
+
+    def cap_wei(self, gas_limit=65000):
+        """Harga gas maksimum per unit (wei) dari MAX_GAS_PRICE_GWEI dan MAX_TX_FEE_ETH untuk `gas_limit`."""
+        snapshot = self.oracle.snapshot()
+        max_gas_price_from_fee = MAX_TX_FEE_ETH * 10**18 // gas_limit
+        effective_max = MAX_GAS_PRICE_GWEI if MAX_GAS_PRICE_GWEI > 0 else snapshot["dynamic_max"]
+        return int(min(effective_max * 10**9, max_gas_price_from_fee))
+
+    def worst_case_wei(self, gas_limit=65000):
+        """Biaya terburuk (wei) satu nonce, termasuk semua versi pengganti dan pembatalannya.
+
+        Setiap versi dibatasi cap_wei() sehingga tidak pernah melewati MAX_TX_FEE_ETH. Dengan batas harga
+        tetap (MAX_GAS_PRICE_GWEI > 0) batas itu konstan; dengan batas dinamis batas itu bisa naik selama
+        transaksi menunggu, jadi MAX_TX_FEE_ETH sendiri yang dipakai.
+        """
+        if MAX_GAS_PRICE_GWEI > 0:
+            return gas_limit * self.cap_wei(gas_limit)
+        return int(MAX_TX_FEE_ETH * 10**18)
+
+    def legacy_fields(self):
+        return {"gasPrice": int(self.oracle.gas_price(max_gas_price_gwei=MAX_GAS_PRICE_GWEI) * 10**9)}
+
+    @abstractmethod
+    def current_fields(self):
+        """Field fee transaksi baru pada kondisi jaringan saat ini."""
+
+    def fee_fields(self, gas_limit=65000):
+        """Field fee untuk transaksi baru beserta biaya terburuknya (wei) yang dipesan dari anggaran run.
+
+        Yang dipesan adalah worst_case_wei(), bukan fee awal, karena transaksi bisa diganti dengan fee lebih
+        tinggi (broadcast_bumped, send_with_replacement, replace_stuck) tanpa memesan ulang. Mengembalikan
+        (fields, reserved_wei); pemanggil wajib memanggil `release(reserved_wei)` setelah transaksinya
+        selesai atau gagal. Gagal dengan FeeBudgetExhausted bila anggaran run tidak cukup.
+        """
+        fields = self.current_fields()
+        if not self.budget_wei:
+            return fields, 0
+        worst_case = max(self.worst_case_wei(gas_limit), gas_limit * max_fee_per_gas(fields))
+        with self.lock:
+            if self.spent_wei + self.reserved_wei + worst_case > self.budget_wei:
+                raise FeeBudgetExhausted(
+                    f"Anggaran fee run habis: terpakai {self.spent_wei / 10**18:.6f} dan dipesan {self.reserved_wei / 10**18:.6f} "
+                    f"dari {self.budget_wei / 10**18:.6f} ETH"
+                )
+            self.reserved_wei += worst_case
+        return fields, worst_case
+
+    def release(self, reserved_wei):
+        """Melepas pesanan anggaran dari fee_fields(); biaya aktual dicatat terpisah oleh `charge()`."""
+        if reserved_wei:
+            with self.lock:
+                self.reserved_wei -= reserved_wei
+
+    def replacement_fields(self, previous, gas_limit=65000):
+        """Field fee pengganti untuk nonce yang sama: minimal `replacement_bump` kali fee lama dan tidak
+        lebih rendah dari fee jaringan saat ini. Gagal dengan FeeCapReached bila melewati batas fee
+        untuk `gas_limit`.
+        """
+        old_max = previous.get("maxFeePerGas", previous.get("gasPrice", 0))
+        old_tip = previous.get("maxPriorityFeePerGas", previous.get("gasPrice", 0))
+        fields = self.current_fields()
+        bumped_max = -(-old_max * int(self.replacement_bump * 1000) // 1000)
+        bumped_tip = -(-old_tip * int(self.replacement_bump * 1000) // 1000)
+        if "gasPrice" in fields:
+            fields["gasPrice"] = max(fields["gasPrice"], bumped_max)
+        else:
+            fields["maxPriorityFeePerGas"] = max(fields["maxPriorityFeePerGas"], bumped_tip)
+            fields["maxFeePerGas"] = max(fields["maxFeePerGas"], bumped_max, fields["maxPriorityFeePerGas"])
+        cap = self.cap_wei(gas_limit)
+        if max_fee_per_gas(fields) > cap:
+            raise FeeCapReached(f"Fee pengganti {max_fee_per_gas(fields) / 10**9:.2f} Gwei melewati batas {cap / 10**9:.2f} Gwei")
+        with self.lock:
+            self.replacements += 1
+        return fields
+
+    def charge(self, receipt):
+        """Mencatat biaya gas aktual ke anggaran run."""
+        with self.lock:
+            self.spent_wei += receipt["gasUsed"] * receipt.get("effectiveGasPrice", 0)
+
+    def start_run(self):
+        with self.lock:
+            self.spent_wei = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "strategy": type(self).__name__, "spent_eth": self.spent_wei / 10**18,
+                "reserved_eth": self.reserved_wei / 10**18, "budget_eth": self.budget_wei / 10**18,
+                "replacements": self.replacements
+            }
+
+class LegacyFeeStrategy(FeeStrategy):
+    """Transaksi legacy (`gasPrice`) dari oracle gas."""
+
+    def current_fields(self):
+        return self.legacy_fields()
+
+class Eip1559FeeStrategy(FeeStrategy):
+    """Transaksi tipe 2: tip dari persentil fee history, maxFeePerGas = base fee x multiplier + tip."""
+
+    def __init__(self, oracle, base_fee_multiplier=2.0, **kwargs):
+        super().__init__(oracle, **kwargs)
+        self.base_fee_multiplier = base_fee_multiplier
+
+    def current_fields(self):
+        snapshot = self.oracle.snapshot()
+        if snapshot["legacy"]:
+            # Node tanpa eth_feeHistory: tetap kirim legacy
+            return self.legacy_fields()
+        cap = self.cap_wei()
+        tip = int(max(snapshot.get("reward") or snapshot["priority_fee"], 0.1) * 10**9)  # Minimum 0.1 Gwei
+        max_fee = min(int(snapshot["base_fee"] * self.base_fee_multiplier * 10**9) + tip, cap)
+        return {"type": 2, "maxFeePerGas": max_fee, "maxPriorityFeePerGas": min(tip, max_fee)}
+
+FEE_STRATEGIES = {"legacy": LegacyFeeStrategy, "eip1559": Eip1559FeeStrategy}
+
+def make_fee_strategy(name, oracle):
+    if name not in FEE_STRATEGIES:
+        raise ValueError(f"FEE_STRATEGY tidak dikenal: {name} (pilihan: {', '.join(FEE_STRATEGIES)})")
+    kwargs = {"budget_eth": RUN_FEE_BUDGET_ETH, "replacement_bump": FEE_REPLACEMENT_BUMP}
+    if name == "eip1559":
+        kwargs["base_fee_multiplier"] = FEE_BASE_MULTIPLIER
+    return FEE_STRATEGIES[name](oracle, **kwargs)
+
+def max_fee_per_gas(fields):
+    """Harga gas maksimum per unit (wei) dari field fee legacy maupun tipe 2."""
+    return fields.get("maxFeePerGas", fields.get("gasPrice", 0))
+
+def set_fee_fields(tx, fields):
+    """Mengganti field fee transaksi (legacy <-> tipe 2) tanpa menyisakan field lama."""
+    for key in FeeStrategy.PRICE_FIELDS:
+        tx.pop(key, None)
+    tx.update(fields)
+    return tx
+
+def describe_fee(fields):
+    if "gasPrice" in fields:
+        return f"Harga Gas: {fields['gasPrice'] / 10**9:.2f} gwei"
+    return f"Max Fee: {fields['maxFeePerGas'] / 10**9:.2f} gwei | Tip: {fields['maxPriorityFeePerGas'] / 10**9:.2f} gwei"
+
+class BalanceLedger:
+    """Ledger saldo token dan native milik pengirim, disimpan di memori.
+
+    Saldo diambil sekali dari chain, lalu transfer dipotong secara lokal saat disiarkan (reservasi)
+    dan diselesaikan dengan gasUsed dari receipt. Rekonsiliasi ke chain hanya dilakukan setiap
+    `reconcile_every` konfirmasi atau saat ada indikasi selisih.
+    """
+
+    def __init__(self, web3, contract, address, reconcile_every=50):
+        self.w3 = web3
+        self.contract = contract
+        self.address = address
+        self.reconcile_every = reconcile_every
+        self.lock = Lock()
+        self.token_units = 0
+        self.native_wei = 0
+        self.reserved_token_units = 0
+        self.reserved_gas_wei = 0
+        self.confirmed_since_reconcile = 0
+
+    def seed(self):
+        """Mengambil saldo awal dari chain."""
+        token_units = self.contract.functions.balanceOf(self.address).call()
+        native_wei = self.w3.eth.get_balance(self.address)
+        with self.lock:
+            self.token_units = token_units
+            self.native_wei = native_wei
+            self.confirmed_since_reconcile = 0
+
+    def reconcile(self):
+        """Menyamakan ledger dengan saldo on-chain dan mencatat selisihnya."""
+        token_units = self.contract.functions.balanceOf(self.address).call()
+        native_wei = self.w3.eth.get_balance(self.address)
+        with self.lock:
+            token_drift = token_units - self.token_units
+            native_drift = native_wei - self.native_wei
+            self.token_units = token_units
+            self.native_wei = native_wei
+            self.confirmed_since_reconcile = 0
+        if token_drift or native_drift:
+            logger.warning(f"⚠️ Selisih ledger saat rekonsiliasi: token {token_drift / 10**SENDER.token_decimals:+.4f}, native {native_drift / 10**18:+.6f}")
+
+    def reserve(self, token_units, gas_wei):
+        """Memesan token dan gas untuk satu transfer. Mengembalikan None bila cukup, atau "token"/"gas"."""
+        with self.lock:
+            if self.token_units - self.reserved_token_units < token_units:
+                return "token"
+            if self.native_wei - self.reserved_gas_wei < gas_wei:
+                return "gas"
+            self.reserved_token_units += token_units
+            self.reserved_gas_wei += gas_wei
+            return None
+
+    def release(self, token_units, gas_wei, suspect_drift=False):
+        """Membatalkan reservasi transfer yang tidak jadi terkonfirmasi.
+
+        `suspect_drift` hanya untuk transaksi yang mungkin sudah tersiar tetapi hasilnya tidak diketahui
+        (dibatalkan, atau nonce-nya dipakai transaksi lain); ledger lalu direkonsiliasi ke chain.
+        """
+        with self.lock:
+            self.reserved_token_units -= token_units
+            self.reserved_gas_wei -= gas_wei
+        if suspect_drift:
+            self.safe_reconcile()
+
+    def debit(self, token_units=0, native_wei=0):
+        """Memotong saldo untuk transfer di luar reservasi, mis. top-up yang dikirim treasury ke shard lain."""
+        with self.lock:
+            self.token_units -= token_units
+            self.native_wei -= native_wei
+
+    def charge_gas(self, receipt):
+        """Memotong biaya gas aktual dari receipt."""
+        gas_cost = receipt["gasUsed"] * receipt.get("effectiveGasPrice", 0)
+        with self.lock:
+            self.native_wei -= gas_cost
+        SENDER.fees.charge(receipt)
+
+    def settle(self, token_units, gas_wei, receipt):
+        """Menyelesaikan reservasi berdasarkan receipt transfer."""
+        self.charge_gas(receipt)
+        with self.lock:
+            self.reserved_token_units -= token_units
+            self.reserved_gas_wei -= gas_wei
+            if receipt["status"] == 1:
+                self.token_units -= token_units
+            self.confirmed_since_reconcile += 1
+            due = self.confirmed_since_reconcile >= self.reconcile_every
+        if due or receipt["status"] != 1:
+            self.safe_reconcile()
+
+    def safe_reconcile(self):
+        try:
+            self.reconcile()
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal rekonsiliasi ledger: {e}")
+
+    def available(self):
+        """(unit token, wei native) yang tersedia setelah reservasi."""
+        with self.lock:
+            return self.token_units - self.reserved_token_units, self.native_wei - self.reserved_gas_wei
+
+    def token_balance(self):
+        """Saldo token tersedia (setelah reservasi) dalam satuan token."""
+        with self.lock:
+            return (self.token_units - self.reserved_token_units) / (10 ** SENDER.token_decimals)
+
+    def native_balance(self):
+        """Saldo native tersedia (setelah reservasi) dalam satuan ETH/TEA."""
+        with self.lock:
+            return (self.native_wei - self.reserved_gas_wei) / 10**18
+
+class NonceManager:
+    """Pengelola nonce berurutan untuk satu alamat pengirim."""
+
+    def __init__(self, web3, address):
+        self.w3 = web3
+        self.address = address
+        self.lock = Lock()
+        self.nonce = web3.eth.get_transaction_count(address, "pending")
+
+    def next(self):
+        start = time.perf_counter()
+        with self.lock:
+            current_nonce = self.nonce
+            self.nonce += 1
+        METRICS.observe("nonce_wait_seconds", time.perf_counter() - start)
+        return current_nonce
+
+    def advance_to(self, nonce):
+        """Melompati nonce yang sudah dipakai transaksi pra-tanda tangan."""
+        with self.lock:
+            self.nonce = max(self.nonce, nonce)
+
+    def refresh(self):
+        with self.lock:
+            try:
+                self.nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+                logger.info(f"🔄 Nonce {self.address} di-refresh ke: {self.nonce}")
+            except Web3RPCError as e:
+                logger.error(f"❌ Gagal refresh nonce: {e}")
+                time.sleep(5)
+                self.nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+
+class SenderShard:
+    """Satu kunci pengirim dengan aliran nonce, reservasi gas, dan ledger saldonya sendiri."""
+
+    def __init__(self, web3, contract, private_key, address=None):
+        self.private_key = private_key[2:] if private_key.startswith("0x") else private_key
+        self.address = Web3.to_checksum_address(address) if address else web3.eth.account.from_key(self.private_key).address
+        self.nonces = NonceManager(web3, self.address)
+        self.ledger = BalanceLedger(web3, contract, self.address, reconcile_every=LEDGER_RECONCILE_EVERY)
+
+def estimate_gas_reserve_wei():
+    """Estimasi biaya gas (wei) satu transfer pada fee saat ini, untuk perencanaan.
+
+    Ledger memesan SENDER.fees.worst_case_wei() untuk transaksi yang benar-benar dikirim.
+    """
+    return 65000 * max_fee_per_gas(SENDER.fees.current_fields())  # Gas limit 65,000
+
+def get_next_nonce():
+    return SENDER.primary_shard.nonces.next()
+
+def refresh_nonce():
+    SENDER.primary_shard.nonces.refresh()
+
+def cancel_transaction(nonce, max_attempts=3, shard=None, reason="other", previous=None):
+    """Mengisi `nonce` dengan transfer 0 ke diri sendiri.
+
+    Fee pembatalan dinaikkan dari field fee versi terakhir yang disiarkan (`previous`, atau gas_price di
+    journal), bukan dari fee jaringan saat ini, agar tidak ditolak sebagai underpriced.
+    """
+    shard = shard or SENDER.primary_shard
+    METRICS.inc("cancellations_total", reason=reason)
+    previous = previous or SENDER.journal.last_fee(shard.address, nonce) or SENDER.fees.current_fields()
+    SENDER.journal.mark(shard.address, nonce, "cancelling")
+    for attempt in range(1, max_attempts + 1):
+        try:
+            try:
+                fee_fields = SENDER.fees.replacement_fields(previous, gas_limit=21000)
+            except FeeCapReached as e:
+                logger.error(f"❌ Tidak bisa membatalkan nonce {nonce}: {e}")
+                return None
+            tx = {
+                'from': shard.address,
+                'to': shard.address,
+                'value': 0,
+                'nonce': nonce,
+                'gas': 21000,
+                'chainId': SENDER.w3.eth.chain_id,
+                **fee_fields
+            }
+            signed_tx = SENDER.w3.eth.account.sign_transaction(tx, shard.private_key)
+            tx_hash = SENDER.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            console.print(f"[yellow]🚫 Membatalkan nonce {nonce}: {tx_hash.hex()[:10]}...[/yellow]")
+            logger.info(f"Membatalkan transaksi nonce {nonce} dengan tx_hash: {tx_hash.hex()}")
+            SENDER.confirmations.wait(tx_hash, sender=shard.address, nonce=nonce)
+            SENDER.journal.mark(shard.address, nonce, "failed")
+            return tx_hash
+        except Web3RPCError as e:
+            if "capacity exceeded" in str(e):
+                logger.warning(f"⚠️ Kapasitas node penuh saat membatalkan nonce {nonce}. Mencoba lagi ({attempt}/{max_attempts})")
+                backoff("capacity exceeded", attempt)
+                continue
+            if "underpriced" in str(e):
+                previous = fee_fields
+                continue
+            logger.error(f"❌ Gagal membatalkan nonce {nonce}: {e}")
+            return None
+        except Exception as e:
+            if "already known" in str(e):
+                return None
+            logger.error(f"❌ Gagal membatalkan nonce {nonce}: {e}")
+            if "underpriced" in str(e):
+                previous = fee_fields
+                continue
+            time.sleep(2)
+    return None
+
+def display_initial_status():
+    try:
+        SENDER.ledger.seed()
+        sender_balance = SENDER.ledger.token_balance()
+        gas_price = get_gas_price(max_gas_price_gwei=MAX_GAS_PRICE_GWEI)
+        eth_balance = SENDER.ledger.native_balance()
+        estimated_gas_cost = (65000 * SENDER.w3.to_wei(gas_price, 'gwei')) / 10**18  # Gas limit 65,000
+        dynamic_max = get_dynamic_max_gas_price()
+        
+        table = Table(title="Status Awal", box=box.ROUNDED, style="cyan")
+        table.add_column("Parameter", style="bold magenta")
+        table.add_column("Nilai", style="bold green")
+        
+        table.add_row("Saldo Token", f"{sender_balance:.4f} token")
+        table.add_row("Harga Gas Saat Ini", f"{gas_price:.2f} Gwei")
+        table.add_row("Estimasi Biaya Gas per TX", f"{estimated_gas_cost:.6f} TEA")
+        table.add_row("Saldo TEA Pengirim", f"{eth_balance:.4f} TEA")
+        table.add_row("Batas Gas Maksimum", f"{MAX_GAS_PRICE_GWEI if MAX_GAS_PRICE_GWEI > 0 else dynamic_max:.2f} Gwei")
+        table.add_row("Batas Biaya TX Maksimum", f"{MAX_TX_FEE_ETH:.2f} TEA")
+        
+        console.print(Panel(table, title="[bold cyan]📊 Informasi Awal[/bold cyan]", border_style="cyan"))
+        
+        if estimated_gas_cost > MAX_TX_FEE_ETH:
+            console.print(f"[red]❌ Estimasi biaya gas ({estimated_gas_cost:.6f} ETH) melebihi batas node ({MAX_TX_FEE_ETH} ETH). Transaksi mungkin gagal![/red]")
+            logger.error(f"Estimasi biaya gas ({estimated_gas_cost:.6f} ETH) > batas node ({MAX_TX_FEE_ETH} ETH)")
+        elif MAX_GAS_PRICE_GWEI > 0 and MAX_GAS_PRICE_GWEI < gas_price:
+            console.print(f"[yellow]⚠️ MAX_GAS_PRICE_GWEI ({MAX_GAS_PRICE_GWEI} Gwei) lebih rendah dari harga gas jaringan ({gas_price:.2f} Gwei).[/yellow]")
+            logger.warning(f"MAX_GAS_PRICE_GWEI ({MAX_GAS_PRICE_GWEI}) < harga gas jaringan ({gas_price:.2f})")
+        
+        logger.info(f"Status awal - Saldo Token: {sender_balance}, Gas Price: {gas_price} Gwei, ETH Balance: {eth_balance}, Max Gas: {MAX_GAS_PRICE_GWEI if MAX_GAS_PRICE_GWEI > 0 else dynamic_max} Gwei, Max TX Fee: {MAX_TX_FEE_ETH} ETH")
+        
+        return sender_balance, eth_balance
+    except Exception as e:
+        logger.error(f"❌ Gagal mengambil status awal: {e}")
+        console.print(f"[red]❌ Gagal mengambil status awal: {e}[/red]")
+        return 0, 0
+
+def send_worker(transfer, get_next_nonce_func, max_retries=3):
+    """Mengirim satu entri rencana harian (receiver, amount, token_units) dan menunggu receipt-nya."""
+    with RPC_SEMAPHORE:
+        receiver, amount, token_amount = transfer
+
+        estimated_gas_cost = estimate_gas_reserve_wei() / 10**18
+        if estimated_gas_cost > MAX_TX_FEE_ETH:
+            logger.error(f"❌ Biaya gas ({estimated_gas_cost:.6f} ETH) melebihi batas node ({MAX_TX_FEE_ETH} ETH)")
+            console.print(f"[red]❌ Biaya gas ({estimated_gas_cost:.6f} ETH) melebihi batas node ({MAX_TX_FEE_ETH} ETH)[/red]")
+            return 0
+
+        gas_reserve_wei = SENDER.fees.worst_case_wei()
+        shortfall = SENDER.ledger.reserve(token_amount, gas_reserve_wei)
+        if shortfall == "token":
+            sender_balance = SENDER.ledger.token_balance()
+            logger.error(f"❌ Saldo pengirim tidak cukup untuk {receiver}: {sender_balance} < {amount} token")
+            console.print(f"[red]❌ Saldo pengirim tidak cukup untuk {receiver}: {sender_balance} < {amount}[/red]")
+            return 0
+        if shortfall == "gas":
+            eth_balance = SENDER.ledger.native_balance()
+            logger.error(f"❌ Saldo ETH tidak cukup untuk gas: {eth_balance} < {estimated_gas_cost} ETH")
+            console.print(f"[red]❌ Saldo ETH tidak cukup untuk gas: {eth_balance} < {estimated_gas_cost} ETH[/red]")
+            return 0
+
+        settled = False
+        outcome_unknown = False  # Transaksi mungkin tersiar/tertambang tetapi hasilnya tidak diketahui
+        nonce = None
+        fee_reserved = 0
+        try:
+            for attempt in range(1, max_retries + 1):
+                try:
+                    SENDER.fees.release(fee_reserved)
+                    fee_reserved = 0
+                    fee_fields, fee_reserved = SENDER.fees.fee_fields()
+                    if nonce is None:
+                        nonce = get_next_nonce_func()
+                    logger.info("Memulai transaksi ke %s | Nonce: %s | Jumlah: %s token | %s", receiver, nonce, amount, describe_fee(fee_fields))
+                    print_transfer(f"[blue]🧾 TX ke {receiver} | Nonce: {nonce} | {describe_fee(fee_fields)}[/blue]")
+                    if not ADAPTIVE_CONCURRENCY:
+                        time.sleep(random.uniform(0.5, 1.5))
+
+                    tx = SENDER.token_contract.functions.transfer(receiver, token_amount).build_transaction({
+                        'from': SENDER.sender_address,
+                        'nonce': nonce,
+                        'gas': 65000,  # Gas limit 65,000
+                        'chainId': SENDER.w3.eth.chain_id,
+                        **fee_fields
+                    })
+                    receipt = send_with_replacement(tx, SENDER.primary_shard, [(receiver, amount)])
+                    tx_hash = receipt.transactionHash
+                    logger.info("Transaksi ke %s ditambang | TX Hash: %s", receiver, tx_hash.hex())
+
+                    SENDER.journal.settle(SENDER.sender_address, nonce, receipt)
+                    if receipt.status == 1:
+                        SENDER.ledger.settle(token_amount, gas_reserve_wei, receipt)
+                        settled = True
+                        msg = f"✅ Berhasil mengirim {amount} token ke {receiver} | TX: {tx_hash.hex()}"
+                        logger.info("%s | Gas Used: %s", msg, receipt.gasUsed)
+                        print_transfer(msg)
+                        record_success(receiver, amount, tx_hash, receipt.gasUsed)
+                        CONCURRENCY.on_success()
+                        return amount
+                    else:
+                        SENDER.ledger.charge_gas(receipt)
+                        nonce = None
+                        logger.error(f"❌ Transaksi gagal untuk {receiver}: status != 1")
+                        raise Exception("Transaksi gagal (status != 1)")
+
+                except FeeBudgetExhausted as e:
+                    METRICS.inc("send_errors_total", reason="fee_budget")
+                    logger.error(f"❌ {e}")
+                    console.print(f"[red]❌ {e}[/red]")
+                    if nonce is not None:
+                        refresh_nonce()
+                    return 0
+                except TimeExhausted as e:
+                    # Sudah diganti hingga batas fee tetapi tetap belum ditambang
+                    METRICS.inc("send_errors_total", reason="timeout")
+                    logger.error(f"❌ {e}. Membatalkan nonce {nonce}.")
+                    console.print(f"[red]❌ Transaksi ke {receiver} macet setelah penggantian fee[/red]")
+                    outcome_unknown = True
+                    cancel_transaction(nonce, reason="timeout", previous=tx)
+                    refresh_nonce()
+                    return 0
+                except TransactionNotFound:
+                    # Pelacak sudah memastikan semua versi nonce ini hilang di beberapa blok dan endpoint.
+                    # Penerima tidak dikirimi ulang di run ini; ia tetap ada di rencana untuk run berikutnya.
+                    METRICS.inc("send_errors_total", reason="nonce_consumed")
+                    logger.error(f"❌ Nonce {nonce} untuk {receiver} dipakai transaksi lain pada percobaan {attempt}")
+                    console.print(f"[red]❌ Transaksi ke {receiver} tidak ditambang, nonce {nonce} sudah terpakai[/red]")
+                    SENDER.journal.mark(SENDER.sender_address, nonce, "failed")
+                    outcome_unknown = True  # Nonce dipakai transaksi yang tidak dikenal ledger
+                    refresh_nonce()
+                    return 0
+                except Web3RPCError as e:
+                    error_msg = str(e)
+                    METRICS.inc("send_errors_total", reason=error_class(error_msg))
+                    logger.error(f"❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}")
+                    console.print(f"[red]❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}[/red]")
+                    if "exceeds the configured cap" in error_msg:
+                        logger.error(f"❌ Biaya gas terlalu tinggi untuk node. Membatalkan percobaan.")
+                        return 0
+                    if "capacity exceeded" in error_msg and attempt < max_retries:
+                        logger.warning(f"⚠️ Kapasitas node penuh. Menunggu sebelum mencoba lagi ({attempt}/{max_retries})")
+                        backoff("capacity exceeded", attempt)
+                        continue
+                    if "nonce too low" in error_msg:
+                        logger.info(f"⚠️ Nonce terlalu rendah. Merefresh nonce.")
+                        SENDER.journal.supersede(SENDER.sender_address, nonce, [receiver])
+                        refresh_nonce()
+                        nonce = None
+                        continue
+                    if attempt == max_retries:
+                        logger.error(f"❌ Gagal mengirim ke {receiver} setelah {max_retries} percobaan")
+                        outcome_unknown = True
+                        cancel_transaction(nonce, reason="rpc_error")
+                        refresh_nonce()
+                        return 0
+                    return 0
+                except Exception as e:
+                    error_msg = str(e)
+                    METRICS.inc("send_errors_total", reason=error_class(error_msg))
+                    logger.error(f"❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}")
+                    console.print(f"[red]❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}[/red]")
+
+                    if "nonce too low" in error_msg:
+                        logger.info(f"⚠️ Nonce terlalu rendah. Merefresh nonce.")
+                        if nonce is not None:
+                            SENDER.journal.supersede(SENDER.sender_address, nonce, [receiver])
+                        refresh_nonce()
+                        nonce = None
+                        continue
+                    if attempt == max_retries:
+                        logger.error(f"❌ Gagal mengirim ke {receiver} setelah {max_retries} percobaan")
+                        if nonce is not None:
+                            outcome_unknown = True
+                            cancel_transaction(nonce, reason="other")
+                        refresh_nonce()
+                        return 0
+                    time.sleep(3)
+            return 0
+        finally:
+            SENDER.fees.release(fee_reserved)
+            if not settled:
+                SENDER.ledger.release(token_amount, gas_reserve_wei, suspect_drift=outcome_unknown)
+
+def today_key():
+    return datetime.now(JAKARTA_TZ).strftime('%Y-%m-%d')
+
+def snapshot_state_db(path):
+    """Salinan STATE_DB di memori untuk mode yang tidak boleh menulis ke disk (dry-run, plan-only).
+
+    DB dibuka baca-saja; `immutable` dipakai bila tidak ada WAL aktif agar tidak tercipta berkas -wal/-shm.
+    """
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    if os.path.exists(path):
+        flags = "mode=ro" if os.path.exists(path + "-wal") else "mode=ro&immutable=1"
+        source = sqlite3.connect(f"file:{path}?{flags}", uri=True)
+        source.backup(conn)
+        source.close()
+    return conn
+
+class SentStore:
+    """Penyimpanan status pengiriman berbasis SQLite (WAL), berindeks (alamat, hari).
+
+    Transfer yang dikonfirmasi ditulis oleh RunJournal.settle() bersama status journal-nya, satu commit
+    per receipt; dengan WAL + synchronous=NORMAL commit tersebut tidak menunggu fsync.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sent (
+            address TEXT NOT NULL,
+            day TEXT NOT NULL,
+            amount REAL,
+            tx_hash TEXT,
+            gas_used INTEGER,
+            sent_at TEXT,
+            PRIMARY KEY (address, day)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS daily_counts (
+            day TEXT PRIMARY KEY,
+            wallets INTEGER NOT NULL DEFAULT 0,
+            tokens REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS imports (
+            path TEXT PRIMARY KEY,
+            imported_at TEXT
+        );
+    """
+
+    def __init__(self, path, conn=None):
+        self.path = path
+        self.lock = Lock()
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn = conn
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def insert_rows(conn, rows):
+        """Menulis [(alamat, hari, jumlah, tx_hash, gas_used, sent_at)] ke `sent` dan daily_counts dalam
+        transaksi milik pemanggil; alamat yang sudah tercatat pada hari yang sama dilewati.
+        """
+        for row in rows:
+            cursor = conn.execute("INSERT OR IGNORE INTO sent VALUES (?, ?, ?, ?, ?, ?)", row)
+            if cursor.rowcount:
+                conn.execute(
+                    "INSERT INTO daily_counts (day, wallets, tokens) VALUES (?, 1, ?) "
+                    "ON CONFLICT(day) DO UPDATE SET wallets = wallets + 1, tokens = tokens + excluded.tokens",
+                    (row[1], row[2] or 0)
+                )
+
+    def record(self, address, day, amount, tx_hash, gas_used):
+        """Mencatat satu transfer berhasil di luar journal (mis. hasil impor)."""
+        with self.lock, self.conn:
+            self.insert_rows(self.conn, [(address, day, amount, tx_hash, gas_used, datetime.now(JAKARTA_TZ).isoformat())])
+
+    def count_for_day(self, day):
+        """Jumlah dompet yang sudah dikirimi pada hari tertentu."""
+        with self.lock:
+            row = self.conn.execute("SELECT wallets FROM daily_counts WHERE day = ?", (day,)).fetchone()
+        return row[0] if row else 0
+
+    def tokens_for_day(self, day):
+        """Jumlah token yang sudah dikirim pada hari tertentu."""
+        with self.lock:
+            row = self.conn.execute("SELECT tokens FROM daily_counts WHERE day = ?", (day,)).fetchone()
+        return row[0] or 0 if row else 0
+
+    def sent_addresses(self, day):
+        """Himpunan alamat yang sudah dikirimi pada hari tertentu."""
+        with self.lock:
+            rows = self.conn.execute("SELECT address FROM sent WHERE day = ?", (day,)).fetchall()
+        return {row[0] for row in rows}
+
+    def is_sent(self, address, day):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM sent WHERE address = ? AND day = ?", (address, day)).fetchone() is not None
+
+    def import_sent_file(self, path):
+        """Migrasi satu kali dari format sent_wallets.txt (alamat|YYYY-MM-DD), dalam satu transaksi."""
+        if not os.path.exists(path):
+            return 0
+        key = os.path.abspath(path)
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM imports WHERE path = ?", (key,)).fetchone():
+                return 0
+        rows = []
+        imported_at = datetime.now(JAKARTA_TZ).isoformat()
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                wallet, day = line.split("|") if "|" in line else (line, "1970-01-01")
+                if Web3.is_address(wallet):
+                    rows.append((Web3.to_checksum_address(wallet), day, None, None, None, imported_at))
+        with self.lock, self.conn:
+            self.insert_rows(self.conn, rows)
+            self.conn.execute("INSERT INTO imports VALUES (?, ?)", (key, imported_at))
+        logger.info(f"📥 {len(rows)} catatan dari {path} diimpor ke {self.path}")
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
+
+class RunJournal:
+    """Write-ahead journal status transaksi per (pengirim, nonce, penerima).
+
+    Baris 'signed' (beserta raw transaction) di-commit sebelum broadcast, lalu diperbarui menjadi
+    'broadcast', 'cancelling', 'confirmed', 'failed', atau 'superseded'. Saat start, baris yang belum selesai
+    diperiksa ulang oleh recover_inflight(). Status 'confirmed' dan baris `sent` penerimanya ditulis
+    dalam satu transaksi (`settle`), sehingga tidak ada jeda di mana penerima terbayar tidak tercatat.
+    """
+
+    UNRESOLVED = ("signed", "broadcast", "cancelling")
+
+    def __init__(self, path, conn=None):
+        self.lock = Lock()
+        if conn is None:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn = conn
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS journal (
+                sender TEXT NOT NULL,
+                nonce INTEGER NOT NULL,
+                receiver TEXT NOT NULL,
+                amount REAL NOT NULL,
+                tx_hash TEXT,
+                raw BLOB,
+                gas_price INTEGER,
+                status TEXT NOT NULL,
+                day TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (sender, nonce, receiver)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS journal_status ON journal (status);
+            CREATE TABLE IF NOT EXISTS journal_hashes (
+                sender TEXT NOT NULL,
+                nonce INTEGER NOT NULL,
+                tx_hash TEXT NOT NULL,
+                PRIMARY KEY (sender, nonce, tx_hash)
+            ) WITHOUT ROWID;
+        """ + SentStore.SCHEMA)
+        self.conn.commit()
+
+    def signed(self, sender, nonce, entries, tx_hash, raw, gas_price=None):
+        """Mencatat transaksi bertanda tangan untuk [(receiver, amount)] sebelum disiarkan.
+
+        Versi pengganti (fee lebih tinggi, nonce sama) menimpa baris utama; semua hash tetap disimpan
+        di journal_hashes karena versi mana pun bisa jadi yang ditambang.
+        """
+        now = time.time()
+        day = today_key()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO journal VALUES (?, ?, ?, ?, ?, ?, ?, 'signed', ?, ?)",
+                [(sender, nonce, receiver, amount, tx_hash, bytes(raw), gas_price, day, now) for receiver, amount in entries]
+            )
+            if entries:
+                self.conn.execute("INSERT OR IGNORE INTO journal_hashes VALUES (?, ?, ?)", (sender, nonce, tx_hash))
+
+    def mark(self, sender, nonce, status):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE journal SET status = ?, updated_at = ? WHERE sender = ? AND nonce = ? AND status IN ('signed', 'broadcast', 'cancelling')",
+                (status, time.time(), sender, nonce)
+            )
+
+    def supersede(self, sender, nonce, receivers):
+        """Menandai baris penerima yang ditolak 'nonce too low' sebagai 'superseded' sebelum dikirim ulang
+        dengan nonce baru. Baris penerima lain pada nonce yang sama (mis. milik run sebelumnya) tidak disentuh.
+        """
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE journal SET status = 'superseded', updated_at = ? WHERE sender = ? AND nonce = ? AND receiver = ? "
+                "AND status IN ('signed', 'broadcast', 'cancelling')",
+                [(time.time(), sender, nonce, receiver) for receiver in receivers]
+            )
+
+    def settle(self, sender, nonce, receipt):
+        """Menandai nonce 'confirmed' atau 'failed' dari receipt dan mengembalikan statusnya.
+
+        Penerima transaksi yang berhasil dicatat di `sent` (gas dibagi rata) dalam transaksi SQLite yang
+        sama dengan pembaruan status journal.
+        """
+        status = "confirmed" if receipt["status"] == 1 else "failed"
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT receiver, amount, day FROM journal WHERE sender = ? AND nonce = ? AND status IN ('signed', 'broadcast', 'cancelling')",
+                (sender, nonce)
+            ).fetchall()
+            self.conn.execute(
+                "UPDATE journal SET status = ?, updated_at = ? WHERE sender = ? AND nonce = ? AND status IN ('signed', 'broadcast', 'cancelling')",
+                (status, time.time(), sender, nonce)
+            )
+            if status == "confirmed" and rows:
+                tx_hash = receipt["transactionHash"].hex()
+                gas_share = receipt["gasUsed"] // len(rows)
+                sent_at = datetime.now(JAKARTA_TZ).isoformat()
+                SentStore.insert_rows(self.conn, [(receiver, day, amount, tx_hash, gas_share, sent_at) for receiver, amount, day in rows])
+        return status
+
+    def hashes(self, sender, nonce):
+        """Semua hash yang pernah ditandatangani untuk (pengirim, nonce), termasuk versi pengganti."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT tx_hash FROM journal_hashes WHERE sender = ? AND nonce = ?", (sender, nonce)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def last_fee(self, sender, nonce):
+        """Field fee (sebagai gasPrice) versi terakhir yang ditandatangani untuk nonce ini, atau None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MAX(gas_price) FROM journal WHERE sender = ? AND nonce = ?", (sender, nonce)
+            ).fetchone()
+        return {"gasPrice": row[0]} if row and row[0] else None
+
+    def unresolved(self):
+        """Transaksi yang belum jelas hasilnya, dikelompokkan per (pengirim, nonce)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT sender, nonce, tx_hash, raw, gas_price, day, receiver, amount FROM journal "
+                "WHERE status IN ('signed', 'broadcast', 'cancelling') ORDER BY sender, nonce"
+            ).fetchall()
+        grouped = {}
+        for sender, nonce, tx_hash, raw, gas_price, day, receiver, amount in rows:
+            entry = grouped.setdefault((sender, nonce), {
+                "sender": sender, "nonce": nonce, "tx_hash": tx_hash, "raw": raw,
+                "gas_price": gas_price, "day": day, "entries": []
+            })
+            entry["entries"].append((receiver, amount))
+        with self.lock:
+            hashes = self.conn.execute(
+                "SELECT DISTINCT h.sender, h.nonce, h.tx_hash FROM journal_hashes h JOIN journal j "
+                "ON j.sender = h.sender AND j.nonce = h.nonce WHERE j.status IN ('signed', 'broadcast', 'cancelling')"
+            ).fetchall()
+        for sender, nonce, tx_hash in hashes:
+            grouped[(sender, nonce)].setdefault("hashes", []).append(tx_hash)
+        for entry in grouped.values():
+            entry.setdefault("hashes", [entry["tx_hash"]])
+        return list(grouped.values())
+
+    def unresolved_receivers(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT receiver FROM journal WHERE status IN ('signed', 'broadcast', 'cancelling')"
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def unresolved_tokens(self, day):
+        """Jumlah token pada transaksi hari `day` yang belum selesai (bisa masih tertambang)."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT SUM(amount) FROM journal WHERE day = ? AND status IN ('signed', 'broadcast', 'cancelling')", (day,)
+            ).fetchone()
+        return row[0] or 0
+
+class Sender:
+    """Konteks pengirim: kredensial, alamat token, endpoint RPC, serta state lokal dan jaringannya.
+
+    State lokal (`open_state`) dan koneksi jaringan (`connect`) dibuka secara malas, hanya oleh mode
+    yang membutuhkannya, dan disimpan di instance ini. Mesin pengiriman memakai sender aktif (`SENDER`)
+    yang dipasang lewat `activate()`.
+    """
+
+    def __init__(self, private_key=None, sender_address=None, token_address=None, rpc_urls=None,
+                 sender_keys=(), treasury_private_key=None, disperse_address=None, token_decimals=None):
+        self.private_key = private_key[2:] if private_key and private_key.startswith("0x") else private_key
+        self.sender_address = Web3.to_checksum_address(sender_address) if sender_address else None
+        self.token_address = Web3.to_checksum_address(token_address) if token_address else None
+        self.rpc_urls = rpc_urls
+        self.sender_keys = list(sender_keys)
+        self.treasury_private_key = treasury_private_key or None
+        self.disperse_address = Web3.to_checksum_address(disperse_address) if disperse_address else None
+        self.token_decimals = token_decimals
+        self.store = None
+        self.journal = None
+        self.w3 = None
+        self.token_contract = None
+        self.gas_oracle = None
+        self.fees = None
+        self.confirmations = None
+        self.primary_shard = None
+        self.shards = []
+        self.ledger = None
+
+    @classmethod
+    def from_env(cls):
+        token_decimals = os.getenv("TOKEN_DECIMALS")
+        return cls(
+            private_key=os.getenv("PRIVATE_KEY"),
+            sender_address=os.getenv("SENDER_ADDRESS"),
+            token_address=os.getenv("TOKEN_CONTRACT"),
+            # Pool RPC: daftar dipisah koma, opsional batas request/detik per endpoint, mis. "https://a|20,https://b|10"
+            rpc_urls=os.getenv("RPC_URLS") or os.getenv("INFURA_URL"),
+            # Sharding kunci pengirim: kunci tambahan dipisah koma, masing-masing punya nonce dan ledger sendiri
+            sender_keys=[key.strip() for key in os.getenv("SENDER_KEYS", "").split(",") if key.strip()],
+            treasury_private_key=os.getenv("TREASURY_PRIVATE_KEY"),  # Opsional: sumber top-up otomatis untuk shard
+            disperse_address=os.getenv("DISPERSE_CONTRACT"),
+            token_decimals=int(token_decimals) if token_decimals else None,  # Opsional: hemat satu panggilan decimals()
+        )
+
+    def open_state(self, persist=True):
+        """Membuka STATE_DB (riwayat kirim dan journal) tanpa menyentuh jaringan.
+
+        Dengan `persist=False` yang dibuka adalah salinan di memori (snapshot_state_db): impor
+        sent_wallets.txt tetap berlaku untuk run ini, tetapi tidak ada yang ditulis ke disk.
+        """
+        if self.store is None:
+            conn = None if persist else snapshot_state_db(STATE_DB)
+            self.store = SentStore(STATE_DB, conn=conn)
+            self.journal = RunJournal(STATE_DB, conn=conn)
+            self.store.import_sent_file(SENT_FILE)
+        return self
+
+    def connect(self):
+        """Membuka pool RPC, membaca desimal token dan nonce pengirim, lalu menyiapkan shard dan ledger."""
+        if self.w3 is not None:
+            return self
+        missing = [name for name, value in (
+            ("PRIVATE_KEY", self.private_key), ("TOKEN_CONTRACT", self.token_address), ("RPC_URLS/INFURA_URL", self.rpc_urls)
+        ) if not value]
+        if missing:
+            raise ValueError(f"Konfigurasi wajib belum diisi: {', '.join(missing)}")
+        web3 = Web3(RpcPool(parse_rpc_endpoints(self.rpc_urls), broadcast_fanout=RPC_BROADCAST_FANOUT))
+        oracle = GasOracle(web3, ttl=GAS_ORACLE_TTL, poll_interval=GAS_ORACLE_POLL_INTERVAL)
+        fees = make_fee_strategy(FEE_STRATEGY, oracle)  # Nama strategi divalidasi sebelum panggilan RPC pertama
+        if not web3.is_connected():
+            raise ConnectionError("Gagal terhubung ke jaringan")
+
+        self.sender_address = self.sender_address or web3.eth.account.from_key(self.private_key).address
+        self.token_contract = web3.eth.contract(address=self.token_address, abi=TOKEN_ABI)
+        if self.token_decimals is None:
+            self.token_decimals = self.token_contract.functions.decimals().call()
+        self.gas_oracle = oracle
+        self.fees = fees
+        self.confirmations = ConfirmationTracker(
+            web3, depth=CONFIRMATION_DEPTH, poll_interval=CONFIRM_HEAD_POLL_INTERVAL, ws_url=CONFIRM_WS_URL,
+            sibling_hashes=lambda sender, nonce: self.journal.hashes(sender, nonce) if self.journal is not None else []
+        )
+        self.primary_shard = SenderShard(web3, self.token_contract, self.private_key, self.sender_address)
+        self.shards = [self.primary_shard] + [SenderShard(web3, self.token_contract, key) for key in self.sender_keys]
+        self.ledger = self.primary_shard.ledger
+        self.w3 = web3
+        return self
+
+    def activate(self):
+        """Menjadikan sender ini konteks yang dipakai fungsi pengiriman dan perencanaan modul."""
+        global SENDER
+        SENDER = self
+        return self
+
+    def close(self):
+        """Menghentikan thread latar dan menutup STATE_DB."""
+        if self.confirmations is not None:
+            self.confirmations.stop()
+        if self.gas_oracle is not None:
+            self.gas_oracle.stop()
+        if self.store is not None:
+            self.store.close()
+
+# Sender aktif (lihat Sender.activate()); mengimpor modul tidak melakukan I/O
+SENDER = None
+transaction_log_file = None
+
+def record_success(receiver, amount, tx_hash, gas_used):
+    """Mencatat transfer yang berhasil ke metrik dan log transaksi (STATE_DB sudah diisi SENDER.journal.settle())."""
+    global transaction_log_file
+    METRICS.inc("transfers_total")
+    METRICS.inc("gas_used_total", gas_used)
+    with file_lock:
+        if transaction_log_file is None:
+            os.makedirs(os.path.dirname(TRANSACTION_LOG), exist_ok=True)
+            transaction_log_file = open(TRANSACTION_LOG, "a", buffering=1)
+        transaction_log_file.write(f"{datetime.now(JAKARTA_TZ)} | {receiver} | {amount} | {tx_hash.hex()} | Gas Used: {gas_used}\n")
+
+def broadcast_bumped(tx, shard, entries, bump_first=True, max_bumps=3):
+    """Menandatangani dan menyiarkan `tx` pada nonce-nya. Bila `bump_first`, fee dinaikkan dulu (transaksi
+    pengganti); bila ditolak underpriced, fee dinaikkan lagi. Mengembalikan hash yang tersiar.
+    """
+    for bump in range(max_bumps + 1):
+        if bump_first or bump > 0:
+            set_fee_fields(tx, SENDER.fees.replacement_fields(tx))
+        start = time.perf_counter()
+        signed_tx = SENDER.w3.eth.account.sign_transaction(tx, shard.private_key)
+        METRICS.observe("sign_seconds", time.perf_counter() - start)
+        SENDER.journal.signed(shard.address, tx['nonce'], entries, signed_tx.hash.hex(), signed_tx.raw_transaction, max_fee_per_gas(tx))
+        try:
+            tx_hash = SENDER.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        except Exception as e:
+            error_msg = str(e)
+            if "already known" in error_msg:
+                tx_hash = signed_tx.hash
+            elif "underpriced" in error_msg and bump < max_bumps:
+                logger.info("⚠️ Fee nonce %s terlalu rendah (%s). Menaikkan fee pada nonce yang sama.", tx['nonce'], describe_fee(tx))
+                METRICS.inc("retries_total", reason="underpriced")
+                signal_underpriced()
+                continue
+            else:
+                raise
+        SENDER.journal.mark(shard.address, tx['nonce'], "broadcast")
+        return tx_hash
+
+def send_with_replacement(tx, shard, entries):
+    """Menyiarkan transaksi lalu menunggu konfirmasi. Bila belum ditambang setelah FEE_STUCK_TIMEOUT detik,
+    transaksi diganti dengan fee lebih tinggi pada nonce yang sama (maks. FEE_MAX_REPLACEMENTS kali).
+    Semua versi tetap dilacak; receipt versi yang ditambang dikembalikan.
+    """
+    nonce = tx['nonce']
+    hashes = [broadcast_bumped(tx, shard, entries, bump_first=False)]
+    broadcast_at = time.monotonic()
+    for replacement in range(1, FEE_MAX_REPLACEMENTS + 1):
+        try:
+            receipt = SENDER.confirmations.wait(hashes, timeout=FEE_STUCK_TIMEOUT, sender=shard.address, nonce=nonce)
+            METRICS.observe("broadcast_to_receipt_seconds", time.monotonic() - broadcast_at)
+            return receipt
+        except TimeExhausted:
+            pass
+        METRICS.inc("replacements_total", reason="stuck")
+        logger.warning("⏫ Nonce %s belum ditambang setelah %.0f detik. Mengganti dengan fee lebih tinggi (%s/%s)", nonce, FEE_STUCK_TIMEOUT, replacement, FEE_MAX_REPLACEMENTS)
+        try:
+            hashes.append(broadcast_bumped(tx, shard, entries))
+        except FeeCapReached as e:
+            logger.warning("⚠️ %s. Tetap menunggu transaksi sebelumnya.", e)
+            break
+        except Exception as e:
+            if "nonce too low" not in str(e):
+                logger.warning("⚠️ Gagal mengganti transaksi nonce %s: %s", nonce, e)
+            break
+    receipt = SENDER.confirmations.wait(hashes, timeout=RECEIPT_TIMEOUT, sender=shard.address, nonce=nonce)
+    METRICS.observe("broadcast_to_receipt_seconds", time.monotonic() - broadcast_at)
+    return receipt
+
+def submit_transfer(receiver, amount, token_amount, max_retries=3, shard=None):
+    """Menandatangani dan menyiarkan transfer tanpa menunggu receipt.
+
+    Mengembalikan (tx_hash, nonce, tx, fee_reserved) atau None; `fee_reserved` dilepas pemanggil lewat
+    SENDER.fees.release() setelah transaksi selesai. Gagal dengan FeeBudgetExhausted (sebelum nonce dipakai)
+    bila anggaran fee run habis.
+    """
+    shard = shard or SENDER.primary_shard
+    fee_fields, fee_reserved = SENDER.fees.fee_fields()
+    nonce = shard.nonces.next()
+    tx = build_transfer_tx(receiver, token_amount, nonce, fee_fields, SENDER.w3.eth.chain_id)
+    for attempt in range(1, max_retries + 1):
+        try:
+            tx_hash = broadcast_bumped(tx, shard, [(receiver, amount)], bump_first=False)
+            logger.info("Transaksi disiarkan ke %s | Nonce: %s | Jumlah: %s token | %s | TX Hash: %s", receiver, nonce, amount, describe_fee(tx), tx_hash.hex())
+            return tx_hash, nonce, tx, fee_reserved
+        except Exception as e:
+            error_msg = str(e)
+            logger.error("❌ Percobaan %s gagal menyiarkan ke %s: %s", attempt, receiver, error_msg)
+            if "capacity exceeded" in error_msg and attempt < max_retries:
+                backoff("capacity exceeded", attempt)
+                continue
+            if "nonce too low" in error_msg:
+                SENDER.journal.supersede(shard.address, nonce, [receiver])
+                shard.nonces.refresh()
+                nonce = shard.nonces.next()
+                tx['nonce'] = nonce
+                continue
+            break
+    # Nonce belum pernah tersiar, sinkronkan ulang agar tidak meninggalkan gap
+    SENDER.fees.release(fee_reserved)
+    SENDER.journal.mark(shard.address, nonce, "failed")
+    shard.nonces.refresh()
+    return None
+
+class RecipientFeed:
+    """Antrean bersama (thread-safe) atas entri rencana harian (receiver, amount, token_units).
+
+    Anggaran MAX_TOTAL_SEND sudah dipotong di DispatchPlan sehingga berlaku lintas shard.
+    """
+
+    def __init__(self, transfers):
+        self.transfers = iter(transfers)
+        self.lock = Lock()
+        self.returned = []
+        self.exhausted = False
+
+    def next(self):
+        """Mengembalikan entri berikutnya, atau None bila rencana habis."""
+        with self.lock:
+            if self.returned:
+                return self.returned.pop()
+            if self.exhausted:
+                return None
+            item = next(self.transfers, None)
+            if item is None:
+                self.exhausted = True
+            return item
+
+    def give_back(self, item):
+        """Mengembalikan penerima yang belum diproses agar diambil shard lain."""
+        with self.lock:
+            self.returned.append(item)
+
+def run_pipeline(transfers, progress=None, task=None, shard=None, submit=None):
+    """Mengirim dalam mode pipeline: penyiaran beruntun, konfirmasi diterima dari SENDER.confirmations per blok.
+
+    Jumlah transaksi yang belum terkonfirmasi dibatasi oleh INFLIGHT_WINDOW. `transfers` boleh berupa
+    RecipientFeed yang dibagi dengan shard lain; `submit` menggantikan submit_transfer (mis. untuk transaksi
+    pra-tanda tangan) dan mengembalikan (tx_hash, nonce, tx, fee_reserved); bila `tx` ada, transaksi yang macet lebih dari
+    FEE_STUCK_TIMEOUT diganti dengan fee lebih tinggi. Mengembalikan (total token terkirim, jumlah dompet diproses).
+    """
+    shard = shard or SENDER.primary_shard
+    submit = submit or submit_transfer
+    ledger = shard.ledger
+    feed = transfers if isinstance(transfers, RecipientFeed) else RecipientFeed(transfers)
+    window = CONCURRENCY if ADAPTIVE_CONCURRENCY else Semaphore(INFLIGHT_WINDOW)
+    inflight = {}
+    inflight_lock = Lock()
+    submitting_done = Event()
+    confirmed = Event()
+    result = {"total_sent": 0, "processed": 0}
+
+    def finish(tx_hash, sent):
+        with inflight_lock:
+            entry = inflight.pop(tx_hash, None)
+            result["total_sent"] += sent
+            result["processed"] += 1
+        if entry is not None:
+            SENDER.fees.release(entry["fee_reserved"])
+        window.release()
+        if progress is not None:
+            progress.advance(task)
+
+    def replace_stuck(entry):
+        """Mengganti transaksi macet pada nonce yang sama dengan fee lebih tinggi."""
+        entry["last_broadcast"] = time.time()
+        entry["replacements"] += 1
+        METRICS.inc("replacements_total", reason="stuck")
+        try:
+            tx_hash = broadcast_bumped(entry["tx"], shard, [(entry["receiver"], entry["amount"])])
+        except FeeCapReached as e:
+            logger.warning(f"⚠️ {e}. Nonce {entry['nonce']} tetap menunggu transaksi sebelumnya.")
+            entry["tx"] = None
+            return
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal mengganti transaksi nonce {entry['nonce']}: {e}")
+            return
+        logger.warning(f"⏫ Nonce {entry['nonce']} ke {entry['receiver']} diganti ({describe_fee(entry['tx'])}) | TX: {tx_hash.hex()}")
+        entry["watches"].append(SENDER.confirmations.watch(tx_hash, shard.address, entry["nonce"], callback=lambda _: confirmed.set()))
+
+    def tracker():
+        while not submitting_done.is_set() or inflight:
+            confirmed.clear()
+            with inflight_lock:
+                pending = list(inflight.items())
+            for key, entry in pending:
+                receiver, amount, nonce = entry["receiver"], entry["amount"], entry["nonce"]
+                token_amount, gas_reserve_wei = entry["token_amount"], entry["gas_reserve_wei"]
+                mined = next((tx for tx in entry["watches"] if tx.event.is_set() and not tx.dropped), None)
+                if mined is None and not all(tx.event.is_set() for tx in entry["watches"]):
+                    now = time.time()
+                    if now - entry["submitted_at"] > RECEIPT_TIMEOUT:
+                        logger.warning(f"⚠️ Transaksi nonce {nonce} ke {receiver} belum terkonfirmasi setelah {RECEIPT_TIMEOUT} detik. Membatalkan nonce {nonce}.")
+                        for tx in entry["watches"]:
+                            SENDER.confirmations.forget(tx.tx_hash)
+                        Thread(target=cancel_transaction, args=(nonce, 3, shard, "timeout", entry["tx"]), daemon=True).start()
+                        ledger.release(token_amount, gas_reserve_wei, suspect_drift=True)
+                        finish(key, 0)
+                    elif entry["tx"] is not None and entry["replacements"] < FEE_MAX_REPLACEMENTS and now - entry["last_broadcast"] > FEE_STUCK_TIMEOUT:
+                        replace_stuck(entry)
+                    continue
+                for tx in entry["watches"]:
+                    SENDER.confirmations.forget(tx.tx_hash)
+                if mined is None:
+                    logger.warning(f"⚠️ Nonce {nonce} sudah dipakai transaksi lain, transfer ke {receiver} tidak ditambang.")
+                    SENDER.journal.mark(shard.address, nonce, "failed")
+                    ledger.release(token_amount, gas_reserve_wei, suspect_drift=True)
+                    finish(key, 0)
+                    continue
+
+                receipt = mined.receipt
+                tx_hash = receipt.transactionHash
+                METRICS.observe("broadcast_to_receipt_seconds", time.time() - entry["submitted_at"])
+                ledger.settle(token_amount, gas_reserve_wei, receipt)
+                SENDER.journal.settle(shard.address, nonce, receipt)
+                if receipt.status == 1:
+                    logger.info("✅ Berhasil mengirim %s token ke %s | TX: %s | Gas Used: %s", amount, receiver, tx_hash.hex(), receipt.gasUsed)
+                    record_success(receiver, amount, tx_hash, receipt.gasUsed)
+                    CONCURRENCY.on_success()
+                    finish(key, amount)
+                else:
+                    logger.error(f"❌ Transaksi gagal untuk {receiver}: status != 1 | TX: {tx_hash.hex()}")
+                    finish(key, 0)
+            confirmed.wait(RECEIPT_POLL_INTERVAL)
+
+    tracker_thread = Thread(target=tracker, daemon=True)
+    tracker_thread.start()
+
+    while True:
+        item = feed.next()
+        if item is None:
+            break
+        receiver, amount, token_amount = item
+        gas_reserve_wei = SENDER.fees.worst_case_wei()
+        shortfall = ledger.reserve(token_amount, gas_reserve_wei)
+        if shortfall is not None:
+            logger.error(f"❌ Saldo {shortfall} pengirim {shard.address} tidak cukup untuk melanjutkan. Token: {ledger.token_balance()}, Native: {ledger.native_balance()}")
+            feed.give_back(item)
+            break
+
+        window.acquire()
+        try:
+            submitted = submit(receiver, amount, token_amount, shard=shard)
+        except FeeBudgetExhausted as e:
+            logger.error(f"❌ {e}")
+            ledger.release(token_amount, gas_reserve_wei)
+            window.release()
+            feed.give_back(item)
+            break
+        if submitted is None:
+            ledger.release(token_amount, gas_reserve_wei)
+            window.release()
+            with inflight_lock:
+                result["processed"] += 1
+            if progress is not None:
+                progress.advance(task)
+            continue
+
+        tx_hash, nonce, tx, fee_reserved = submitted
+        with inflight_lock:
+            inflight[tx_hash] = {
+                "receiver": receiver, "amount": amount, "nonce": nonce, "tx": tx, "fee_reserved": fee_reserved,
+                "submitted_at": time.time(), "last_broadcast": time.time(), "replacements": 0,
+                "token_amount": token_amount, "gas_reserve_wei": gas_reserve_wei,
+                "watches": [SENDER.confirmations.watch(tx_hash, shard.address, nonce, callback=lambda _: confirmed.set())]
+            }
+
+    submitting_done.set()
+    tracker_thread.join()
+    return result["total_sent"], result["processed"]
+
+TRANSFER_SELECTOR = bytes.fromhex("a9059cbb")  # transfer(address,uint256)
+
+def encode_transfer_calldata(receiver, token_units):
+    """Calldata ERC-20 transfer yang dibangun lokal tanpa RPC."""
+    return "0x" + (TRANSFER_SELECTOR + bytes(12) + bytes.fromhex(receiver[2:]) + token_units.to_bytes(32, "big")).hex()
+
+def presign_fee_fields():
+    """Jadwal fee tetap untuk satu putaran pra-tanda tangan, diambil dari strategi fee."""
+    return SENDER.fees.current_fields()
+
+def build_transfer_tx(receiver, token_units, nonce, fee_fields, chain_id):
+    """Transaksi transfer lengkap (siap tanda tangan) tanpa panggilan RPC."""
+    tx = {
+        'to': SENDER.token_address,
+        'value': 0,
+        'data': encode_transfer_calldata(receiver, token_units),
+        'gas': 65000,  # Gas limit 65,000
+        'nonce': nonce,
+        'chainId': chain_id
+    }
+    tx.update(fee_fields)
+    return tx
+
+def sign_transfer_chunk(private_key, txs):
+    """Dijalankan di ProcessPoolExecutor: menandatangani transaksi, mengembalikan [(nonce, tx_hash, raw)]."""
+    from eth_account import Account
+    signed = []
+    for tx in txs:
+        signed_tx = Account.sign_transaction(tx, private_key)
+        signed.append((tx["nonce"], signed_tx.hash.hex(), bytes(signed_tx.raw_transaction)))
+    return signed
+
+class PresignQueue:
+    """Antrean transaksi pra-tanda tangan di SQLite, dikonsumsi berurutan per nonce dan bisa dilanjutkan."""
+
+    def __init__(self, path):
+        self.lock = Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS presigned (
+                sender TEXT NOT NULL,
+                nonce INTEGER NOT NULL,
+                receiver TEXT NOT NULL,
+                amount REAL NOT NULL,
+                tx_hash TEXT NOT NULL,
+                raw BLOB NOT NULL,
+                status TEXT NOT NULL DEFAULT 'signed',
+                PRIMARY KEY (sender, nonce)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def put_many(self, sender, rows):
+        """Menyimpan [(nonce, receiver, amount, tx_hash, raw)] berstatus 'signed'."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO presigned (sender, nonce, receiver, amount, tx_hash, raw, status) VALUES (?, ?, ?, ?, ?, ?, 'signed')",
+                [(sender, *row) for row in rows]
+            )
+
+    def signed_rows(self, sender, from_nonce):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT nonce, receiver, amount, tx_hash, raw FROM presigned WHERE sender = ? AND status = 'signed' AND nonce >= ? ORDER BY nonce",
+                (sender, from_nonce)
+            ).fetchall()
+
+    def mark(self, sender, nonce, status):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE presigned SET status = ? WHERE sender = ? AND nonce = ?", (status, sender, nonce))
+
+    def discard(self, sender, below_nonce=None, from_nonce=None):
+        """Menandai transaksi 'signed' yang nonce-nya sudah tidak berlaku sebagai 'stale'."""
+        with self.lock, self.conn:
+            if below_nonce is not None:
+                self.conn.execute("UPDATE presigned SET status = 'stale' WHERE sender = ? AND status = 'signed' AND nonce < ?", (sender, below_nonce))
+            if from_nonce is not None:
+                self.conn.execute("UPDATE presigned SET status = 'stale' WHERE sender = ? AND status = 'signed' AND nonce >= ?", (sender, from_nonce))
+
+    def close(self):
+        self.conn.close()
+
+class PresignedFeed(RecipientFeed):
+    """Feed transaksi pra-tanda tangan: urutan nonce tetap, sehingga penerima tidak bisa dilewati."""
+
+    def __init__(self, rows):
+        super().__init__([])
+        self.rows = deque(rows)
+        self.by_receiver = {}
+
+    def next(self):
+        with self.lock:
+            if self.exhausted or not self.rows:
+                return None
+            row = self.rows.popleft()
+            self.by_receiver[row[1]] = row
+            return row[1], row[2], token_units(row[2])
+
+    def give_back(self, item):
+        # Nonce berikutnya bergantung pada nonce ini; sisa antrean disimpan untuk dilanjutkan nanti
+        with self.lock:
+            self.exhausted = True
+
+    def halt(self):
+        """Menghentikan feed setelah penyiaran gagal; nonce sesudahnya tidak bisa ditambang lagi."""
+        with self.lock:
+            self.exhausted = True
 
-MIN_TOKEN_AMOUNT = 10.0
-MAX_TOKEN_AMOUNT = 50.0
-DAILY_WALLET_LIMIT = 200
-MAX_TOTAL_SEND = 1000  # Token
-CSV_FILE = "wallets.csv"
-SENT_FILE = "sent_wallets.txt"
+    def row_for(self, receiver):
+        with self.lock:
+            return self.by_receiver[receiver]
 
-# Tetapkan waktu log saat program mulai
-JAKARTA_TZ = pytz.timezone('Asia/Jakarta')
-START_TIME = datetime.now(JAKARTA_TZ).strftime('%Y%m%d_%H%M%S')
-TRANSACTION_LOG = f"runtime_logs/transactions_{START_TIME}.log"
+def broadcast_presigned(queue, feed, receiver, shard):
+    """Menyiarkan raw transaction dari antrean. Bila gagal, sisa antrean ditandai 'stale'."""
+    nonce, receiver, amount, tx_hash_hex, raw = feed.row_for(receiver)
+    SENDER.journal.signed(shard.address, nonce, [(receiver, amount)], tx_hash_hex, raw)
+    try:
+        tx_hash = SENDER.w3.eth.send_raw_transaction(raw)
+    except Exception as e:
+        error_msg = str(e)
+        if "already known" in error_msg or "nonce too low" in error_msg:
+            # Sudah ada di mempool / chain dari putaran sebelumnya; tracker yang menentukan hasilnya
+            tx_hash = HexBytes(tx_hash_hex)
+        else:
+            logger.error("❌ Gagal menyiarkan transaksi pra-tanda tangan nonce %s ke %s: %s", nonce, receiver, error_msg)
+            queue.discard(shard.address, from_nonce=nonce)
+            SENDER.journal.mark(shard.address, nonce, "failed")
+            feed.halt()
+            shard.nonces.refresh()
+            return None
+    queue.mark(shard.address, nonce, "broadcast")
+    SENDER.journal.mark(shard.address, nonce, "broadcast")
+    logger.info("Transaksi pra-tanda tangan disiarkan ke %s | Nonce: %s | Jumlah: %s token | TX Hash: %s", receiver, nonce, amount, tx_hash.hex())
+    return tx_hash, nonce, None, 0  # Fee sudah terkunci di tanda tangan; transaksi macet dibatalkan, bukan diganti
 
-# Connect to Web3
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
-if not w3.is_connected():
-    logger.error("❌ Gagal terhubung ke jaringan!")
-    console.print("[bold red]❌ Gagal terhubung ke jaringan![/bold red]")
-    exit()
+def run_presigned(transfers, progress=None, task=None, shard=None):
+    """Mode pra-tanda tangan: bangun transaksi lokal, tanda tangani paralel di beberapa proses, lalu siarkan.
 
-# Token contract
-TOKEN_ABI = [
-    {
-        "name": "transfer",
-        "type": "function",
-        "stateMutability": "nonpayable",
-        "inputs": [
-            {"name": "_to", "type": "address"},
-            {"name": "_value", "type": "uint256"}
-        ],
-        "outputs": [{"name": "", "type": "bool"}]
-    },
-    {
-        "name": "decimals",
-        "type": "function",
-        "stateMutability": "view",
-        "inputs": [],
-        "outputs": [{"name": "", "type": "uint8"}]
-    },
-    {
-        "name": "balanceOf",
-        "type": "function",
-        "stateMutability": "view",
-        "inputs": [{"name": "_owner", "type": "address"}],
-        "outputs": [{"name": "balance", "type": "uint256"}]
-    }
-]
-token_contract = w3.eth.contract(address=TOKEN_CONTRACT_ADDRESS, abi=TOKEN_ABI)
-TOKEN_DECIMALS = token_contract.functions.decimals().call()
+    Transaksi yang sudah ditandatangani pada putaran sebelumnya dilanjutkan tanpa ditandatangani ulang
+    selama nonce-nya masih berlaku dan penerima serta jumlahnya ada di rencana hari ini (dan belum
+    dikirimi); transaksi itu menggantikan entri rencananya. Sisanya ditandai 'stale'.
+    Mengembalikan (total token terkirim, jumlah dompet diproses).
+    """
+    shard = shard or SENDER.primary_shard
+    queue = PresignQueue(STATE_DB)
+    shard.nonces.refresh()
+    start_nonce = shard.nonces.nonce
+    queue.discard(shard.address, below_nonce=start_nonce)
 
-MAX_THREADS = 2
-RPC_SEMAPHORE = Semaphore(MAX_THREADS)
-nonce_lock = Lock()
-file_lock = Lock()
-global_nonce = w3.eth.get_transaction_count(SENDER_ADDRESS, "pending")
+    transfers = list(transfers)
+    planned_amounts = {receiver: amount for receiver, amount, _ in transfers}
+    day = today_key()
+    resumed = []
+    for row in queue.signed_rows(shard.address, start_nonce):
+        nonce, receiver, amount = row[:3]
+        # Nonce harus bersambung; baris pertama yang tidak cocok memutus sisa antrean. Entri rencana dipakai sekali.
+        if nonce != start_nonce + len(resumed) or planned_amounts.pop(receiver, None) != amount or SENDER.store.is_sent(receiver, day):
+            break
+        resumed.append(row)
+    queue.discard(shard.address, from_nonce=start_nonce + len(resumed))
+    if resumed:
+        logger.info(f"♻️ Melanjutkan {len(resumed)} transaksi pra-tanda tangan mulai nonce {start_nonce}")
+        shard.nonces.advance_to(start_nonce + len(resumed))
 
-def get_dynamic_max_gas_price():
-    """Menghitung batas harga gas maksimum secara dinamis dengan batas realistis."""
+    resumed_receivers = {row[1] for row in resumed}
+    feed = RecipientFeed(transfer for transfer in transfers if transfer[0] not in resumed_receivers)
+    fee_fields = presign_fee_fields()
+    chain_id = SENDER.w3.eth.chain_id
+    txs = []
+    planned = {}
+    while True:
+        item = feed.next()
+        if item is None:
+            break
+        receiver, amount, units = item
+        nonce = shard.nonces.next()
+        txs.append(build_transfer_tx(receiver, units, nonce, fee_fields, chain_id))
+        planned[nonce] = (receiver, amount)
+
+    if txs:
+        started = time.time()
+        chunks = [txs[i:i + PRESIGN_CHUNK] for i in range(0, len(txs), PRESIGN_CHUNK)]
+        with ProcessPoolExecutor(max_workers=PRESIGN_WORKERS) as executor:
+            for signed in executor.map(sign_transfer_chunk, itertools.repeat(shard.private_key), chunks):
+                queue.put_many(shard.address, [(nonce, *planned[nonce], tx_hash, raw) for nonce, tx_hash, raw in signed])
+        logger.info(f"✍️ {len(txs)} transaksi ditandatangani dengan {PRESIGN_WORKERS} proses dalam {time.time() - started:.2f} detik")
+
+    presigned_feed = PresignedFeed(queue.signed_rows(shard.address, start_nonce))
     try:
-        fee_history = w3.eth.fee_history(10, "latest", reward_percentiles=[50])  # Gunakan persentil 50 untuk stabilitas
-        base_fee = max(fee_history["baseFeePerGas"]) / 10**9
-        priority_fee = max(w3.eth.max_priority_fee / 10**9, 0.1)  # Minimum 0.1 Gwei
-        dynamic_max = (base_fee + priority_fee) * 1.1  # Margin 1.1x untuk Sepolia
-        # Batasi maksimum pada 5 Gwei untuk testnet Sepolia
-        return min(dynamic_max, 5)
-    except Exception as e:
-        logger.warning(f"⚠️ Gagal menghitung max gas dinamis: {e}. Menggunakan default.")
-        return min(w3.eth.gas_price / 10**9 * 1.1, 5)  # Fallback realistis
+        return run_pipeline(
+            presigned_feed, progress, task, shard=shard,
+            submit=lambda receiver, amount, token_amount, shard: broadcast_presigned(queue, presigned_feed, receiver, shard)
+        )
+    finally:
+        # Sisa antrean tetap 'signed' untuk putaran berikutnya; nonce lokal disinkronkan ke chain
+        shard.nonces.refresh()
+        queue.close()
 
-def get_gas_price(attempt=1, max_gas_price_gwei=None):
-    """Menghitung harga gas dengan batas biaya transaksi."""
+def send_from_shard(shard, tx):
+    """Menandatangani, menyiarkan, dan menunggu transaksi sederhana dari satu shard. Mengembalikan receipt."""
+    fee_fields, fee_reserved = SENDER.fees.fee_fields(tx.get('gas', 65000))
     try:
-        base_fee = w3.eth.fee_history(1, "latest", reward_percentiles=[50])["baseFeePerGas"][-1] / 10**9
-        priority_fee = max(w3.eth.max_priority_fee / 10**9, 0.1)  # Minimum 0.1 Gwei
-        multiplier = 1.1 + (attempt - 1) * 0.1  # Multiplier rendah untuk Sepolia
-        gas_price = (base_fee + priority_fee) * multiplier
-        effective_max = max_gas_price_gwei if max_gas_price_gwei > 0 else get_dynamic_max_gas_price()
-        # Pastikan biaya transaksi tidak melebihi MAX_TX_FEE_ETH
-        max_gas_price_from_fee = (MAX_TX_FEE_ETH * 10**18) / 65000 / 10**9  # Gas limit 65,000
-        logger.info(f"Menghitung harga gas: base_fee={base_fee:.2f}, priority_fee={priority_fee:.2f}, multiplier={multiplier:.2f}, gas_price={gas_price:.2f}, effective_max={effective_max:.2f}")
-        return min(gas_price, effective_max, max_gas_price_from_fee)
-    except Exception as e:
-        logger.warning(f"⚠️ Gagal mengambil harga gas: {e}. Menggunakan default.")
-        default_gas_price = w3.eth.gas_price / 10**9
-        effective_max = max_gas_price_gwei if max_gas_price_gwei > 0 else get_dynamic_max_gas_price()
-        return min(default_gas_price * 1.1, effective_max, 5)
+        tx.update({
+            'from': shard.address,
+            'nonce': shard.nonces.next(),
+            'chainId': SENDER.w3.eth.chain_id,
+            **fee_fields
+        })
+        receipt = send_with_replacement(tx, shard, [])
+        shard.ledger.charge_gas(receipt)
+        return receipt
+    finally:
+        SENDER.fees.release(fee_reserved)
 
-def get_next_nonce():
-    with nonce_lock:
-        global global_nonce
-        current_nonce = global_nonce
-        global_nonce += 1
-        return current_nonce
+def topup_shards(shards, token_target_units):
+    """Mengisi ulang saldo native dan token tiap shard dari TREASURY_PRIVATE_KEY.
 
-def refresh_nonce():
-    with nonce_lock:
-        global global_nonce
+    Bila treasury juga salah satu shard (mis. PRIMARY), ledger-nya dipotong sebesar top-up yang terkirim
+    agar pipeline shard itu tidak memesan saldo yang sudah berpindah.
+    """
+    if not SENDER.treasury_private_key:
+        return
+    treasury_address = SENDER.w3.eth.account.from_key(SENDER.treasury_private_key).address
+    treasury = next((shard for shard in SENDER.shards if shard.address == treasury_address), None)
+    if treasury is None:
+        treasury = SenderShard(SENDER.w3, SENDER.token_contract, SENDER.treasury_private_key)
+    min_native_wei = SENDER.w3.to_wei(SHARD_MIN_NATIVE_ETH, 'ether')
+    target_native_wei = SENDER.w3.to_wei(SHARD_TOPUP_NATIVE_ETH, 'ether')
+    for shard in shards:
+        if shard.address == treasury.address:
+            continue
         try:
-            global_nonce = w3.eth.get_transaction_count(SENDER_ADDRESS, "pending")
-            logger.info(f"🔄 Nonce di-refresh ke: {global_nonce}")
-        except Web3RPCError as e:
-            logger.error(f"❌ Gagal refresh nonce: {e}")
-            time.sleep(5)
-            global_nonce = w3.eth.get_transaction_count(SENDER_ADDRESS, "pending")
+            if shard.ledger.native_wei < min_native_wei:
+                value = target_native_wei - shard.ledger.native_wei
+                receipt = send_from_shard(treasury, {'to': shard.address, 'value': value, 'gas': 21000})
+                if receipt.status == 1:
+                    treasury.ledger.debit(native_wei=value)
+                logger.info(f"⛽ Top-up {value / 10**18:.6f} native ke {shard.address} | Status: {receipt.status}")
+            if shard.ledger.token_units < token_target_units:
+                value = token_target_units - shard.ledger.token_units
+                data = SENDER.token_contract.encode_abi("transfer", args=[shard.address, value])
+                receipt = send_from_shard(treasury, {'to': SENDER.token_address, 'value': 0, 'data': data, 'gas': 65000})
+                if receipt.status == 1:
+                    treasury.ledger.debit(token_units=value)
+                logger.info(f"🪙 Top-up {value / 10**SENDER.token_decimals:.4f} token ke {shard.address} | Status: {receipt.status}")
+            shard.ledger.seed()
+        except Exception as e:
+            logger.error(f"❌ Gagal top-up shard {shard.address}: {e}")
 
-def cancel_transaction(nonce, max_attempts=3):
-    for attempt in range(1, max_attempts + 1):
+def run_sharded(transfers, progress=None, task=None):
+    """Menyebar penerima ke beberapa kunci pengirim; tiap shard menjalankan pipeline dengan nonce sendiri.
+
+    Shard mengambil penerima dari antrean bersama, sehingga shard yang lebih cepat memproses lebih banyak
+    dan nonce gap pada satu shard tidak menahan shard lain.
+    """
+    transfers = list(transfers)
+    feed = RecipientFeed(transfers)
+    for shard in SENDER.shards:
+        shard.ledger.seed()
+    topup_shards(SENDER.shards, -(-sum(units for _, _, units in transfers) // len(SENDER.shards)))
+
+    results = []
+    results_lock = Lock()
+
+    def shard_worker(shard):
+        sent = run_pipeline(feed, progress, task, shard=shard)
+        with results_lock:
+            results.append(sent)
+
+    threads = [Thread(target=shard_worker, args=(shard,), daemon=True) for shard in SENDER.shards]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(sent for sent, _ in results), sum(processed for _, processed in results)
+
+async def wait_confirmation(tx_hashes, sender, nonce, timeout=RECEIPT_TIMEOUT):
+    """Versi async SENDER.confirmations.wait(): menunggu lewat pelacak blok bersama tanpa memblokir event loop.
+
+    Hash dilacak dengan callback yang membangunkan future di event loop, sehingga ribuan transaksi
+    in-flight tidak memakan satu thread atau satu polling receipt per hash.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    watched = [
+        SENDER.confirmations.watch(tx_hash, sender, nonce, callback=lambda _: loop.call_soon_threadsafe(changed.set))
+        for tx_hash in tx_hashes
+    ]
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            mined = next((tx for tx in watched if tx.event.is_set() and not tx.dropped), None)
+            if mined is not None:
+                return mined.receipt
+            if all(tx.event.is_set() for tx in watched):
+                raise TransactionNotFound(f"Nonce {nonce} sudah dipakai transaksi lain, {watched[-1].tx_hash.hex()} tidak ditambang")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeExhausted(f"Transaksi {watched[-1].tx_hash.hex()} belum terkonfirmasi setelah {timeout} detik")
+            changed.clear()
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for tx in watched:
+            SENDER.confirmations.forget(tx.tx_hash)
+
+async def wait_with_replacement(tx, tx_hash, shard, entries):
+    """Versi async send_with_replacement() untuk transaksi yang sudah disiarkan.
+
+    Bila belum ditambang setelah FEE_STUCK_TIMEOUT detik, transaksi diganti dengan fee lebih tinggi pada
+    nonce yang sama (maks. FEE_MAX_REPLACEMENTS kali) lewat broadcast_bumped(); biaya terburuknya sudah
+    dipesan oleh fee_fields(). Semua versi tetap dilacak; receipt versi yang ditambang dikembalikan.
+    """
+    nonce = tx['nonce']
+    hashes = [tx_hash]
+    for replacement in range(1, FEE_MAX_REPLACEMENTS + 1):
         try:
-            gas_price = get_gas_price(attempt=2, max_gas_price_gwei=MAX_GAS_PRICE_GWEI)
-            tx = {
-                'from': SENDER_ADDRESS,
-                'to': SENDER_ADDRESS,
-                'value': 0,
+            return await wait_confirmation(hashes, shard.address, nonce, timeout=FEE_STUCK_TIMEOUT)
+        except TimeExhausted:
+            pass
+        METRICS.inc("replacements_total", reason="stuck")
+        logger.warning("⏫ Nonce %s belum ditambang setelah %.0f detik. Mengganti dengan fee lebih tinggi (%s/%s)", nonce, FEE_STUCK_TIMEOUT, replacement, FEE_MAX_REPLACEMENTS)
+        try:
+            hashes.append(await asyncio.to_thread(broadcast_bumped, tx, shard, entries))
+        except FeeCapReached as e:
+            logger.warning("⚠️ %s. Tetap menunggu transaksi sebelumnya.", e)
+            break
+        except Exception as e:
+            if "nonce too low" not in str(e):
+                logger.warning("⚠️ Gagal mengganti transaksi nonce %s: %s", nonce, e)
+            break
+    return await wait_confirmation(hashes, shard.address, nonce)
+
+async def async_send_all(transfers, progress=None, task=None, max_retries=3):
+    """Backend async: satu event loop melacak ribuan transfer in-flight dengan konkurensi terbatas.
+
+    Penyiaran diserialkan per nonce lewat submit_transfer() di thread, sehingga memakai pool endpoint
+    bersama (failover, batching, metrik) dan journal yang sama dengan mesin lain; penantian receipt
+    berjalan bersamaan lewat ConfirmationTracker bersama, dan transaksi yang macet diganti pada nonce yang
+    sama (wait_with_replacement). Panggilan SQLite dan RPC sinkron tidak dijalankan di event loop.
+    Mengembalikan (total token terkirim, jumlah dompet diproses).
+    """
+    result = {"total_sent": 0, "processed": 0}
+    broadcast_lock = asyncio.Lock()
+    gate = asyncio.Semaphore(ASYNC_CONCURRENCY)
+
+    def finish(sent):
+        result["total_sent"] += sent
+        result["processed"] += 1
+        if progress is not None:
+            progress.advance(task)
+
+    async def send_one(receiver, amount, token_amount):
+        async with gate:
+            gas_reserve_wei = SENDER.fees.worst_case_wei()
+            shortfall = SENDER.ledger.reserve(token_amount, gas_reserve_wei)
+            if shortfall is not None:
+                logger.error("❌ Saldo %s pengirim tidak cukup untuk %s. Token: %s, Native: %s", shortfall, receiver, SENDER.ledger.token_balance(), SENDER.ledger.native_balance())
+                finish(0)
+                return
+            try:
+                async with broadcast_lock:
+                    submitted = await asyncio.to_thread(submit_transfer, receiver, amount, token_amount, max_retries)
+            except FeeBudgetExhausted as e:
+                logger.error("❌ %s", e)
+                submitted = None
+            if submitted is None:
+                SENDER.ledger.release(token_amount, gas_reserve_wei)
+                finish(0)
+                return
+            tx_hash, nonce, tx, fee_reserved = submitted
+            broadcast_at = time.monotonic()
+            try:
+                receipt = await wait_with_replacement(tx, tx_hash, SENDER.primary_shard, [(receiver, amount)])
+            except TransactionNotFound as e:
+                SENDER.fees.release(fee_reserved)
+                logger.warning("⚠️ %s. Transfer ke %s tidak ditambang.", e, receiver)
+                await asyncio.to_thread(SENDER.journal.mark, SENDER.sender_address, nonce, "failed")
+                await asyncio.to_thread(SENDER.ledger.release, token_amount, gas_reserve_wei, True)
+                finish(0)
+                return
+            except Exception as e:
+                # Sudah diganti hingga batas fee tetapi tetap belum ditambang
+                logger.warning("⚠️ Transaksi %s ke %s belum terkonfirmasi: %s. Membatalkan nonce %s.", tx_hash.hex(), receiver, e, nonce)
+                await asyncio.to_thread(cancel_transaction, nonce, 3, None, "timeout", tx)
+                SENDER.fees.release(fee_reserved)
+                await asyncio.to_thread(SENDER.ledger.release, token_amount, gas_reserve_wei, True)
+                finish(0)
+                return
+            METRICS.observe("broadcast_to_receipt_seconds", time.monotonic() - broadcast_at)
+            await asyncio.to_thread(SENDER.ledger.settle, token_amount, gas_reserve_wei, receipt)
+            SENDER.fees.release(fee_reserved)
+            await asyncio.to_thread(SENDER.journal.settle, SENDER.sender_address, nonce, receipt)
+            if receipt["status"] == 1:
+                logger.info("✅ Berhasil mengirim %s token ke %s | TX: %s | Gas Used: %s", amount, receiver, tx_hash.hex(), receipt["gasUsed"])
+                record_success(receiver, amount, tx_hash, receipt["gasUsed"])
+                finish(amount)
+            else:
+                logger.error("❌ Transaksi gagal untuk %s: status != 1 | TX: %s", receiver, tx_hash.hex())
+                finish(0)
+
+    tasks = [asyncio.create_task(send_one(*transfer)) for transfer in transfers]
+    await asyncio.gather(*tasks)
+    return result["total_sent"], result["processed"]
+
+def run_async_backend(transfers, progress=None, task=None):
+    """Menjalankan backend async dari kode sinkron."""
+    return asyncio.run(async_send_all(transfers, progress, task))
+
+def address_key(address):
+    """Kunci 20 byte untuk pengecekan keanggotaan alamat yang hemat memori."""
+    return bytes.fromhex(address[2:])
+
+def iter_recipients(path, exclude=None, chunk_size=RECIPIENT_SHUFFLE_CHUNK, stats=None, rng=random):
+    """Membaca CSV penerima secara streaming dalam satu kali lintasan.
+
+    Baris divalidasi dan dideduplikasi, alamat di `exclude` (himpunan kunci 20 byte) dilewati,
+    dan penerima diacak per blok `chunk_size` dengan `rng` sehingga memori tetap terbatas.
+    Statistik lintasan (rows/valid/invalid/duplicate/skipped) ditulis ke `stats` bila diberikan.
+    """
+    exclude = exclude if exclude is not None else set()
+    stats = stats if stats is not None else {}
+    stats.update(rows=0, valid=0, invalid=0, duplicate=0, skipped=0)
+    seen = set()
+    buffer = []
+    with open(path, "r", newline="") as f:
+        for line in csv.reader(f):
+            if not line:
+                continue
+            stats["rows"] += 1
+            address = line[0].strip()
+            if not Web3.is_address(address):
+                stats["invalid"] += 1
+                continue
+            key = address_key(address)
+            if key in seen:
+                stats["duplicate"] += 1
+                continue
+            seen.add(key)
+            stats["valid"] += 1
+            if key in exclude:
+                stats["skipped"] += 1
+                continue
+            buffer.append(address)
+            if len(buffer) >= chunk_size:
+                rng.shuffle(buffer)
+                for address in buffer:
+                    yield Web3.to_checksum_address(address)
+                buffer = []
+    rng.shuffle(buffer)
+    for address in buffer:
+        yield Web3.to_checksum_address(address)
+
+class DispatchPlan:
+    """Rencana pengiriman satu hari dalam bentuk kolom: penerima, jumlah, dan unit token.
+
+    Jumlah per penerima diturunkan dari hash (PLAN_SEED, tanggal, alamat) sehingga deterministik dan
+    tidak berubah bila rencana disusun ulang. Anggaran MAX_TOTAL_SEND dipotong sekali dengan jumlah
+    kumulatif saat rencana dibuat; saldo token dan gas dipotong dengan cara yang sama oleh `cut()`.
+    Mesin pengiriman hanya membaca `transfers()` tanpa keputusan per penerima.
+    """
+
+    MAGIC = b"MSPLAN1\n"
+
+    def __init__(self, day, seed, decimals, receivers, amounts, units=None):
+        self.day = day
+        self.seed = seed
+        self.decimals = decimals
+        self.receivers = receivers  # Alamat checksum
+        self.amounts = amounts  # array('Q'), satuan 1/AMOUNT_SCALE token
+        scale = 10 ** decimals
+        self.units = units if units is not None else [amount * scale // AMOUNT_SCALE for amount in amounts]
+
+    @staticmethod
+    def path_for(day):
+        return os.path.join(PLAN_DIR, f"plan_{day}.bin")
+
+    @staticmethod
+    def draw_amount(seed, day, receiver):
+        """Jumlah (satuan 1/AMOUNT_SCALE token) dari hash seed, tanggal, dan alamat; seragam di [MIN, MAX]."""
+        digest = hashlib.sha256(f"{seed}:{day}:{receiver.lower()}".encode()).digest()
+        fraction = int.from_bytes(digest[:8], "big") / 2**64
+        return round((MIN_TOKEN_AMOUNT + fraction * (MAX_TOKEN_AMOUNT - MIN_TOKEN_AMOUNT)) * AMOUNT_SCALE)
+
+    @classmethod
+    def build(cls, day, seed, decimals, receivers, budget=None):
+        """Menyusun rencana dari urutan `receivers` dan memotongnya pada `budget` token.
+
+        `budget` default MAX_TOTAL_SEND; pemanggil mengurangkan token yang sudah terkirim hari itu.
+        """
+        budget = MAX_TOTAL_SEND if budget is None else max(0, budget)
+        receivers = list(receivers)
+        amounts = array("Q", (cls.draw_amount(seed, day, receiver) for receiver in receivers))
+        count = bisect.bisect_right(list(itertools.accumulate(amounts)), round(budget * AMOUNT_SCALE))
+        if count < len(receivers):
+            logger.info(f"Rencana {day} dipotong di {count}/{len(receivers)} penerima oleh sisa MAX_TOTAL_SEND ({budget:.4f}/{MAX_TOTAL_SEND} token)")
+        return cls(day, seed, decimals, receivers[:count], amounts[:count])
+
+    def save(self, path=None):
+        """Menyimpan rencana secara atomik: header JSON lalu kolom alamat (20 byte), jumlah (u64), dan unit (u256)."""
+        path = path or self.path_for(self.day)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        amounts = array("Q", self.amounts)
+        if sys.byteorder != "little":
+            amounts.byteswap()
+        header = json.dumps({"day": self.day, "seed": self.seed, "decimals": self.decimals, "count": len(self)}).encode()
+        with open(path + ".tmp", "wb") as f:
+            f.write(self.MAGIC + header + b"\n")
+            f.write(b"".join(bytes.fromhex(receiver[2:]) for receiver in self.receivers))
+            f.write(amounts.tobytes())
+            f.write(b"".join(units.to_bytes(32, "big") for units in self.units))
+        os.replace(path + ".tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.readline() != cls.MAGIC:
+                raise ValueError(f"Berkas rencana tidak dikenal: {path}")
+            header = json.loads(f.readline())
+            count = header["count"]
+            addresses = f.read(20 * count)
+            amounts = array("Q")
+            amounts.frombytes(f.read(8 * count))
+            units_blob = f.read(32 * count)
+        if sys.byteorder != "little":
+            amounts.byteswap()
+        receivers = [Web3.to_checksum_address("0x" + addresses[i:i + 20].hex()) for i in range(0, len(addresses), 20)]
+        units = [int.from_bytes(units_blob[i:i + 32], "big") for i in range(0, len(units_blob), 32)]
+        return cls(header["day"], header["seed"], header["decimals"], receivers, amounts, units)
+
+    def with_decimals(self, decimals):
+        """Rencana yang sama dengan unit dihitung ulang bila desimal token berbeda dari saat disusun."""
+        if decimals == self.decimals:
+            return self
+        return DispatchPlan(self.day, self.seed, decimals, self.receivers, self.amounts)
+
+    def select(self, indices):
+        indices = list(indices)
+        return DispatchPlan(
+            self.day, self.seed, self.decimals, [self.receivers[i] for i in indices],
+            array("Q", (self.amounts[i] for i in indices)), [self.units[i] for i in indices]
+        )
+
+    def remaining(self, exclude):
+        """Entri yang belum dikirim: alamat di `exclude` (himpunan kunci 20 byte) dilewati."""
+        return self.select(i for i, receiver in enumerate(self.receivers) if address_key(receiver) not in exclude)
+
+    def cut(self, token_units=None, native_wei=None, gas_per_transfer_wei=0):
+        """Memotong rencana pada saldo token (jumlah unit kumulatif) dan saldo gas (jumlah transfer)."""
+        count = len(self)
+        if token_units is not None:
+            count = min(count, bisect.bisect_right(list(itertools.accumulate(self.units)), token_units))
+        if native_wei is not None and gas_per_transfer_wei > 0:
+            count = min(count, native_wei // gas_per_transfer_wei)
+        return self if count == len(self) else self.select(range(count))
+
+    def total_amount(self):
+        return sum(self.amounts) / AMOUNT_SCALE
+
+    def total_units(self):
+        return sum(self.units)
+
+    def transfers(self):
+        """(receiver, amount, token_units) per penerima, siap dikonsumsi mesin pengiriman."""
+        return zip(self.receivers, (amount / AMOUNT_SCALE for amount in self.amounts), self.units)
+
+    def __len__(self):
+        return len(self.receivers)
+
+def token_units(amount):
+    """Jumlah token (maks. 4 desimal) ke unit terkecil tanpa galat pembulatan float."""
+    return round(amount * AMOUNT_SCALE) * 10 ** SENDER.token_decimals // AMOUNT_SCALE
+
+def deploy_disperse_contract():
+    """Mengompilasi dan mendeploy contracts/Disperse.sol (butuh py-solc-x)."""
+    try:
+        import solcx
+    except ImportError:
+        raise RuntimeError("DISPERSE_CONTRACT kosong dan py-solc-x tidak terpasang untuk mendeploy contracts/Disperse.sol")
+    source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts", "Disperse.sol")
+    compiled = solcx.compile_files([source_path], output_values=["abi", "bin"])
+    artifact = next(v for k, v in compiled.items() if k.endswith(":Disperse"))
+    contract = SENDER.w3.eth.contract(abi=artifact["abi"], bytecode=artifact["bin"])
+    tx = contract.constructor().build_transaction({
+        'from': SENDER.sender_address,
+        'nonce': get_next_nonce(),
+        'chainId': SENDER.w3.eth.chain_id,
+        **SENDER.fees.current_fields()
+    })
+    receipt = send_with_replacement(tx, SENDER.primary_shard, [])
+    tx_hash = receipt.transactionHash
+    if receipt.status != 1:
+        raise RuntimeError(f"Deploy kontrak disperse gagal | TX: {tx_hash.hex()}")
+    logger.info(f"📦 Kontrak disperse dideploy di {receipt.contractAddress} | TX: {tx_hash.hex()}")
+    console.print(f"[green]📦 Kontrak disperse dideploy di {receipt.contractAddress}. Simpan sebagai DISPERSE_CONTRACT di .env[/green]")
+    return receipt.contractAddress
+
+def get_disperse_contract():
+    """Kontrak disperse untuk mode batch; dideploy otomatis bila DISPERSE_CONTRACT kosong."""
+    if SENDER.disperse_address is None:
+        SENDER.disperse_address = deploy_disperse_contract()
+    return SENDER.w3.eth.contract(address=SENDER.disperse_address, abi=DISPERSE_ABI)
+
+def ensure_disperse_allowance(spender, token_units):
+    """Memastikan allowance token ke kontrak disperse minimal `token_units`."""
+    allowance = SENDER.token_contract.functions.allowance(SENDER.sender_address, spender).call()
+    if allowance >= token_units:
+        return True
+    fee_fields, fee_reserved = SENDER.fees.fee_fields()
+    try:
+        tx = SENDER.token_contract.functions.approve(spender, token_units).build_transaction({
+            'from': SENDER.sender_address,
+            'nonce': get_next_nonce(),
+            'gas': 65000,  # Gas limit 65,000
+            'chainId': SENDER.w3.eth.chain_id,
+            **fee_fields
+        })
+        receipt = send_with_replacement(tx, SENDER.primary_shard, [])
+        SENDER.ledger.charge_gas(receipt)
+    finally:
+        SENDER.fees.release(fee_reserved)
+    tx_hash = receipt.transactionHash
+    if receipt.status != 1:
+        logger.error(f"❌ Approve ke kontrak disperse gagal | TX: {tx_hash.hex()}")
+        return False
+    logger.info(f"Approve {token_units / 10**SENDER.token_decimals} token ke {spender} | TX: {tx_hash.hex()}")
+    return True
+
+def batch_size_for_budget():
+    """Jumlah penerima per transaksi batch agar muat dalam BATCH_GAS_BUDGET."""
+    return max(1, min(BATCH_MAX_RECIPIENTS, (BATCH_GAS_BUDGET - DISPERSE_BASE_GAS) // DISPERSE_GAS_PER_RECIPIENT))
+
+def send_disperse_batch(contract, batch, max_retries=3):
+    """Mengirim satu batch [(receiver, amount, token_units)] dalam satu transaksi. Mengembalikan total token terkirim."""
+    recipients = [receiver for receiver, _, _ in batch]
+    values = [token_units for _, _, token_units in batch]
+    total_units = sum(values)
+    call = contract.functions.disperseToken(SENDER.token_address, recipients, values)
+    try:
+        gas_limit = min(int(call.estimate_gas({'from': SENDER.sender_address}) * 1.2), BATCH_GAS_BUDGET)
+    except Exception as e:
+        logger.error(f"❌ Estimasi gas batch ({len(batch)} penerima) gagal: {e}")
+        return 0
+
+    try:
+        fee_fields, fee_reserved = SENDER.fees.fee_fields(gas_limit)
+    except FeeBudgetExhausted as e:
+        logger.error(f"❌ {e}")
+        return 0
+    gas_reserve_wei = max(SENDER.fees.worst_case_wei(gas_limit), gas_limit * max_fee_per_gas(fee_fields))
+    shortfall = SENDER.ledger.reserve(total_units, gas_reserve_wei)
+    if shortfall is not None:
+        logger.error(f"❌ Saldo {shortfall} pengirim tidak cukup untuk batch {len(batch)} penerima")
+        SENDER.fees.release(fee_reserved)
+        return 0
+
+    entries = [(receiver, amount) for receiver, amount, _ in batch]
+    nonce = get_next_nonce()
+    receipt = None
+    for attempt in range(1, max_retries + 1):
+        try:
+            tx = call.build_transaction({
+                'from': SENDER.sender_address,
                 'nonce': nonce,
-                'gas': 21000,
-                'gasPrice': w3.to_wei(gas_price, 'gwei'),
-                'chainId': w3.eth.chain_id
-            }
-            signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            console.print(f"[yellow]🚫 Membatalkan nonce {nonce}: {tx_hash.hex()[:10]}...[/yellow]")
-            logger.info(f"Membatalkan transaksi nonce {nonce} dengan tx_hash: {tx_hash.hex()}")
-            w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            return tx_hash
+                'gas': gas_limit,
+                'chainId': SENDER.w3.eth.chain_id,
+                **fee_fields
+            })
+            logger.info(f"Batch {len(batch)} penerima disiarkan | Nonce: {nonce} | Gas Limit: {gas_limit} | {describe_fee(fee_fields)}")
+            receipt = send_with_replacement(tx, SENDER.primary_shard, entries)
+            break
+        except TransactionNotFound as e:
+            # Nonce sudah dipakai transaksi lain (dipastikan pelacak); tidak ada yang perlu dibatalkan
+            logger.warning(f"⚠️ Batch nonce {nonce} tidak ditambang: {e}")
+            SENDER.journal.mark(SENDER.sender_address, nonce, "failed")
+            SENDER.ledger.release(total_units, gas_reserve_wei, suspect_drift=True)
+            SENDER.fees.release(fee_reserved)
+            refresh_nonce()
+            return 0
+        except TimeExhausted as e:
+            logger.warning(f"⚠️ Batch nonce {nonce} belum terkonfirmasi: {e}. Membatalkan nonce {nonce}.")
+            cancel_transaction(nonce, reason="timeout", previous=tx)
+            SENDER.ledger.release(total_units, gas_reserve_wei, suspect_drift=True)
+            SENDER.fees.release(fee_reserved)
+            return 0
         except Web3RPCError as e:
-            if "capacity exceeded" in str(e):
-                logger.warning(f"⚠️ Kapasitas node penuh saat membatalkan nonce {nonce}. Mencoba lagi ({attempt}/{max_attempts})")
-                time.sleep(2 * attempt)
+            error_msg = str(e)
+            logger.error(f"❌ Percobaan {attempt} gagal menyiarkan batch: {error_msg}")
+            if "capacity exceeded" in error_msg and attempt < max_retries:
+                backoff("capacity exceeded", attempt)
                 continue
-            logger.error(f"❌ Gagal membatalkan nonce {nonce}: {e}")
-            return None
+            break
+        except Exception as e:
+            logger.error(f"❌ Percobaan {attempt} gagal menyiarkan batch: {e}")
+            break
+    if receipt is None:
+        SENDER.journal.mark(SENDER.sender_address, nonce, "failed")
+        SENDER.ledger.release(total_units, gas_reserve_wei)
+        SENDER.fees.release(fee_reserved)
+        refresh_nonce()
+        return 0
+
+    tx_hash = receipt.transactionHash
+    SENDER.ledger.settle(total_units, gas_reserve_wei, receipt)
+    SENDER.fees.release(fee_reserved)
+    SENDER.journal.settle(SENDER.sender_address, nonce, receipt)
+    if receipt.status != 1:
+        logger.error(f"❌ Batch {len(batch)} penerima gagal (status != 1) | TX: {tx_hash.hex()}")
+        return 0
+    gas_share = receipt.gasUsed // len(batch)
+    for receiver, amount, _ in batch:
+        record_success(receiver, amount, tx_hash, gas_share)
+    sent = sum(amount for _, amount, _ in batch)
+    logger.info(f"✅ Batch {len(batch)} penerima berhasil, total {sent:.4f} token | TX: {tx_hash.hex()} | Gas Used: {receipt.gasUsed}")
+    return sent
+
+def run_batch_mode(transfers, progress=None, task=None):
+    """Mode batch: penerima dikemas per transaksi disperse sesuai anggaran gas.
+
+    Mengembalikan (total token terkirim, jumlah dompet diproses).
+    """
+    contract = get_disperse_contract()
+    planned = list(transfers)
+    if not planned:
+        return 0, 0
+    if not ensure_disperse_allowance(contract.address, sum(units for _, _, units in planned)):
+        return 0, 0
+
+    per_batch = batch_size_for_budget()
+    total_sent = 0
+    for start in range(0, len(planned), per_batch):
+        batch = planned[start:start + per_batch]
+        total_sent += send_disperse_batch(contract, batch)
+        if progress is not None:
+            progress.advance(task, len(batch))
+    return total_sent, len(planned)
+
+def fetch_receipt(tx_hash):
+    try:
+        return SENDER.w3.eth.get_transaction_receipt(HexBytes(tx_hash))
+    except TransactionNotFound:
+        return None
+
+def resolve_from_receipt(row, receipt):
+    """Menerapkan receipt ke baris journal: catat penerima yang sudah terbayar."""
+    status = SENDER.journal.settle(row["sender"], row["nonce"], receipt)
+    if receipt.status == 1:
+        gas_share = receipt.gasUsed // len(row["entries"])
+        for receiver, amount in row["entries"]:
+            record_success(receiver, amount, receipt.transactionHash, gas_share)
+    return status
+
+def rebroadcast_or_replace(row, shard):
+    """Menyiarkan ulang transaksi yang hilang dari mempool; bila ditolak, ganti dengan fee lebih tinggi pada nonce yang sama."""
+    if row["raw"] is not None:
+        try:
+            return SENDER.w3.eth.send_raw_transaction(row["raw"])
         except Exception as e:
             if "already known" in str(e):
-                return None
-            logger.error(f"❌ Gagal membatalkan nonce {nonce}: {e}")
-            time.sleep(2)
-    return None
+                return HexBytes(row["tx_hash"])
+            logger.warning(f"⚠️ Siaran ulang nonce {row['nonce']} ditolak: {e}. Mengganti transaksi.")
 
-def display_initial_status():
+    if len(row["entries"]) != 1:
+        # Transaksi batch tidak dibangun ulang; nonce diisi dengan transaksi pembatalan
+        cancel_transaction(row["nonce"], shard=shard, reason="recovery")
+        SENDER.journal.mark(row["sender"], row["nonce"], "failed")
+        return None
+
+    receiver, amount = row["entries"][0]
+    # Fee lama hanya diketahui batas atasnya; dipakai sebagai acuan gasPrice agar pengganti pasti lebih tinggi
+    previous = {'gasPrice': row["gas_price"] or 0}
+    tx = build_transfer_tx(receiver, token_units(amount), row["nonce"], previous, SENDER.w3.eth.chain_id)
     try:
-        sender_balance = token_contract.functions.balanceOf(SENDER_ADDRESS).call() / (10 ** TOKEN_DECIMALS)
-        gas_price = get_gas_price(max_gas_price_gwei=MAX_GAS_PRICE_GWEI)
-        eth_balance = w3.eth.get_balance(SENDER_ADDRESS) / 10**18
-        estimated_gas_cost = (65000 * w3.to_wei(gas_price, 'gwei')) / 10**18  # Gas limit 65,000
-        dynamic_max = get_dynamic_max_gas_price()
-        
-        table = Table(title="Status Awal", box=box.ROUNDED, style="cyan")
-        table.add_column("Parameter", style="bold magenta")
-        table.add_column("Nilai", style="bold green")
-        
-        table.add_row("Saldo Token", f"{sender_balance:.4f} token")
-        table.add_row("Harga Gas Saat Ini", f"{gas_price:.2f} Gwei")
-        table.add_row("Estimasi Biaya Gas per TX", f"{estimated_gas_cost:.6f} TEA")
-        table.add_row("Saldo TEA Pengirim", f"{eth_balance:.4f} TEA")
-        table.add_row("Batas Gas Maksimum", f"{MAX_GAS_PRICE_GWEI if MAX_GAS_PRICE_GWEI > 0 else dynamic_max:.2f} Gwei")
-        table.add_row("Batas Biaya TX Maksimum", f"{MAX_TX_FEE_ETH:.2f} TEA")
-        
-        console.print(Panel(table, title="[bold cyan]📊 Informasi Awal[/bold cyan]", border_style="cyan"))
-        
-        if estimated_gas_cost > MAX_TX_FEE_ETH:
-            console.print(f"[red]❌ Estimasi biaya gas ({estimated_gas_cost:.6f} ETH) melebihi batas node ({MAX_TX_FEE_ETH} ETH). Transaksi mungkin gagal![/red]")
-            logger.error(f"Estimasi biaya gas ({estimated_gas_cost:.6f} ETH) > batas node ({MAX_TX_FEE_ETH} ETH)")
-        elif MAX_GAS_PRICE_GWEI > 0 and MAX_GAS_PRICE_GWEI < gas_price:
-            console.print(f"[yellow]⚠️ MAX_GAS_PRICE_GWEI ({MAX_GAS_PRICE_GWEI} Gwei) lebih rendah dari harga gas jaringan ({gas_price:.2f} Gwei).[/yellow]")
-            logger.warning(f"MAX_GAS_PRICE_GWEI ({MAX_GAS_PRICE_GWEI}) < harga gas jaringan ({gas_price:.2f})")
-        
-        logger.info(f"Status awal - Saldo Token: {sender_balance}, Gas Price: {gas_price} Gwei, ETH Balance: {eth_balance}, Max Gas: {MAX_GAS_PRICE_GWEI if MAX_GAS_PRICE_GWEI > 0 else dynamic_max} Gwei, Max TX Fee: {MAX_TX_FEE_ETH} ETH")
-        
-        return sender_balance, eth_balance
+        return broadcast_bumped(tx, shard, row["entries"])
     except Exception as e:
-        logger.error(f"❌ Gagal mengambil status awal: {e}")
-        console.print(f"[red]❌ Gagal mengambil status awal: {e}[/red]")
-        return 0, 0
+        logger.error(f"❌ Gagal mengganti transaksi nonce {row['nonce']}: {e}")
+        return None
 
-def send_worker(receiver, get_next_nonce_func, max_retries=3):
-    with RPC_SEMAPHORE:
-        if not Web3.is_address(receiver):
-            logger.error(f"❌ Alamat tidak valid: {receiver}")
-            console.print(f"[red]❌ Alamat tidak valid: {receiver}[/red]")
-            return 0
+def recover_inflight():
+    """Menyelesaikan transaksi dari run sebelumnya yang berhenti setelah broadcast tetapi sebelum receipt.
 
-        receiver = Web3.to_checksum_address(receiver)
-        amount = round(random.uniform(MIN_TOKEN_AMOUNT, MAX_TOKEN_AMOUNT), 4)
-        token_amount = int(amount * (10 ** TOKEN_DECIMALS))
+    Receipt diperiksa sekaligus, nonce yang macet disiarkan ulang atau diganti, dan penerima yang
+    sudah terbayar dicatat sehingga tidak dikirimi dua kali.
+    """
+    rows = SENDER.journal.unresolved()
+    if not rows:
+        return
+    started = time.time()
+    console.print(f"[cyan]♻️ Memulihkan {len(rows)} transaksi yang belum selesai dari run sebelumnya...[/cyan]")
+    shards_by_address = {shard.address: shard for shard in SENDER.shards}
+    counts = {"confirmed": 0, "failed": 0, "pending": 0}
 
-        sender_balance = token_contract.functions.balanceOf(SENDER_ADDRESS).call() / (10 ** TOKEN_DECIMALS)
-        if sender_balance < amount:
-            logger.error(f"❌ Saldo pengirim tidak cukup untuk {receiver}: {sender_balance} < {amount} token")
-            console.print(f"[red]❌ Saldo pengirim tidak cukup untuk {receiver}: {sender_balance} < {amount}[/red]")
-            return 0
+    with ThreadPoolExecutor(max_workers=min(32, len(rows))) as executor:
+        receipts = list(executor.map(lambda row: next(filter(None, map(fetch_receipt, row["hashes"])), None), rows))
+        latest_nonces = {sender: SENDER.w3.eth.get_transaction_count(sender, "latest") for sender in {row["sender"] for row in rows}}
 
-        eth_balance = w3.eth.get_balance(SENDER_ADDRESS) / 10**18
-        gas_price = get_gas_price(max_gas_price_gwei=MAX_GAS_PRICE_GWEI)
-        estimated_gas_cost = (65000 * w3.to_wei(gas_price, 'gwei')) / 10**18  # Gas limit 65,000
-        if eth_balance < estimated_gas_cost:
-            logger.error(f"❌ Saldo ETH tidak cukup untuk gas: {eth_balance} < {estimated_gas_cost} ETH")
-            console.print(f"[red]❌ Saldo ETH tidak cukup untuk gas: {eth_balance} < {estimated_gas_cost} ETH[/red]")
-            return 0
-        if estimated_gas_cost > MAX_TX_FEE_ETH:
-            logger.error(f"❌ Biaya gas ({estimated_gas_cost:.6f} ETH) melebihi batas node ({MAX_TX_FEE_ETH} ETH)")
-            console.print(f"[red]❌ Biaya gas ({estimated_gas_cost:.6f} ETH) melebihi batas node ({MAX_TX_FEE_ETH} ETH)[/red]")
-            return 0
+        waiting = []
+        for row, receipt in zip(rows, receipts):
+            if receipt is not None:
+                counts[resolve_from_receipt(row, receipt)] += 1
+            elif row["nonce"] < latest_nonces[row["sender"]]:
+                # Nonce sudah terpakai, tetapi endpoint bisa tertinggal: pelacak memastikan semua hash benar-benar hilang
+                waiting.append((row, None))
+            elif row["sender"] in shards_by_address:
+                tx_hash = rebroadcast_or_replace(row, shards_by_address[row["sender"]])
+                if tx_hash is not None:
+                    waiting.append((row, tx_hash))
 
-        for attempt in range(1, max_retries + 1):
+        def wait(item):
+            row, tx_hash = item
+            hashes = row["hashes"] + ([tx_hash] if tx_hash is not None else [])
             try:
-                gas_price = get_gas_price(attempt=attempt, max_gas_price_gwei=MAX_GAS_PRICE_GWEI)
-                nonce = get_next_nonce_func()
-                logger.info(f"Memulai transaksi ke {receiver} | Nonce: {nonce} | Jumlah: {amount} token | Harga Gas: {gas_price:.1f} gwei")
-                console.print(f"[blue]🧾 TX ke {receiver} | Nonce: {nonce} | Harga Gas: {gas_price:.1f} gwei[/blue]")
-                time.sleep(random.uniform(0.5, 1.5))
-
-                tx = token_contract.functions.transfer(receiver, token_amount).build_transaction({
-                    'from': SENDER_ADDRESS,
-                    'nonce': nonce,
-                    'gas': 65000,  # Gas limit 65,000
-                    'gasPrice': w3.to_wei(gas_price, 'gwei'),
-                    'chainId': w3.eth.chain_id
-                })
-
-                signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-                tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                logger.info(f"Transaksi dikirim ke {receiver} | TX Hash: {tx_hash.hex()} | Menunggu konfirmasi...")
-                
-                time.sleep(5)
-                try:
-                    w3.eth.get_transaction(tx_hash)
-                except TransactionNotFound:
-                    logger.warning(f"⚠️ Transaksi {tx_hash.hex()} tidak ditemukan di mempool. Mencoba ulang...")
-                    cancel_transaction(nonce)
-                    continue
+                return row, SENDER.confirmations.wait(hashes, sender=row["sender"], nonce=row["nonce"])
+            except TransactionNotFound:
+                return row, "dropped"
+            except Exception:
+                return row, None
 
-                receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        for row, receipt in executor.map(wait, waiting):
+            if receipt is None:
+                counts["pending"] += 1
+            elif receipt == "dropped":
+                # Nonce terpakai transaksi lain (mis. pembatalan) dan tidak ada versi yang ditambang
+                SENDER.journal.mark(row["sender"], row["nonce"], "failed")
+                counts["failed"] += 1
+            else:
+                counts[resolve_from_receipt(row, receipt)] += 1
 
-                if receipt.status == 1:
-                    sender_balance = token_contract.functions.balanceOf(SENDER_ADDRESS).call() / (10 ** TOKEN_DECIMALS)
-                    msg = f"✅ Berhasil mengirim {amount} token ke {receiver} | TX: {tx_hash.hex()}"
-                    logger.info(f"{msg} | Gas Used: {receipt.gasUsed}")
-                    console.print(msg)
-                    with file_lock:
-                        with open(SENT_FILE, "a") as f:
-                            f.write(f"{receiver}|{datetime.now(JAKARTA_TZ).strftime('%Y-%m-%d')}\n")
-                        with open(TRANSACTION_LOG, "a") as logf:
-                            logf.write(f"{datetime.now(JAKARTA_TZ)} | {receiver} | {amount} | {tx_hash.hex()} | Gas Used: {receipt.gasUsed}\n")
-                    return amount
-                else:
-                    logger.error(f"❌ Transaksi gagal untuk {receiver}: status != 1")
-                    raise Exception("Transaksi gagal (status != 1)")
+    for shard in SENDER.shards:
+        shard.nonces.refresh()
+    logger.info(f"♻️ Pemulihan selesai dalam {time.time() - started:.1f} detik: {counts}")
+    console.print(f"[cyan]♻️ Pemulihan selesai: {counts['confirmed']} terkonfirmasi, {counts['failed']} gagal, {counts['pending']} masih tertunda[/cyan]")
 
-            except Web3RPCError as e:
-                error_msg = str(e)
-                logger.error(f"❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}")
-                console.print(f"[red]❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}[/red]")
-                if "transaction underpriced" in error_msg:
-                    logger.info(f"⚠️ Harga gas terlalu rendah. Meningkatkan gas untuk percobaan berikutnya.")
-                    continue
-                if "exceeds the configured cap" in error_msg:
-                    logger.error(f"❌ Biaya gas terlalu tinggi untuk node. Membatalkan percobaan.")
-                    return 0
-                if "capacity exceeded" in error_msg and attempt < max_retries:
-                    logger.warning(f"⚠️ Kapasitas node penuh. Menunggu sebelum mencoba lagi ({attempt}/{max_retries})")
-                    time.sleep(2 * attempt)
-                    continue
-                if attempt == max_retries:
-                    logger.error(f"❌ Gagal mengirim ke {receiver} setelah {max_retries} percobaan")
-                    cancel_transaction(nonce)
-                    refresh_nonce()
-                    return 0
-                return 0
-            except TransactionNotFound:
-                logger.error(f"❌ Transaksi ke {receiver} tidak ditemukan di chain pada percobaan {attempt}")
-                console.print(f"[red]❌ Transaksi ke {receiver} tidak ditemukan di chain pada percobaan {attempt}[/red]")
-                cancel_transaction(nonce)
-                if attempt == max_retries:
-                    return 0
-                continue
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}")
-                console.print(f"[red]❌ Percobaan {attempt} gagal mengirim ke {receiver}: {error_msg}[/red]")
+def run_engine(transfers, progress=None, task=None):
+    """Menjalankan mesin pengiriman sesuai konfigurasi (async, batch, pra-tanda tangan, shard, pipeline, thread).
 
-                if "nonce too low" in error_msg or "replacement transaction underpriced" in error_msg:
-                    logger.info(f"⚠️ Nonce terlalu rendah atau transaksi diganti. Merefresh nonce.")
-                    refresh_nonce()
-                    continue
-                if attempt == max_retries:
-                    logger.error(f"❌ Gagal mengirim ke {receiver} setelah {max_retries} percobaan")
-                    cancel_transaction(nonce)
-                    refresh_nonce()
-                    return 0
-                time.sleep(3)
-        return 0
+    `transfers` adalah entri rencana harian (receiver, amount, token_units), mis. DispatchPlan.transfers().
+
+    Mengembalikan (total token terkirim, jumlah dompet diproses, saldo token pengirim tersisa).
+    """
+    total_sent = 0
+    if EXECUTION_BACKEND == "async":
+        total_sent, processed_count = run_async_backend(transfers, progress, task)
+        sender_balance = SENDER.ledger.token_balance()
+    elif BATCH_MODE:
+        total_sent, processed_count = run_batch_mode(transfers, progress, task)
+        sender_balance = SENDER.ledger.token_balance()
+    elif PRESIGN_MODE:
+        total_sent, processed_count = run_presigned(transfers, progress, task)
+        sender_balance = SENDER.ledger.token_balance()
+    elif len(SENDER.shards) > 1:
+        total_sent, processed_count = run_sharded(transfers, progress, task)
+        sender_balance = sum(shard.ledger.token_balance() for shard in SENDER.shards)
+    elif PIPELINE_MODE:
+        total_sent, processed_count = run_pipeline(transfers, progress, task)
+        sender_balance = SENDER.ledger.token_balance()
+    else:
+        sender_balance = SENDER.ledger.token_balance()
+        with ThreadPoolExecutor(max_workers=CONCURRENCY_CEILING if ADAPTIVE_CONCURRENCY else MAX_THREADS) as executor:
+            futures = [executor.submit(send_worker, transfer, get_next_nonce) for transfer in transfers]
+            for future in as_completed(futures):
+                try:
+                    sent = future.result()
+                    if sent is None:
+                        logger.error(f"❌ Nilai pengembalian dari send_worker adalah None untuk receiver")
+                        sent = 0
+                    total_sent += sent
+                    sender_balance = SENDER.ledger.token_balance()
+                    logger.info(f"Progres sementara: Total token dikirim = {total_sent} | Saldo pengirim tersisa: {sender_balance} token")
+                    if progress is not None:
+                        progress.advance(task)
+                except Exception as e:
+                    logger.error(f"❌ Error di thread: {e}")
+                    console.print(f"[red]❌ Error di thread: {e}[/red]")
+                if not ADAPTIVE_CONCURRENCY:
+                    time.sleep(0.5)
+        processed_count = len(futures)
+    return total_sent, processed_count, sender_balance
 
 def check_daily_quota():
-    today = datetime.now(JAKARTA_TZ).date()
-    sent_wallets = set()
-    if os.path.exists(SENT_FILE):
-        with open(SENT_FILE, "r") as f:
-            for line in f:
-                wallet, timestamp = line.strip().split("|") if "|" in line else (line.strip(), "1970-01-01")
-                if datetime.strptime(timestamp, "%Y-%m-%d").date() == today:
-                    sent_wallets.add(wallet)
-    return len(sent_wallets) >= DAILY_WALLET_LIMIT, len(sent_wallets)
+    sent_count = SENDER.store.count_for_day(today_key())
+    return sent_count >= DAILY_WALLET_LIMIT, sent_count
 
 def get_next_reset_time():
     now = datetime.now(JAKARTA_TZ)
@@ -387,56 +3245,118 @@ def countdown_to_next_day():
             time.sleep(0.25)
 
     console.print("[bold green]⏰ Waktu reset tercapai! Memulai pengiriman baru...[/bold green]")
+def pending_keys():
+    """Kunci alamat yang sudah dikirimi hari ini atau masih tertunda di journal."""
+    return {address_key(address) for address in SENDER.store.sent_addresses(today_key()) | SENDER.journal.unresolved_receivers()}
 
-if __name__ == "__main__":
+def plan_day(decimals, persist=True):
+    """Memuat rencana hari ini dari PLAN_DIR, atau menyusun dan menyimpannya bila belum ada.
+
+    Hanya membaca wallets.csv, STATE_DB, dan berkas rencana (tanpa I/O jaringan). Rencana disusun sekali
+    per hari; run berikutnya di hari yang sama hanya menyisakan penerima yang belum dikirim. Rencana baru
+    dipotong pada sisa MAX_TOTAL_SEND setelah token yang sudah terkirim atau masih tertunda hari itu. Dengan
+    `persist=False` (dry-run, plan-only) rencana baru hanya ditampilkan, tidak disimpan, sehingga
+    perubahan wallets.csv atau PLAN_SEED sesudahnya tetap terpakai oleh mode send.
+    """
+    day = today_key()
+    quota_full, sent_count = check_daily_quota()
+    sent_keys = pending_keys()
+    loader_stats = {}
+    path = DispatchPlan.path_for(day)
+    if os.path.exists(path):
+        plan = DispatchPlan.load(path).with_decimals(decimals)
+    else:
+        rng = random.Random(f"{PLAN_SEED}:{day}")
+        recipients = iter_recipients(CSV_FILE, exclude=sent_keys, stats=loader_stats, rng=rng)
+        spent = SENDER.store.tokens_for_day(day) + SENDER.journal.unresolved_tokens(day)
+        plan = DispatchPlan.build(
+            day, PLAN_SEED, decimals, itertools.islice(recipients, max(0, DAILY_WALLET_LIMIT - sent_count)),
+            budget=MAX_TOTAL_SEND - spent
+        )
+        if persist:
+            plan.save(path)
+        logger.info(f"🗒️ Rencana {day} disusun: {len(plan)} penerima, {plan.total_amount():.4f} token" + (f" | {path}" if persist else " (tidak disimpan)"))
+    return {
+        "day": day,
+        "sent_count": sent_count,
+        "quota_full": quota_full,
+        "planned": len(plan),
+        "plan": plan.remaining(sent_keys),
+        "loader_stats": loader_stats,
+    }
+
+def fit_to_balances(plan):
+    """Memotong rencana pada saldo token dan gas pengirim (ledger harus sudah di-seed)."""
+    if len(SENDER.shards) > 1:
+        return plan  # Shard tambahan diisi dari treasury saat run; ledger per shard yang membatasi
+    token_units_available, native_wei_available = SENDER.ledger.available()
+    return plan.cut(token_units_available, native_wei_available, estimate_gas_reserve_wei())
+
+def show_plan(day_plan, preview=10):
+    """Menampilkan rencana batch harian; estimasi biaya gas hanya bila sudah terhubung."""
+    plan = day_plan["plan"]
+    count = len(plan)
+    table = Table(show_header=False, box=box.SIMPLE)
+    table.add_row("📅 Tanggal", day_plan["day"])
+    table.add_row("📊 Kuota Terpakai", f"{day_plan['sent_count']}/{DAILY_WALLET_LIMIT}")
+    table.add_row("👥 Penerima Tersisa", f"{count} dari {day_plan['planned']} direncanakan")
+    table.add_row("🪙 Total Token", f"{plan.total_amount():.4f} (batas {MAX_TOTAL_SEND})")
+    if SENDER.fees is not None:
+        gas_wei = count * estimate_gas_reserve_wei()
+        table.add_row("⛽ Perkiraan Maks. Gas", f"{gas_wei / 10**18:.6f} ETH")
+    for receiver, amount, _ in itertools.islice(plan.transfers(), preview):
+        table.add_row(receiver, f"{amount:.4f} token")
+    if count > preview:
+        table.add_row("", f"... dan {count - preview} lainnya")
+    console.print(Panel(table, title="[bold cyan]🗒️ Rencana Pengiriman Harian[/bold cyan]", border_style="cyan"))
+    logger.info(f"Rencana {day_plan['day']}: {count}/{day_plan['planned']} penerima tersisa, {plan.total_amount():.4f} token | CSV: {day_plan['loader_stats']}")
+
+def run_daily():
+    """Loop pengiriman harian (mode send): kirim batch hari ini lalu tunggu reset berikutnya."""
+    if METRICS_PORT:
+        METRICS.serve(METRICS_PORT, METRICS_BIND)
+    if METRICS_SUMMARY_INTERVAL > 0:
+        METRICS.log_periodically(METRICS_SUMMARY_INTERVAL)
+    SENDER.gas_oracle.start()
+    recover_inflight()
     while True:
         console.print(Panel("[bold cyan]🚀 Memulai pengiriman token...[/bold cyan]"))
+        SENDER.fees.start_run()
 
         sender_balance, eth_balance = display_initial_status()
         if sender_balance == 0 or eth_balance == 0:
             logger.error("❌ Tidak dapat melanjutkan karena gagal mengambil status awal")
             exit()
 
-        quota_full, sent_count = check_daily_quota()
+        day_plan = plan_day(SENDER.token_decimals)
+        sent_count, loader_stats = day_plan["sent_count"], day_plan["loader_stats"]
         logger.info(f"Memeriksa kuota harian: {sent_count}/{DAILY_WALLET_LIMIT} dompet telah diproses hari ini")
-        if quota_full:
+        if day_plan["quota_full"]:
             console.print(f"[yellow]⚠️ Kuota harian ({DAILY_WALLET_LIMIT} dompet) telah tercapai![/yellow]")
             logger.info(f"Kuota harian tercapai ({sent_count}/{DAILY_WALLET_LIMIT}). Menunggu reset harian berikutnya.")
             countdown_to_next_day()
             continue
 
-        if sender_balance < MAX_TOTAL_SEND:
-            logger.error(f"❌ Saldo pengirim tidak cukup: {sender_balance} < {MAX_TOTAL_SEND}")
-            console.print(f"[red]❌ Saldo pengirim tidak cukup: {sender_balance} < {MAX_TOTAL_SEND}[/red]")
-            exit()
-
-        with open(CSV_FILE, "r") as f:
-            reader = csv.reader(f)
-            all_wallets = [line[0].strip() for line in reader if line and Web3.is_address(line[0].strip())]
-            if not all_wallets:
+        remaining = day_plan["plan"]
+        if not remaining:
+            if loader_stats and loader_stats["valid"] == 0:
                 logger.error("❌ Tidak ada alamat dompet yang valid di wallets.csv")
                 console.print("[red]❌ Tidak ada alamat dompet yang valid di wallets.csv[/red]")
                 exit()
-
-        sent_wallets = set()
-        if os.path.exists(SENT_FILE):
-            with open(SENT_FILE, "r") as f:
-                for line in f:
-                    wallet, timestamp = line.strip().split("|") if "|" in line else (line.strip(), "1970-01-01")
-                    if datetime.strptime(timestamp, "%Y-%m-%d").date() == datetime.now(JAKARTA_TZ).date():
-                        sent_wallets.add(wallet)
-
-        wallets_to_process = [w for w in all_wallets if w not in sent_wallets]
-        logger.info(f"Jumlah dompet yang akan diproses hari ini: {min(len(wallets_to_process), DAILY_WALLET_LIMIT - sent_count)}")
-
-        if not wallets_to_process:
-            logger.info("✅ Semua wallet dalam daftar telah diproses hari ini.")
-            console.print("[green]✅ Semua wallet dalam daftar telah diproses hari ini![/green]")
+            logger.info("✅ Semua wallet dalam rencana hari ini telah diproses.")
+            console.print("[green]✅ Semua wallet dalam rencana hari ini telah diproses![/green]")
             countdown_to_next_day()
             continue
 
-        random.shuffle(wallets_to_process)
-        total_sent = 0
+        plan = fit_to_balances(remaining)
+        if not plan:
+            logger.error(f"❌ Saldo pengirim tidak cukup untuk penerima berikutnya: {sender_balance} token, {eth_balance} ETH")
+            console.print(f"[red]❌ Saldo pengirim tidak cukup: {sender_balance} token, {eth_balance} ETH[/red]")
+            exit()
+        if len(plan) < len(remaining):
+            logger.warning(f"⚠️ Saldo hanya cukup untuk {len(plan)}/{len(remaining)} penerima tersisa ({plan.total_amount():.4f} token)")
+        logger.info(f"Penerima yang akan diproses: {len(plan)} | Total: {plan.total_amount():.4f} token")
+
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -445,44 +3365,70 @@ if __name__ == "__main__":
             TimeRemainingColumn(),
             console=console,
         ) as progress:
-            task = progress.add_task("Mengirim token...", total=min(len(wallets_to_process), DAILY_WALLET_LIMIT - sent_count))
-            with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-                futures = []
-                for receiver in wallets_to_process[:DAILY_WALLET_LIMIT - sent_count]:
-                    if total_sent >= MAX_TOTAL_SEND:
-                        logger.warning("⚠️ Batas maksimum total pengiriman tercapai")
-                        break
-                    futures.append(executor.submit(send_worker, receiver, get_next_nonce))
-                for future in as_completed(futures):
-                    try:
-                        sent = future.result()
-                        if sent is None:
-                            logger.error(f"❌ Nilai pengembalian dari send_worker adalah None untuk receiver")
-                            sent = 0
-                        total_sent += sent
-                        sender_balance = token_contract.functions.balanceOf(SENDER_ADDRESS).call() / (10 ** TOKEN_DECIMALS)
-                        logger.info(f"Progres sementara: Total token dikirim = {total_sent} | Saldo pengirim tersisa: {sender_balance} token")
-                        progress.advance(task)
-                    except Exception as e:
-                        logger.error(f"❌ Error di thread: {e}")
-                        console.print(f"[red]❌ Error di thread: {e}[/red]")
-                    time.sleep(0.5)
+            task = progress.add_task("Mengirim token...", total=len(plan))
+            total_sent, processed_count, sender_balance = run_engine(plan.transfers(), progress, task)
+            progress.update(task, total=processed_count)
 
-        logger.info(f"Selesai! Total token dikirim hari ini: {total_sent}")
+        logger.info(f"Statistik CSV: {loader_stats}")
+        logger.info(f"Selesai! Total token dikirim: {total_sent}")
+        logger.info(f"Statistik oracle gas: {SENDER.gas_oracle.stats()}")
+        logger.info(f"Statistik endpoint RPC: {SENDER.w3.provider.stats()}")
+        logger.info(f"Statistik konkurensi adaptif: {CONCURRENCY.stats()}")
+        logger.info(f"Statistik pelacak konfirmasi: {SENDER.confirmations.stats()}")
+        logger.info(f"Statistik strategi fee: {SENDER.fees.stats()}")
+        logger.info(f"📈 Ringkasan metrik: {METRICS.summary()}")
         console.print(Panel(
             f"[green]✅ Selesai Hari Ini!\n"
             f"Total Token Dikirim: {total_sent}\n"
-            f"Dompet Diproses: {sent_count + len(futures)}\n"
+            f"Dompet Diproses: {sent_count + processed_count}\n"
             f"Saldo Tersisa: {sender_balance:.4f} token[/green]",
             title="Ringkasan Harian",
             border_style="green"
         ))
 
-        remaining_wallets = [w for w in all_wallets if w not in sent_wallets]
-        if not remaining_wallets or total_sent >= MAX_TOTAL_SEND or sent_count + len(futures) >= DAILY_WALLET_LIMIT:
+        has_remaining = len(plan_day(SENDER.token_decimals)["plan"]) > 0
+        if not has_remaining or len(plan) < len(remaining) or sent_count + processed_count >= DAILY_WALLET_LIMIT:
             logger.info("✅ Pengiriman harian selesai atau kuota tercapai. Menunggu hari berikutnya.")
             console.print("[cyan]📅 Menunggu reset harian untuk pengiriman ulang...[/cyan]")
             countdown_to_next_day()
         else:
             logger.info("🔄 Melanjutkan pengiriman ke wallet tersisa hari ini.")
             console.print("[cyan]🔄 Melanjutkan pengiriman ke wallet tersisa...[/cyan]")
+
+RUN_MODES = ("send", "plan-only", "dry-run")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-sender token ERC-20 harian")
+    parser.add_argument(
+        "--mode", choices=RUN_MODES, default="send",
+        help="send: kirim setiap hari (default); plan-only: rencana + saldo dan estimasi gas dari chain, tanpa mengirim; "
+             "dry-run: rencana batch hari ini dari file lokal saja, tanpa I/O jaringan. plan-only dan dry-run tidak "
+             "menulis STATE_DB maupun berkas rencana"
+    )
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    # dry-run dan plan-only hanya membaca: STATE_DB dibuka sebagai salinan memori dan rencana tidak disimpan
+    persist = args.mode == "send"
+    sender = Sender.from_env().open_state(persist=persist).activate()
+    if args.mode == "dry-run":
+        # Tanpa RPC desimal token tidak diketahui; unit dihitung ulang saat mode send bila berbeda
+        show_plan(plan_day(sender.token_decimals if sender.token_decimals is not None else 18, persist=False))
+        return 0
+
+    try:
+        sender.connect()
+    except (ValueError, ConnectionError) as e:
+        logger.error(f"❌ {e}")
+        console.print(f"[bold red]❌ {e}![/bold red]")
+        return 1
+    if args.mode == "plan-only":
+        display_initial_status()
+        day_plan = plan_day(sender.token_decimals, persist=False)
+        day_plan["plan"] = fit_to_balances(day_plan["plan"])
+        show_plan(day_plan)
+        return 0
+    run_daily()
+
+if __name__ == "__main__":
+    exit(main())
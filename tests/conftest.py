@@ -0,0 +1,263 @@
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+import pytest
+import rlp
+from eth_abi import decode
+from eth_account import Account
+from eth_utils import keccak
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENDER_KEY = "0x" + "11" * 32
+SENDER = Account.from_key(SENDER_KEY).address
+TOKEN = Web3.to_checksum_address("0x" + "22" * 20)
+GWEI = 10**9
+DISPERSE_SELECTOR = keccak(text="disperseToken(address,address[],uint256[])")[:4].hex()
+
+
+def word(value):
+    return "0x" + value.to_bytes(32, "big").hex()
+
+
+class RpcError(Exception):
+    """Dilempar handler agar node menjawab dengan objek error JSON-RPC."""
+
+
+class FakeNode:
+    """Node JSON-RPC minimal di localhost; `handlers` memetakan metode ke fungsi(params) -> result."""
+
+    def __init__(self):
+        self.handlers = {
+            "web3_clientVersion": lambda params: "fake-node/0.1",
+            "eth_chainId": lambda params: hex(31337),
+            "eth_blockNumber": lambda params: hex(1),
+        }
+        self.calls = []
+        self.batch_sizes = []
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if isinstance(payload, list):
+                    node.batch_sizes.append(len(payload))
+                    body = [node.answer(item) for item in payload]
+                else:
+                    body = node.answer(payload)
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, request):
+        method = request["method"]
+        self.calls.append(method)
+        handler = self.handlers.get(method)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32601, "message": f"{method} tidak didukung"}}
+        try:
+            result = handler(request.get("params") or [])
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeChain(FakeNode):
+    """Chain tiruan di atas FakeNode: transaksi mentah didekode, ditambang per blok, dan transfer token dicatat.
+
+    Dengan `automine` setiap transaksi langsung masuk blok baru; tanpa itu transaksi menunggu `mine()`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = Lock()
+        self.reset()
+        self.handlers.update({
+            "eth_blockNumber": lambda params: hex(self.block),
+            "eth_getBalance": lambda params: hex(10**21),
+            "eth_gasPrice": lambda params: hex(GWEI),
+            "eth_maxPriorityFeePerGas": lambda params: hex(GWEI),
+            "eth_feeHistory": self.fee_history,
+            "eth_estimateGas": lambda params: hex(60000),
+            "eth_call": self.call,
+            "eth_getTransactionCount": self.transaction_count,
+            "eth_sendRawTransaction": self.send_raw_transaction,
+            "eth_getTransactionReceipt": lambda params: self.receipts.get(params[0]),
+            "eth_getTransactionByHash": lambda params: self.transactions.get(params[0]),
+            "eth_getBlockByNumber": self.get_block,
+        })
+
+    def reset(self, automine=True):
+        with self.lock:
+            self.automine = automine
+            self.block = 1
+            self.mined_nonces = {}
+            self.mempool = []
+            self.max_pending = 0
+            self.transactions = {}
+            self.receipts = {}
+            self.blocks = {1: []}
+            self.transfers = []
+            self.allowances = {}
+            self.disperse_batches = []
+
+    def fee_history(self, params):
+        count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+        return {
+            "oldestBlock": hex(max(1, self.block - count + 1)),
+            "baseFeePerGas": [hex(GWEI)] * (count + 1),
+            "gasUsedRatio": [0.5] * count,
+            "reward": [[hex(GWEI)] * len(params[2])] * count if len(params) > 2 else [],
+        }
+
+    def call(self, params):
+        data = bytes.fromhex(params[0].get("data", params[0].get("input", "0x"))[2:])
+        selector = data[:4].hex()
+        if selector == "313ce567":  # decimals()
+            return word(18)
+        if selector == "70a08231":  # balanceOf(address)
+            return word(10**30)
+        if selector == "dd62ed3e":  # allowance(address,address)
+            owner, spender = decode(["address", "address"], data[4:])
+            return word(self.allowances.get((Web3.to_checksum_address(owner), Web3.to_checksum_address(spender)), 0))
+        raise RpcError(f"eth_call {selector} tidak didukung")
+
+    def transaction_count(self, params):
+        address = Web3.to_checksum_address(params[0])
+        with self.lock:
+            count = self.mined_nonces.get(address, 0)
+            if params[1] == "pending":
+                count += sum(1 for tx in self.mempool if tx["from"] == address)
+        return hex(count)
+
+    def send_raw_transaction(self, params):
+        raw = bytes.fromhex(params[0][2:])
+        typed = raw[0] < 0x7f
+        fields = rlp.decode(raw[1:] if typed else raw)
+        nonce, to, value, data = (fields[1], fields[5], fields[6], fields[7]) if typed else (fields[0], fields[3], fields[4], fields[5])
+        price = fields[3] if typed else fields[1]
+        tx = {
+            "hash": "0x" + keccak(raw).hex(),
+            "from": Account.recover_transaction(raw),
+            "nonce": hex(int.from_bytes(nonce, "big")),
+            "to": Web3.to_checksum_address(to) if to else None,
+            "value": hex(int.from_bytes(value, "big")),
+            "input": "0x" + data.hex(),
+            "gasPrice": hex(int.from_bytes(price, "big")),
+            "blockNumber": None,
+        }
+        with self.lock:
+            if int(tx["nonce"], 16) < self.mined_nonces.get(tx["from"], 0):
+                raise RpcError("nonce too low")
+            if tx["hash"] in self.transactions:
+                raise RpcError("already known")
+            self.transactions[tx["hash"]] = tx
+            self.mempool.append(tx)
+            self.max_pending = max(self.max_pending, len(self.mempool))
+        if self.automine:
+            self.mine()
+        return tx["hash"]
+
+    def mine(self):
+        """Menambang seluruh mempool ke satu blok baru; transaksi dengan nonce terpakai dibuang."""
+        with self.lock:
+            self.block += 1
+            self.blocks[self.block] = []
+            for tx in sorted(self.mempool, key=lambda tx: int(tx["nonce"], 16)):
+                nonce = int(tx["nonce"], 16)
+                if nonce != self.mined_nonces.get(tx["from"], 0):
+                    continue
+                self.mined_nonces[tx["from"]] = nonce + 1
+                tx["blockNumber"] = hex(self.block)
+                self.blocks[self.block].append(tx["hash"])
+                self.receipts[tx["hash"]] = {
+                    "transactionHash": tx["hash"], "transactionIndex": "0x0", "blockHash": "0x" + f"{self.block:064x}",
+                    "blockNumber": hex(self.block), "from": tx["from"], "to": tx["to"], "cumulativeGasUsed": hex(50000),
+                    "gasUsed": hex(50000), "effectiveGasPrice": tx["gasPrice"], "contractAddress": None, "logs": [],
+                    "logsBloom": "0x" + "00" * 256, "status": "0x1", "type": "0x0",
+                }
+                data = bytes.fromhex(tx["input"][2:])
+                if data[:4].hex() == "a9059cbb":  # transfer(address,uint256)
+                    self.transfers.append((Web3.to_checksum_address(data[16:36]), int.from_bytes(data[36:68], "big")))
+                elif data[:4].hex() == "095ea7b3":  # approve(address,uint256)
+                    self.allowances[(tx["from"], Web3.to_checksum_address(data[16:36]))] = int.from_bytes(data[36:68], "big")
+                elif data[:4].hex() == DISPERSE_SELECTOR:
+                    _, recipients, values = decode(["address", "address[]", "uint256[]"], data[4:])
+                    self.transfers.extend((Web3.to_checksum_address(r), v) for r, v in zip(recipients, values))
+                    self.disperse_batches.append(len(recipients))
+            self.mempool = []
+            return self.block
+
+    def get_block(self, params):
+        number = self.block if params[0] in ("latest", "pending") else int(params[0], 16)
+        if number not in self.blocks:
+            return None
+        return {
+            "number": hex(number), "hash": "0x" + f"{number:064x}", "parentHash": "0x" + f"{number - 1:064x}",
+            "timestamp": hex(number), "baseFeePerGas": hex(GWEI), "gasLimit": hex(30_000_000), "gasUsed": "0x0",
+            "transactions": list(self.blocks[number]),
+        }
+
+
+@pytest.fixture
+def fake_node():
+    node = FakeNode()
+    yield node
+    node.close()
+
+
+@pytest.fixture(scope="session")
+def session_chain():
+    chain = FakeChain()
+    yield chain
+    chain.close()
+
+
+@pytest.fixture
+def chain(session_chain):
+    session_chain.reset()
+    return session_chain
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Direktori kerja kosong dengan runtime_logs/ untuk berkas relatif milik bot."""
+    (tmp_path / "runtime_logs").mkdir()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    """Modul bot; sender aktif yang dipasang Sender.activate() dipulihkan setelah tes."""
+    import multi_sender_cli_v2 as module
+    monkeypatch.setattr(module, "SENDER", module.SENDER)
+    return module
+
+
+@pytest.fixture
+def sender(bot, chain, workdir, monkeypatch):
+    """Sender yang terhubung ke FakeChain, dengan STATE_DB baru di direktori kerja tes."""
+    monkeypatch.setattr(bot, "STATE_DB", str(workdir / "state.db"))
+    sender = bot.Sender(private_key=SENDER_KEY, token_address=TOKEN, rpc_urls=chain.url).open_state().connect().activate()
+    sender.ledger.seed()
+    yield sender
+    sender.close()
@@ -0,0 +1,70 @@
+from threading import Thread
+
+from conftest import RpcError
+
+
+def controller(bot, initial=2, ceiling=8, cooldown=0):
+    return bot.AimdController(initial, 1, ceiling, latency_target=1.0, decrease_cooldown=cooldown)
+
+
+def test_window_grows_on_success_and_halves_on_underpriced(bot, monkeypatch):
+    aimd = controller(bot)
+    monkeypatch.setattr(bot, "ADAPTIVE_CONCURRENCY", True)
+    monkeypatch.setattr(bot, "CONCURRENCY", aimd)
+
+    for _ in range(4):
+        aimd.on_success()
+    assert aimd.window == 6  # Slow start: +1 per sukses
+
+    bot.signal_underpriced()
+    assert aimd.window == 3
+
+    aimd.on_success()
+    assert aimd.window == 3 + 1 / 3  # Setelah penurunan pertama: +1/jendela per sukses
+    assert aimd.stats()["decreases"] == 1
+
+
+def test_window_respects_ceiling_floor_and_cooldown(bot):
+    aimd = controller(bot, ceiling=3, cooldown=60)
+    for _ in range(5):
+        aimd.on_success()
+    assert aimd.window == 3
+
+    aimd.on_overload("tes")
+    aimd.on_overload("tes")  # Masih dalam cooldown
+    assert aimd.window == 1.5
+
+    slow = controller(bot, initial=1)
+    slow.observe_latency(5.0)  # Latensi di atas 2x target dianggap overload
+    assert slow.window == 1
+    slow.on_success()
+    assert slow.window == 1  # Tidak naik selama latensi di atas target
+
+
+def test_acquire_waits_for_window(bot):
+    aimd = controller(bot, initial=1)
+    aimd.acquire()
+    waiter = Thread(target=aimd.acquire, daemon=True)
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    aimd.on_success()  # Jendela naik ke 2, satu slot terbuka
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert aimd.inflight == 2
+
+
+def test_pool_reports_capacity_errors_as_overload(bot, fake_node, monkeypatch):
+    aimd = controller(bot, initial=8)
+    monkeypatch.setattr(bot, "ADAPTIVE_CONCURRENCY", True)
+    monkeypatch.setattr(bot, "CONCURRENCY", aimd)
+
+    def capacity_exceeded(params):
+        raise RpcError("capacity exceeded")
+
+    fake_node.handlers["eth_gasPrice"] = capacity_exceeded
+    pool = bot.RpcPool(bot.parse_rpc_endpoints(fake_node.url))
+    pool.make_request("eth_gasPrice", [])
+
+    assert aimd.window == 4
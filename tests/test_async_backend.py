@@ -0,0 +1,42 @@
+import time
+from threading import Thread
+
+from web3 import Web3
+
+RECEIVERS = [Web3.to_checksum_address("0x" + f"{i:040x}") for i in range(1, 6)]
+PLAN = [(receiver, 12.5, 125 * 10**17) for receiver in RECEIVERS]
+
+
+def test_async_backend_sends_through_shared_pool_and_tracker(bot, chain, sender, monkeypatch):
+    monkeypatch.setattr(bot, "ASYNC_CONCURRENCY", 3)
+
+    total_sent, processed = bot.run_async_backend(PLAN)
+
+    assert processed == len(PLAN)
+    assert sorted(receiver for receiver, _ in chain.transfers) == sorted(RECEIVERS)
+    assert round(total_sent, 4) == 12.5 * len(PLAN)
+    assert sender.confirmations.stats()["confirmed"] >= len(PLAN)
+    assert sum(endpoint["calls"] for endpoint in sender.w3.provider.stats()) > 0
+    assert sender.store.sent_addresses(bot.today_key()) == set(RECEIVERS)
+
+
+def test_stuck_transaction_is_replaced_on_same_nonce(bot, chain, sender, monkeypatch):
+    chain.automine = False
+    monkeypatch.setattr(bot, "FEE_STUCK_TIMEOUT", 0.3)
+    monkeypatch.setattr(bot, "MAX_GAS_PRICE_GWEI", 10)
+    result = {}
+    worker = Thread(target=lambda: result.update(out=bot.run_async_backend(PLAN[:1])), daemon=True)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while len(chain.mempool) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    with chain.lock:
+        stuck = chain.mempool.pop(0)  # Versi pertama tidak pernah ditambang
+    chain.mine()
+    worker.join(10)
+
+    assert result["out"] == (12.5, 1)
+    replacement = next(tx for tx in chain.transactions.values() if tx["blockNumber"] is not None)
+    assert replacement["nonce"] == stuck["nonce"]
+    assert int(replacement["gasPrice"], 16) > int(stuck["gasPrice"], 16)
+    assert chain.transfers == [(RECEIVERS[0], 125 * 10**17)]
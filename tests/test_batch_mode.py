@@ -0,0 +1,33 @@
+from web3 import Web3
+
+from conftest import SENDER
+
+DISPERSE = Web3.to_checksum_address("0x" + "d1" * 20)
+RECEIVERS = [Web3.to_checksum_address("0x" + f"{i:040x}") for i in range(1, 6)]
+PLAN = [(receiver, 12.5, 125 * 10**17) for receiver in RECEIVERS]
+
+
+def test_batches_follow_gas_budget_after_single_approve(bot, chain, sender, monkeypatch):
+    monkeypatch.setattr(sender, "disperse_address", DISPERSE)
+    # Anggaran gas cukup untuk 2 penerima per transaksi
+    monkeypatch.setattr(bot, "BATCH_GAS_BUDGET", bot.DISPERSE_BASE_GAS + 2 * bot.DISPERSE_GAS_PER_RECIPIENT)
+
+    total_sent, processed = bot.run_batch_mode(PLAN)
+
+    assert processed == 5
+    assert chain.disperse_batches == [2, 2, 1]
+    assert sorted(receiver for receiver, _ in chain.transfers) == sorted(RECEIVERS)
+    total_units = sum(units for _, units in chain.transfers)
+    assert chain.allowances[(SENDER, DISPERSE)] == total_units
+    assert round(total_units / 10**18, 4) == round(total_sent, 4)
+
+
+def test_existing_allowance_skips_approve(bot, chain, sender, monkeypatch):
+    monkeypatch.setattr(sender, "disperse_address", DISPERSE)
+    chain.allowances[(SENDER, DISPERSE)] = 10**30
+
+    bot.run_batch_mode(PLAN[:2])
+
+    assert chain.allowances[(SENDER, DISPERSE)] == 10**30
+    assert chain.disperse_batches == [2]
+    assert len(chain.transactions) == 1
@@ -0,0 +1,25 @@
+import pytest
+from web3 import Web3
+
+import benchmark
+
+
+def test_fault_injector_hooks_http_provider(fake_node):
+    provider = Web3.HTTPProvider(fake_node.url)
+    injector = benchmark.FaultInjector(error_rate=1)
+    injector.wrap(provider)
+
+    assert provider.make_request("eth_chainId", [])["result"] == hex(31337)
+    injector.active = True
+    response = provider.make_request("eth_chainId", [])
+
+    assert response["error"]["message"] == "capacity exceeded"
+    assert injector.roundtrips == injector.injected_errors == 1
+
+
+def test_fault_injector_rejects_provider_without_session_manager():
+    class Provider:
+        pass
+
+    with pytest.raises(RuntimeError, match="web3.py 7.x"):
+        benchmark.FaultInjector().wrap(Provider())
@@ -0,0 +1,106 @@
+from web3 import Web3
+
+from conftest import SENDER as CHAIN_SENDER, FakeChain
+
+SENDER = Web3.to_checksum_address("0x" + "aa" * 20)
+TX_HASH = "0x" + "ab" * 32
+
+
+def mined_receipt(block_number):
+    return {
+        "transactionHash": TX_HASH, "transactionIndex": "0x0", "blockHash": "0x" + "cd" * 32,
+        "blockNumber": hex(block_number), "from": SENDER, "to": "0x" + "bb" * 20, "cumulativeGasUsed": "0x5208",
+        "gasUsed": "0x5208", "effectiveGasPrice": "0x1", "contractAddress": None, "logs": [],
+        "logsBloom": "0x" + "00" * 256, "status": "0x1", "type": "0x2",
+    }
+
+
+def test_tx_mined_in_processed_head_resolves_without_new_block(bot, fake_node):
+    """Automine: transaksi masuk blok yang sudah diproses tracker dan tidak ada blok baru sesudahnya."""
+    fake_node.handlers["eth_blockNumber"] = lambda params: hex(5)
+    fake_node.handlers["eth_getTransactionCount"] = lambda params: hex(1)
+    fake_node.handlers["eth_getTransactionReceipt"] = lambda params: mined_receipt(5)
+    tracker = bot.ConfirmationTracker(Web3(Web3.HTTPProvider(fake_node.url)), poll_interval=0.05)
+    tracker.on_head(5)
+    try:
+        receipt = tracker.wait(TX_HASH, timeout=5, sender=SENDER, nonce=0)
+    finally:
+        tracker.stop()
+    assert receipt.status == 1
+    assert "eth_getBlockByNumber" not in fake_node.calls
+
+
+def mine_until_resolved(tracker, chains, pending_tx, max_heads=10):
+    heads = 0
+    while not pending_tx.event.is_set() and heads < max_heads:
+        head = [chain.mine() for chain in chains][0]
+        tracker.on_head(head)
+        heads += 1
+    return heads
+
+
+def test_missing_receipt_is_dropped_only_after_consecutive_heads(bot, chain):
+    chain.mined_nonces[CHAIN_SENDER] = 1  # Nonce 0 sudah dipakai transaksi yang tidak dilacak
+    tracker = bot.ConfirmationTracker(Web3(Web3.HTTPProvider(chain.url)), poll_interval=60, drop_heads=3)
+    pending_tx = tracker.watch(TX_HASH, CHAIN_SENDER, 0)
+    try:
+        tracker.on_head(chain.mine())
+        assert not pending_tx.event.is_set()  # Satu receipt kosong belum cukup
+        mine_until_resolved(tracker, [chain], pending_tx)
+    finally:
+        tracker.stop()
+    assert pending_tx.dropped
+    assert pending_tx.missing_heads == 3
+
+
+def test_receipt_on_another_endpoint_keeps_transaction_pending(bot, chain):
+    ahead = FakeChain()
+    try:
+        for fake in (chain, ahead):
+            fake.mined_nonces[CHAIN_SENDER] = 1
+        # Endpoint kedua sudah melihat receipt; endpoint pertama tertinggal dan menjawab kosong
+        ahead.receipts[TX_HASH] = mined_receipt(1) | {"from": CHAIN_SENDER}
+        pool = bot.RpcPool(bot.parse_rpc_endpoints(f"{chain.url},{ahead.url}"))
+        tracker = bot.ConfirmationTracker(Web3(pool), poll_interval=60, drop_heads=2)
+        pending_tx = tracker.watch(TX_HASH, CHAIN_SENDER, 0)
+        try:
+            mine_until_resolved(tracker, [chain, ahead], pending_tx, max_heads=6)
+        finally:
+            tracker.stop()
+    finally:
+        ahead.close()
+    assert not pending_tx.dropped
+
+
+def test_mined_replacement_from_journal_resolves_original_hash(bot, chain):
+    replacement = "0x" + "ef" * 32
+    chain.mined_nonces[CHAIN_SENDER] = 1
+    chain.receipts[replacement] = mined_receipt(1) | {"transactionHash": replacement, "from": CHAIN_SENDER}
+    tracker = bot.ConfirmationTracker(
+        Web3(Web3.HTTPProvider(chain.url)), poll_interval=60,
+        sibling_hashes=lambda sender, nonce: [replacement[2:]] if (sender, nonce) == (CHAIN_SENDER, 0) else []
+    )
+    pending_tx = tracker.watch(TX_HASH, CHAIN_SENDER, 0)
+    try:
+        mine_until_resolved(tracker, [chain], pending_tx)
+    finally:
+        tracker.stop()
+    assert not pending_tx.dropped
+    assert pending_tx.receipt.transactionHash.hex() == replacement[2:]
+
+
+def test_send_worker_fails_dropped_row_without_cancel_or_resend(bot, chain, sender, monkeypatch):
+    chain.automine = False
+    cancels = []
+    monkeypatch.setattr(bot, "cancel_transaction", lambda *args, **kwargs: cancels.append(args))
+
+    def dropped(tx, shard, entries):
+        bot.broadcast_bumped(tx, shard, entries, bump_first=False)
+        raise bot.TransactionNotFound(f"Nonce {tx['nonce']} sudah dipakai transaksi lain")
+
+    monkeypatch.setattr(bot, "send_with_replacement", dropped)
+    assert bot.send_worker(("0x" + "88" * 20, 12.5, 125 * 10**17), bot.get_next_nonce) == 0
+
+    assert cancels == []
+    assert len(chain.transactions) == 1
+    assert sender.journal.conn.execute("SELECT status FROM journal").fetchall() == [("failed",)]
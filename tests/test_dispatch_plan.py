@@ -0,0 +1,32 @@
+from web3 import Web3
+
+
+def write_wallets(path, count):
+    path.write_text("\n".join(Web3.to_checksum_address("0x" + f"{i:040x}") for i in range(1, count + 1)) + "\n")
+
+
+def test_dry_run_plan_leaves_no_files(bot, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_wallets(tmp_path / "wallets.csv", 5)
+    (tmp_path / "sent_wallets.txt").write_text(f"{Web3.to_checksum_address('0x' + f'{1:040x}')}|{bot.today_key()}\n")
+
+    bot.Sender().open_state(persist=False).activate()
+    day_plan = bot.plan_day(18, persist=False)
+
+    assert day_plan["sent_count"] == 1
+    assert len(day_plan["plan"]) == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["sent_wallets.txt", "wallets.csv"]
+
+
+def test_plan_budget_counts_tokens_already_sent_today(bot, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(bot, "MAX_TOTAL_SEND", 10)
+    monkeypatch.setattr(bot, "MIN_TOKEN_AMOUNT", 1)
+    monkeypatch.setattr(bot, "MAX_TOKEN_AMOUNT", 1)
+    write_wallets(tmp_path / "wallets.csv", 20)
+
+    sender = bot.Sender().open_state(persist=False).activate()
+    sender.store.record(Web3.to_checksum_address("0x" + "ff" * 20), bot.today_key(), 7, "0x01", 21000)
+    day_plan = bot.plan_day(18, persist=False)
+
+    assert len(day_plan["plan"]) == 3
@@ -0,0 +1,97 @@
+import pytest
+
+
+class StubOracle:
+    def __init__(self, gwei):
+        self.gwei = gwei
+
+    def gas_price(self, attempt=1, max_gas_price_gwei=0):
+        return self.gwei
+
+    def snapshot(self):
+        return {"dynamic_max": 5, "legacy": True}
+
+
+def test_budget_reserves_inflight_worst_case(bot, monkeypatch):
+    monkeypatch.setattr(bot, "MAX_GAS_PRICE_GWEI", 2)
+    fees = bot.LegacyFeeStrategy(StubOracle(1.5), budget_eth=0.0003)
+    worst_case = 65000 * 2 * 10**9  # Batas fee, bukan fee awal 1.5 Gwei
+    granted = [fees.fee_fields() for _ in range(2)]
+    assert [reserved for _, reserved in granted] == [worst_case, worst_case]
+    with pytest.raises(bot.FeeBudgetExhausted):
+        fees.fee_fields()
+
+    fees.release(granted[0][1])
+    fees.charge({"gasUsed": 21000, "effectiveGasPrice": 10**9})
+    _, reserved = fees.fee_fields()
+    assert fees.reserved_wei == 2 * worst_case
+    assert fees.spent_wei == 21000 * 10**9
+
+
+def test_reservation_covers_every_replacement(bot, monkeypatch):
+    monkeypatch.setattr(bot, "MAX_GAS_PRICE_GWEI", 2)
+    fees = bot.LegacyFeeStrategy(StubOracle(1.0), budget_eth=1)
+    fields, reserved = fees.fee_fields()
+    while True:
+        try:
+            fields = fees.replacement_fields(fields)
+        except bot.FeeCapReached:
+            break
+        assert 65000 * fields["gasPrice"] <= reserved
+    assert fees.replacements > 0
+
+
+def test_dynamic_cap_reserves_max_tx_fee(bot, monkeypatch):
+    monkeypatch.setattr(bot, "MAX_GAS_PRICE_GWEI", 0)
+    fees = bot.LegacyFeeStrategy(StubOracle(1.0), budget_eth=1)
+    _, reserved = fees.fee_fields()
+    assert reserved == bot.MAX_TX_FEE_ETH * 10**18
+
+
+def test_unlimited_budget_reserves_nothing(bot):
+    fees = bot.LegacyFeeStrategy(StubOracle(1.5))
+    fields, reserved = fees.fee_fields()
+    assert fields == {"gasPrice": 1500000000}
+    assert reserved == 0 and fees.reserved_wei == 0
+
+
+class StubEth:
+    chain_id = 31337
+
+    def __init__(self):
+        self.sent = []
+        self.account = self
+
+    def sign_transaction(self, tx, private_key):
+        self.sent.append(dict(tx))
+        return type("Signed", (), {"raw_transaction": b"raw"})()
+
+    def send_raw_transaction(self, raw):
+        return bytes(32)
+
+
+def test_cancel_bumps_over_last_broadcast_fee(bot, tmp_path, monkeypatch):
+    eth = StubEth()
+    sender = bot.Sender().activate()
+    sender.w3 = type("W3", (), {"eth": eth})()
+    sender.fees = bot.LegacyFeeStrategy(StubOracle(1.0))
+    sender.journal = bot.RunJournal(str(tmp_path / "state.db"))
+    sender.confirmations = type("Tracker", (), {"wait": lambda self, *args, **kwargs: None})()
+    monkeypatch.setattr(bot, "MAX_GAS_PRICE_GWEI", 10)
+    shard = type("Shard", (), {"address": "0x" + "aa" * 20, "private_key": "11" * 32})()
+    # Transaksi macet sudah dinaikkan ke 2 Gwei, di atas fee jaringan 1 Gwei
+    sender.journal.signed(shard.address, 4, [("0xreceiver", 10.0)], "0x01", b"raw", 2 * 10**9)
+
+    bot.cancel_transaction(4, shard=shard)
+    assert eth.sent[-1]["gasPrice"] == 2 * 10**9 * 1125 // 1000
+
+    bot.cancel_transaction(4, shard=shard, previous={"gasPrice": 4 * 10**9})
+    assert eth.sent[-1]["gasPrice"] == 4 * 10**9 * 1125 // 1000
+
+
+def test_incomplete_strategy_fails_at_construction(bot):
+    class NoFields(bot.FeeStrategy):
+        pass
+
+    with pytest.raises(TypeError, match="current_fields"):
+        NoFields(StubOracle(1))
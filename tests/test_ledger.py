@@ -0,0 +1,32 @@
+from conftest import RpcError
+
+
+def test_rejected_broadcast_releases_without_reconcile(bot, chain, sender, monkeypatch):
+    reconciles = []
+    monkeypatch.setattr(sender.ledger, "reconcile", lambda: reconciles.append(1))
+
+    def reject(params):
+        raise RpcError("tx fee (1.00 ether) exceeds the configured cap (0.50 ether)")
+
+    chain.handlers["eth_sendRawTransaction"] = reject
+    try:
+        assert bot.send_worker(("0x" + "66" * 20, 12.5, 125 * 10**17), bot.get_next_nonce) == 0
+    finally:
+        chain.handlers["eth_sendRawTransaction"] = chain.send_raw_transaction
+
+    assert reconciles == []
+    assert sender.ledger.reserved_token_units == 0
+    assert sender.ledger.reserved_gas_wei == 0
+
+
+def test_transaction_dropped_for_another_nonce_user_reconciles(bot, sender, monkeypatch):
+    reconciles = []
+    monkeypatch.setattr(sender.ledger, "reconcile", lambda: reconciles.append(1))
+
+    def dropped(tx, shard, entries):
+        raise bot.TransactionNotFound("nonce sudah dipakai transaksi lain")
+
+    monkeypatch.setattr(bot, "send_with_replacement", dropped)
+    assert bot.send_worker(("0x" + "77" * 20, 12.5, 125 * 10**17), bot.get_next_nonce) == 0
+    assert reconciles == [1]
+    assert sender.ledger.reserved_token_units == 0
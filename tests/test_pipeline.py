@@ -0,0 +1,34 @@
+import time
+from threading import Thread
+
+from web3 import Web3
+
+RECEIVERS = [Web3.to_checksum_address("0x" + f"{i:040x}") for i in range(1, 7)]
+PLAN = [(receiver, 12.5, 125 * 10**17) for receiver in RECEIVERS]
+
+
+def test_pipeline_keeps_unconfirmed_transactions_within_window(bot, chain, sender, monkeypatch):
+    chain.automine = False
+    monkeypatch.setattr(bot, "INFLIGHT_WINDOW", 2)
+    monkeypatch.setattr(bot, "RECEIPT_POLL_INTERVAL", 0.01)
+    result = {}
+    submitter = Thread(target=lambda: result.update(out=bot.run_pipeline(PLAN)), daemon=True)
+    submitter.start()
+    while submitter.is_alive():
+        time.sleep(0.2)  # Beri waktu submitter melewati jendela bila tidak dibatasi
+        assert len(chain.mempool) <= 2
+        chain.mine()
+    total_sent, processed = result["out"]
+
+    assert processed == len(RECEIVERS)
+    assert chain.max_pending == 2
+    assert sorted(receiver for receiver, _ in chain.transfers) == sorted(RECEIVERS)
+    assert round(sum(units for _, units in chain.transfers) / 10**18, 4) == round(total_sent, 4)
+
+
+def test_pipeline_records_each_confirmed_receiver_once(bot, chain, sender, monkeypatch):
+    monkeypatch.setattr(bot, "RECEIPT_POLL_INTERVAL", 0.01)
+    bot.run_pipeline(PLAN[:3])
+
+    assert sender.store.sent_addresses(bot.today_key()) == set(RECEIVERS[:3])
+    assert sender.store.count_for_day(bot.today_key()) == 3
@@ -0,0 +1,43 @@
+from web3 import Web3
+
+A, B, C, OLD = (Web3.to_checksum_address("0x" + f"{i:040x}") for i in (0xA, 0xB, 0xC, 0xD))
+
+
+class StubNonces:
+    def __init__(self, chain_nonce):
+        self.chain_nonce = chain_nonce
+        self.nonce = chain_nonce
+
+    def refresh(self):
+        self.nonce = self.chain_nonce
+
+    def advance_to(self, nonce):
+        self.nonce = max(self.nonce, nonce)
+
+    def next(self):
+        self.nonce += 1
+        return self.nonce - 1
+
+
+def test_resumed_rows_are_limited_to_todays_plan(bot, tmp_path, monkeypatch):
+    path = str(tmp_path / "state.db")
+    monkeypatch.setattr(bot, "STATE_DB", path)
+    sender = bot.Sender(token_address="0x" + "22" * 20, token_decimals=18).activate()
+    sender.store = bot.SentStore(path)
+    sender.w3 = type("W3", (), {"eth": type("Eth", (), {"chain_id": 31337})()})()
+    monkeypatch.setattr(bot, "PRESIGN_WORKERS", 1)
+    monkeypatch.setattr(bot, "presign_fee_fields", lambda: {"gasPrice": 10**9})
+    fed = []
+    monkeypatch.setattr(bot, "run_pipeline", lambda feed, *args, **kwargs: fed.extend(feed.rows) or (0, 0))
+    shard = type("Shard", (), {"address": "0x" + "aa" * 20, "private_key": "11" * 32, "nonces": StubNonces(5)})()
+
+    queue = bot.PresignQueue(path)
+    # Nonce 5 masih ada di rencana hari ini; nonce 6 milik rencana kemarin dan memutus sisa antrean
+    queue.put_many(shard.address, [(5, A, 10.0, "0x05", b"r5"), (6, OLD, 20.0, "0x06", b"r6"), (7, B, 30.0, "0x07", b"r7")])
+    queue.close()
+
+    plan = [(A, 10.0, 10 * 10**18), (B, 30.0, 30 * 10**18), (C, 40.0, 40 * 10**18)]
+    bot.run_presigned(plan, shard=shard)
+
+    assert [(nonce, receiver) for nonce, receiver, *_ in fed] == [(5, A), (6, B), (7, C)]
+    assert fed[0][3] == "0x05"  # Tanda tangan lama dipakai ulang
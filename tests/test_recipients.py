@@ -0,0 +1,24 @@
+from web3 import Web3
+
+ADDRESSES = [Web3.to_checksum_address("0x" + f"{i:040x}") for i in range(1, 11)]
+
+
+def test_stream_dedupes_validates_and_skips_excluded(bot, tmp_path):
+    rows = ADDRESSES[:6] + [ADDRESSES[0].lower(), "bukan-alamat", "", ADDRESSES[2]] + ADDRESSES[6:]
+    path = tmp_path / "wallets.csv"
+    path.write_text("\n".join(rows) + "\n")
+    stats = {}
+
+    recipients = list(bot.iter_recipients(str(path), exclude={bot.address_key(ADDRESSES[1])}, stats=stats))
+
+    assert sorted(recipients) == sorted(set(ADDRESSES) - {ADDRESSES[1]})
+    assert stats == {"rows": 13, "valid": 10, "invalid": 1, "duplicate": 2, "skipped": 1}
+
+
+def test_shuffle_stays_within_chunk(bot, tmp_path):
+    path = tmp_path / "wallets.csv"
+    path.write_text("\n".join(ADDRESSES) + "\n")
+
+    recipients = list(bot.iter_recipients(str(path), chunk_size=4))
+
+    assert [sorted(recipients[i:i + 4]) for i in range(0, 10, 4)] == [sorted(ADDRESSES[i:i + 4]) for i in range(0, 10, 4)]
@@ -0,0 +1,32 @@
+from threading import Barrier, Thread
+
+
+def test_concurrent_reads_share_one_batch(bot, fake_node):
+    provider = bot.BatchingHTTPProvider(fake_node.url, batch_window=0.05)
+    barrier = Barrier(5)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(provider.make_request("eth_blockNumber", [])["result"])
+
+    threads = [Thread(target=read) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [hex(1)] * 5
+    assert fake_node.batch_sizes == [5]
+    assert provider.stats() == {"batches": 1, "requests": 5}
+
+
+def test_writes_bypass_batch_and_chain_id_is_memoized(bot, fake_node):
+    fake_node.handlers["eth_sendRawTransaction"] = lambda params: "0x" + "ab" * 32
+    provider = bot.BatchingHTTPProvider(fake_node.url, batch_window=0.05)
+
+    assert [provider.make_request("eth_chainId", [])["result"] for _ in range(3)] == [hex(31337)] * 3
+    provider.make_request("eth_sendRawTransaction", ["0x00"])
+
+    assert fake_node.calls == ["eth_chainId", "eth_sendRawTransaction"]
+    assert fake_node.batch_sizes == []
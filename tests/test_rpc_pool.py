@@ -0,0 +1,29 @@
+from web3 import Web3
+
+
+def test_pool_connects_and_routes_requests(bot, fake_node):
+    web3 = Web3(bot.RpcPool(bot.parse_rpc_endpoints(fake_node.url)))
+    assert web3.is_connected()
+    assert web3.eth.chain_id == 31337
+    assert "web3_clientVersion" in fake_node.calls
+
+
+def test_pool_fails_over_to_healthy_endpoint(bot, fake_node):
+    dead = "http://127.0.0.1:9"
+    web3 = Web3(bot.RpcPool(bot.parse_rpc_endpoints(f"{dead},{fake_node.url}")))
+    assert web3.is_connected()
+
+
+def test_pool_reports_disconnected_when_no_endpoint_answers(bot):
+    web3 = Web3(bot.RpcPool(bot.parse_rpc_endpoints("http://127.0.0.1:9")))
+    assert not web3.is_connected()
+
+
+def test_sender_connect_through_pool(bot, fake_node):
+    fake_node.handlers["eth_call"] = lambda params: "0x" + (18).to_bytes(32, "big").hex()
+    fake_node.handlers["eth_getTransactionCount"] = lambda params: hex(7)
+    sender = bot.Sender(private_key="0x" + "11" * 32, token_address="0x" + "22" * 20, rpc_urls=fake_node.url)
+    sender.connect()
+    assert sender.token_decimals == 18
+    assert sender.primary_shard.nonces.nonce == 7
+    assert bot.SENDER is None  # connect() tidak memasang state modul; itu tugas activate()
@@ -0,0 +1,57 @@
+from hexbytes import HexBytes
+
+
+def receipt(status, tx_hash, gas_used=21000):
+    return {"status": status, "transactionHash": HexBytes(tx_hash), "gasUsed": gas_used}
+
+
+def test_confirmed_transfers_survive_restart(bot, tmp_path):
+    path = str(tmp_path / "state.db")
+    store = bot.SentStore(path)
+    journal = bot.RunJournal(path)
+    sender = "0x" + "aa" * 20
+    receivers = ["0x" + f"{i:040x}" for i in range(1, 4)]
+    for nonce, receiver in enumerate(receivers):
+        tx_hash = "0x" + f"{nonce:064x}"
+        journal.signed(sender, nonce, [(receiver, 12.5)], tx_hash, b"raw")
+        assert journal.settle(sender, nonce, receipt(1, tx_hash)) == "confirmed"
+    # Proses mati tanpa menutup koneksi; state dibuka ulang dari berkas
+    restarted = bot.SentStore(path)
+    day = bot.today_key()
+    assert restarted.count_for_day(day) == 3
+    assert restarted.sent_addresses(day) == set(receivers)
+    assert not journal.unresolved_receivers()
+    store.close()
+
+
+def test_failed_receipt_records_nothing(bot, tmp_path):
+    path = str(tmp_path / "state.db")
+    journal = bot.RunJournal(path)
+    journal.signed("0xsender", 0, [("0xreceiver", 10.0)], "0x01", b"raw")
+    assert journal.settle("0xsender", 0, receipt(0, "0x01")) == "failed"
+    assert bot.SentStore(path).count_for_day(bot.today_key()) == 0
+
+
+def test_nonce_too_low_supersedes_old_row_before_new_nonce(bot, chain, sender):
+    from conftest import SENDER
+
+    receiver = "0x" + "44" * 20
+    chain.mined_nonces[SENDER] = 1  # nonce 0 sudah dipakai transaksi lain
+    tx_hash, nonce, _, fee_reserved = bot.submit_transfer(receiver, 12.5, 125 * 10**17)
+    sender.fees.release(fee_reserved)
+
+    assert nonce == 1
+    assert [(row["nonce"], row["entries"]) for row in sender.journal.unresolved()] == [(1, [(receiver, 12.5)])]
+    statuses = sender.journal.conn.execute("SELECT nonce, status FROM journal ORDER BY nonce").fetchall()
+    assert statuses == [(0, "superseded"), (1, "broadcast")]
+
+
+def test_send_worker_supersedes_row_rejected_with_nonce_too_low(bot, chain, sender):
+    from conftest import SENDER
+
+    receiver = "0x" + "55" * 20
+    chain.mined_nonces[SENDER] = 1
+    assert bot.send_worker((receiver, 12.5, 125 * 10**17), bot.get_next_nonce) == 12.5
+
+    statuses = sender.journal.conn.execute("SELECT nonce, status FROM journal ORDER BY nonce").fetchall()
+    assert statuses == [(0, "superseded"), (1, "confirmed")]
@@ -0,0 +1,19 @@
+from conftest import SENDER_KEY
+
+
+def test_topup_from_primary_debits_treasury_ledger(bot, chain, sender, monkeypatch):
+    shard = bot.SenderShard(sender.w3, sender.token_contract, "0x" + "33" * 32)
+    shard.ledger.seed()
+    monkeypatch.setattr(sender, "treasury_private_key", SENDER_KEY)
+    monkeypatch.setattr(bot, "SHARD_MIN_NATIVE_ETH", 2000)
+    monkeypatch.setattr(bot, "SHARD_TOPUP_NATIVE_ETH", 1001)
+    treasury = sender.primary_shard
+    token_before, native_before = treasury.ledger.token_units, treasury.ledger.native_wei
+    target = shard.ledger.token_units + 5 * 10**18
+
+    bot.topup_shards([treasury, shard], target)
+
+    assert [units for _, units in chain.transfers] == [5 * 10**18]
+    assert treasury.ledger.token_units == token_before - 5 * 10**18
+    gas_paid = native_before - treasury.ledger.native_wei - 10**18
+    assert 0 < gas_paid < 10**16